@@ -0,0 +1,92 @@
+import json
+import os
+import statistics
+import threading
+from collections import deque
+
+
+class ResolutionConfig:
+    """Gecikme bütçesine göre çıkarım çözünürlüğü ayarları (resolution.json); dosya yoksa kapalı"""
+
+    def __init__(self, enabled=False, budget_ms=33.0, sizes=(320, 416, 480, 512, 576, 640), min_size=416,
+                 window=10, up_ratio=0.8, cooldown=15):
+        self.enabled = enabled
+        # Kare başına hedef çıkarım süresi (30 fps için ~33 ms)
+        self.budget_ms = budget_ms
+        # YOLO girişleri 32'nin katı olmalı
+        self.sizes = sorted({int(s) // 32 * 32 for s in sizes if int(s) >= 32})
+        # Kritik sınıflarda geri çağırmayı korumak için bu boyutun altına inilmez
+        self.min_size = min_size
+        # Karar son N karenin medyanıyla verilir; tek tük yavaş kare boyut değiştirmez
+        self.window = window
+        # Histerezis: büyütme için tahmini süre bütçenin bu oranının altında kalmalı
+        self.up_ratio = up_ratio
+        # Değişiklikten sonra bu kadar kare ölçüm yapılmadan bekle
+        self.cooldown = cooldown
+
+    @classmethod
+    def from_file(cls, path="resolution.json"):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding='utf-8') as f:
+            return cls(**json.load(f))
+
+
+class ResolutionController:
+    """Ölçülen gecikmeyi bütçeyle karşılaştırıp izin verilen boyutlar arasında bir adım iner/çıkar"""
+
+    def __init__(self, config, start_size):
+        self.config = config
+        self.sizes = [s for s in config.sizes if s >= config.min_size] or [max(config.sizes)]
+        fitting = [s for s in self.sizes if s <= start_size]
+        self.index = self.sizes.index(fitting[-1]) if fitting else 0
+        self.samples = deque(maxlen=config.window)
+        self.skip = 0
+        self.changes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return self.sizes[self.index]
+
+    def observe(self, latency_seconds):
+        """Bir kare süresini kaydet; boyut değişirse yeni boyutu, değişmezse None döndür"""
+        if self.skip > 0:
+            self.skip -= 1
+            return None
+        with self._lock:
+            self.samples.append(latency_seconds * 1000.0)
+            if len(self.samples) < self.samples.maxlen:
+                return None
+            median = statistics.median(self.samples)
+        budget = self.config.budget_ms
+        if median > budget and self.index > 0:
+            return self._step(-1, median)
+        if self.index < len(self.sizes) - 1:
+            # Süre yaklaşık piksel sayısıyla (boyutun karesi) ölçeklenir
+            predicted = median * (self.sizes[self.index + 1] / float(self.size)) ** 2
+            if predicted < budget * self.config.up_ratio:
+                return self._step(1, median)
+        return None
+
+    def _step(self, direction, median):
+        old = self.size
+        self.index += direction
+        with self._lock:
+            self.samples.clear()
+        self.skip = self.config.cooldown
+        self.changes += 1
+        print(f"[ÇÖZÜNÜRLÜK] {old} -> {self.size} (medyan {median:.1f} ms, bütçe {self.config.budget_ms:.0f} ms)")
+        return self.size
+
+    def snapshot(self):
+        with self._lock:
+            median = statistics.median(self.samples) if self.samples else None
+        return {
+            'imgsz': self.size,
+            'median_ms': median,
+            'budget_ms': self.config.budget_ms,
+            'changes': self.changes,
+            'at_minimum': self.index == 0,
+        }
+
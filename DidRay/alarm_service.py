@@ -0,0 +1,296 @@
+import json
+import os
+import queue
+import threading
+import time
+from PyQt5.QtCore import QObject, pyqtSignal
+from danger_levels import DANGER_LEVELS, get_danger_level
+from utils import get_alarm_path
+
+# Öncelik sırası: listede önce gelen seviye daha kritik
+LEVEL_ORDER = list(DANGER_LEVELS)
+
+DEFAULT_RULES = {
+    # sound: None -> utils.get_alarm_path(); loop: tehdit sürdükçe çal
+    'Çok Yüksek': {'sound': None, 'loop': True, 'volume': 0.7, 'min_interval': 5.0,
+                   'escalate_after': 15.0, 'escalation_sound': None, 'audio': True},
+    'Yüksek': {'sound': None, 'loop': False, 'volume': 0.5, 'min_interval': 20.0,
+               'escalate_after': 30.0, 'escalation_sound': None, 'audio': True},
+    'Orta': {'sound': None, 'loop': False, 'volume': 0.5, 'min_interval': 30.0,
+             'escalate_after': None, 'escalation_sound': None, 'audio': False},
+}
+
+
+class AlarmPolicy:
+    """Tehlike seviyesi başına alarm kuralları (ses, tekrar sınırı, yükseltme)"""
+
+    def __init__(self, rules=None, hold_seconds=1.5, tick_seconds=0.2):
+        self.rules = {level: dict(rule) for level, rule in DEFAULT_RULES.items()}
+        for level, rule in (rules or {}).items():
+            if rule is None:
+                self.rules.pop(level, None)  # bu seviye alarm üretmez
+            else:
+                self.rules[level] = {**self.rules.get(level, DEFAULT_RULES['Orta']), **rule}
+        # Tespit bu kadar süre gelmezse kaynak temiz sayılır (tek karelik boşluklarda alarm titremesin)
+        self.hold_seconds = hold_seconds
+        self.tick_seconds = tick_seconds
+
+    @classmethod
+    def from_file(cls, path="alarm.json"):
+        """JSON dosyasından kuralları yükle, dosya yoksa varsayılanları kullan"""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding='utf-8') as f:
+            return cls(**json.load(f))
+
+    def rule(self, level):
+        return self.rules.get(level)
+
+
+def top_level(classes):
+    """Sınıflar içindeki en kritik tehlike seviyesi"""
+    levels = [get_danger_level(cls) for cls in classes]
+    return min(levels, key=LEVEL_ORDER.index) if levels else None
+
+
+class AlarmService(threading.Thread):
+    """Uygulama genelinde tek alarm servisi.
+
+    Video akışları sadece post() ile olay bırakır; ses, arayüz ve kayıt işleri
+    bu thread'de, eklenen sink'ler üzerinden yapılır. Sink arayüzü:
+    on_alarm(kind, state) -> kind: 'raised', 'updated', 'escalated', 'acknowledged', 'cleared'
+    """
+
+    def __init__(self, policy=None, sinks=None):
+        super().__init__(daemon=True, name="alarm-service")
+        self.policy = policy or AlarmPolicy.from_file()
+        self.sinks = list(sinks or [])
+        self.events = queue.Queue()
+        self.stop_event = threading.Event()
+        self._sinks_lock = threading.Lock()
+        self.sources = {}          # kaynak -> (seviye, sınıflar, son görülme)
+        self.state = None
+        self.last_raised = {}      # seviye -> son bildirim zamanı (tekrar sınırı)
+
+    # --- Her thread'den çağrılabilir (bloklamaz) ---
+
+    def post(self, source, classes):
+        """Bir akışın güncel karedeki tespit sınıflarını bildir"""
+        self.events.put_nowait(('detect', source, list(classes), time.monotonic()))
+
+    def clear(self, source):
+        """Akış durdu/duraklatıldı: bu kaynağın alarmını hemen kaldır"""
+        self.events.put_nowait(('clear', source, None, time.monotonic()))
+
+    def acknowledge(self, operator=None):
+        """Operatör alarmı gördü: mevcut alarm susturulur, daha kritik bir seviye yeniden çalar"""
+        self.events.put_nowait(('ack', operator, None, time.monotonic()))
+
+    def add_sink(self, sink):
+        with self._sinks_lock:
+            self.sinks.append(sink)
+
+    def remove_sink(self, sink):
+        with self._sinks_lock:
+            if sink in self.sinks:
+                self.sinks.remove(sink)
+
+    def stop(self):
+        self.stop_event.set()
+        self.events.put_nowait(('stop', None, None, time.monotonic()))
+
+    # --- Servis thread'i ---
+
+    def run(self):
+        # Ses sistemi gibi yavaş başlatmalar GUI/video yerine bu thread'de yapılır
+        for sink in list(self.sinks):
+            open_sink = getattr(sink, 'open', None)
+            if open_sink:
+                open_sink()
+        while not self.stop_event.is_set():
+            try:
+                event = self.events.get(timeout=self.policy.tick_seconds)
+            except queue.Empty:
+                event = None
+            try:
+                # Kuyrukta biriken olayları tek seferde işle, durumu bir kez değerlendir
+                while event is not None:
+                    self._apply(event)
+                    try:
+                        event = self.events.get_nowait()
+                    except queue.Empty:
+                        event = None
+                self._evaluate(time.monotonic())
+            except Exception as e:
+                print(f"[ALARM HATASI] {e}")
+        if self.state:
+            self._notify('cleared', dict(self.state, active=False))
+        for sink in list(self.sinks):
+            close = getattr(sink, 'close', None)
+            if close:
+                close()
+
+    def _apply(self, event):
+        kind, source, classes, now = event
+        if kind == 'detect':
+            level = top_level(classes)
+            if level and self.policy.rule(level):
+                alarm_classes = [cls for cls in classes if self.policy.rule(get_danger_level(cls))]
+                self.sources[source] = (level, alarm_classes, now)
+        elif kind == 'clear':
+            self.sources.pop(source, None)
+        elif kind == 'ack' and self.state and not self.state['acknowledged']:
+            self.state.update(acknowledged=True, acknowledged_by=source, silenced=True)
+            self._notify('acknowledged', self.state)
+
+    def _evaluate(self, now):
+        for source, (_, _, seen) in list(self.sources.items()):
+            if now - seen > self.policy.hold_seconds:
+                del self.sources[source]
+
+        if not self.sources:
+            if self.state:
+                state, self.state = self.state, None
+                self._notify('cleared', dict(state, active=False))
+            return
+
+        level = min((lvl for lvl, _, _ in self.sources.values()), key=LEVEL_ORDER.index)
+        classes = sorted({cls for _, clss, _ in self.sources.values() for cls in clss})
+        sources = sorted(str(src) for src in self.sources)
+        rule = self.policy.rule(level)
+
+        if self.state is None or LEVEL_ORDER.index(level) < LEVEL_ORDER.index(self.state['level']):
+            # Yeni alarm veya daha kritik seviyeye geçiş
+            rate_limited = now - self.last_raised.get(level, float('-inf')) < rule['min_interval']
+            if not rate_limited:
+                self.last_raised[level] = now
+            self.state = {
+                'active': True, 'level': level, 'classes': classes, 'sources': sources,
+                'since': now, 'escalated': False, 'acknowledged': False,
+                'acknowledged_by': None, 'silenced': rate_limited,
+            }
+            self._notify('updated' if rate_limited else 'raised', self.state)
+            return
+
+        changed = (level, classes, sources) != (self.state['level'], self.state['classes'], self.state['sources'])
+        if changed:
+            self.state.update(level=level, classes=classes, sources=sources)
+            self._notify('updated', self.state)
+
+        rule = self.policy.rule(self.state['level'])
+        escalate_after = rule.get('escalate_after')
+        if (escalate_after is not None and not self.state['escalated'] and not self.state['acknowledged']
+                and now - self.state['since'] >= escalate_after):
+            self.state.update(escalated=True, silenced=False)
+            self._notify('escalated', self.state)
+
+    def _notify(self, kind, state):
+        with self._sinks_lock:
+            sinks = list(self.sinks)
+        snapshot = dict(state, rule=self.policy.rule(state['level']))
+        for sink in sinks:
+            try:
+                sink.on_alarm(kind, snapshot)
+            except Exception as e:
+                print(f"[ALARM SINK HATASI] {type(sink).__name__}: {e}")
+
+
+class AudioSink:
+    """pygame ile ses çalar; mixer sadece bu sink içinde ve bir kez başlatılır"""
+
+    def __init__(self, default_sound=None, channel=1):
+        self.default_sound = default_sound
+        self.channel_id = channel
+        self.channel = None
+        self.sounds = {}
+        self.playing = None
+        self.available = None
+
+    def open(self):
+        if self.available is not None:
+            return self.available
+        try:
+            import pygame
+            pygame.mixer.init()
+            self.pygame = pygame
+            self.channel = pygame.mixer.Channel(self.channel_id)
+            self.available = True
+        except Exception as e:
+            print(f"[ALARM HATASI] Ses sistemi başlatılamadı: {e}")
+            self.available = False
+        return self.available
+
+    def _sound(self, path):
+        path = path or self.default_sound or get_alarm_path()
+        if not path or not os.path.exists(path):
+            return None
+        if path not in self.sounds:
+            self.sounds[path] = self.pygame.mixer.Sound(path)
+            print(f"[ALARM] Ses dosyası yüklendi: {path}")
+        return self.sounds[path]
+
+    def on_alarm(self, kind, state):
+        rule = state.get('rule') or {}
+        desired = None
+        if state['active'] and not state['silenced'] and rule.get('audio'):
+            if state['escalated']:
+                desired = (rule.get('escalation_sound') or rule.get('sound'), rule.get('loop'), 1.0)
+            else:
+                desired = (rule.get('sound'), rule.get('loop'), rule.get('volume', 1.0))
+        # Aynı ses zaten çalıyorsa dokunma; tek seferlik sesler yeniden tetiklenmez
+        if desired == self.playing or not self.open():
+            return
+        self.channel.stop()
+        self.playing = desired
+        if desired is None:
+            return
+        path, loop, volume = desired
+        sound = self._sound(path)
+        if sound is None:
+            return
+        self.channel.set_volume(volume)
+        self.channel.play(sound, loops=-1 if loop else 0)
+
+    def close(self):
+        if self.channel:
+            self.channel.stop()
+        self.playing = None
+
+
+class LogSink:
+    """Alarm olaylarını sistem günlüğüne (logs tablosu) yazar"""
+
+    def __init__(self, db, operator=None):
+        self.db = db
+        self.operator = operator
+
+    def on_alarm(self, kind, state):
+        if kind == 'updated':
+            return
+        if kind == 'acknowledged':
+            message = f"Alarm onaylandı ({state['level']}) - {state['acknowledged_by'] or self.operator}"
+        else:
+            message = f"Alarm {kind}: {state['level']} {state['classes']} kaynak={state['sources']}"
+        self.db.submit(self.db.add_log, self.operator, message)
+
+
+class QtAlarmSink(QObject):
+    """Alarm durumunu Qt sinyaliyle GUI thread'ine iletir (arayüz bandı için)"""
+    alarm_changed = pyqtSignal(str, dict)     # olay türü, durum
+
+    def on_alarm(self, kind, state):
+        self.alarm_changed.emit(kind, state)
+
+
+_alarm_service = None
+_alarm_service_lock = threading.Lock()
+
+
+def get_alarm_service():
+    """Uygulama genelinde paylaşılan, ses sink'i ile başlatılmış alarm servisi"""
+    global _alarm_service
+    with _alarm_service_lock:
+        if _alarm_service is None:
+            _alarm_service = AlarmService(sinks=[AudioSink()])
+            _alarm_service.start()
+        return _alarm_service
@@ -0,0 +1,159 @@
+import itertools
+import os
+import time
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from image_store import get_image_store
+from overlay import draw_detections
+from shadow import get_shadow_evaluator
+from tracing import span
+
+
+class AnalysisCancelled(Exception):
+    pass
+
+
+class AnalysisSignals(QObject):
+    progress = pyqtSignal(int, int, str)      # job_id, yüzde, aşama
+    finished = pyqtSignal(int, dict)          # job_id, sonuç
+    failed = pyqtSignal(int, str)
+    cancelled = pyqtSignal(int)
+
+
+class AnalysisJob(QRunnable):
+    """Tek görüntü analizi: çıkarım -> overlay -> kaydetme (GUI thread dışında)"""
+
+    def __init__(self, job_id, image, detector, db, operator=None, role=None, signals=None):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.job_id = job_id
+        self.image = image
+        self.detector = detector
+        self.db = db
+        self.operator = operator
+        self.role = role
+        self.signals = signals
+        self.cancel_requested = False
+
+    def cancel(self):
+        self.cancel_requested = True
+
+    def _stage(self, percent, stage):
+        if self.cancel_requested:
+            raise AnalysisCancelled()
+        self.signals.progress.emit(self.job_id, percent, stage)
+
+    def run(self):
+        try:
+            self._stage(10, "Running inference")
+            with span("inference", cat="analysis"):
+                started = time.perf_counter()
+                detections = self.detector.detect(self.image)
+            shadow = get_shadow_evaluator(self.db)
+            if shadow:
+                shadow.offer("image", self.image, detections, (time.perf_counter() - started) * 1000.0,
+                             os.path.basename(self.detector.model_path))
+
+            self._stage(70, "Rendering overlay")
+            with span("draw", cat="analysis"):
+                annotated = draw_detections(self.image.copy(), detections)
+
+            record_id = None
+            if detections:
+                self._stage(85, "Saving record")
+                record_id = self.save(detections)
+
+            self.signals.progress.emit(self.job_id, 100, "Done")
+            self.signals.finished.emit(self.job_id, {
+                'detections': detections,
+                'annotated': annotated,
+                'record_id': record_id,
+            })
+        except AnalysisCancelled:
+            self.signals.cancelled.emit(self.job_id)
+        except Exception as e:
+            print(f"[ANALİZ HATASI] {e}")
+            self.signals.failed.emit(self.job_id, str(e))
+
+    def save(self, detections):
+        save_path = get_image_store().put(self.image)
+        class_names = [det['class'] for det in detections]
+        record_id = self.db.insert_detection(
+            class_names, save_path, mode="image",
+            bboxes=[det['bbox'] for det in detections],
+            confidences=[det['score'] for det in detections],
+            operator=self.operator, role=self.role,
+            image_size=(self.image.shape[1], self.image.shape[0])
+        )
+        self.db.add_log(self.operator, f"Detection completed: {sorted(set(class_names))}")
+        return record_id
+
+
+class AnalysisQueue(QObject):
+    """Analiz isteklerini sıraya alır; dedektör thread-safe olmadığı için tek worker çalışır"""
+    progress = pyqtSignal(int, int, str)
+    finished = pyqtSignal(int, dict)
+    failed = pyqtSignal(int, str)
+    cancelled = pyqtSignal(int)
+    queue_changed = pyqtSignal(int)           # bekleyen + çalışan iş sayısı
+
+    def __init__(self, detector, db, operator=None, role=None, parent=None):
+        super().__init__(parent)
+        self.detector = detector
+        self.db = db
+        self.operator = operator
+        self.role = role
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.jobs = {}
+        self._ids = itertools.count(1)
+
+        self.signals = AnalysisSignals()
+        self.signals.progress.connect(self.progress)
+        self.signals.finished.connect(self._on_finished)
+        self.signals.failed.connect(self._on_failed)
+        self.signals.cancelled.connect(self._on_cancelled)
+
+    def submit(self, image):
+        job_id = next(self._ids)
+        job = AnalysisJob(job_id, image, self.detector, self.db,
+                          operator=self.operator, role=self.role, signals=self.signals)
+        self.jobs[job_id] = job
+        self.pool.start(job)
+        self.queue_changed.emit(len(self.jobs))
+        return job_id
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        job.cancel()
+        # Henüz başlamadıysa kuyruktan doğrudan çıkar
+        if self.pool.tryTake(job):
+            self._on_cancelled(job_id)
+
+    def cancel_all(self):
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+
+    def pending_count(self):
+        return len(self.jobs)
+
+    def _finish(self, job_id):
+        self.jobs.pop(job_id, None)
+        self.queue_changed.emit(len(self.jobs))
+
+    def _on_finished(self, job_id, result):
+        self._finish(job_id)
+        self.finished.emit(job_id, result)
+
+    def _on_failed(self, job_id, message):
+        self._finish(job_id)
+        self.failed.emit(job_id, message)
+
+    def _on_cancelled(self, job_id):
+        self._finish(job_id)
+        self.cancelled.emit(job_id)
+
+    def shutdown(self):
+        self.cancel_all()
+        self.pool.waitForDone()
@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+from PyQt5.QtCore import QThread, pyqtSignal
+from detector_pt import PyTorchDetector
+from image_store import get_image_store
+from tracing import span
+from utils import IMAGE_EXTENSIONS
+
+
+def iter_image_files(paths):
+    """Klasörleri özyinelemeli dolaş, desteklenen görüntü dosyalarını sırayla üret (listeye almadan)"""
+    for path in paths:
+        if os.path.isdir(path):
+            stack = [path]
+            while stack:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in sorted(entries, key=lambda e: e.name):
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                            yield entry.path
+        elif path.lower().endswith(IMAGE_EXTENSIONS):
+            yield path
+
+
+def decode_image(path):
+    # cv2.imread GIL'i bırakır, thread havuzunda paralel çalışır
+    with span("decode", cat="batch"):
+        return cv2.imread(path, cv2.IMREAD_COLOR)
+
+
+class BatchScanThread(QThread):
+    progress = pyqtSignal(int, int, float)    # işlenen, toplam, kare/sn
+    batch_results = pyqtSignal(list)           # [(dosya, tespit sayısı, sınıflar), ...] (sadece tehdit olanlar)
+    scan_finished = pyqtSignal(dict)           # özet
+    scan_failed = pyqtSignal(str)
+
+    def __init__(self, paths, db, operator=None, role=None, model_path=None,
+                 batch_size=8, decode_workers=None):
+        super().__init__()
+        self.paths = paths
+        self.db = db
+        self.operator = operator
+        self.role = role
+        self.model_path = model_path
+        self.batch_size = batch_size
+        self.decode_workers = decode_workers or os.cpu_count() or 4
+        # Bellekte en fazla bu kadar decode edilmiş görüntü bulunur
+        self.max_in_flight = batch_size * 2
+        self.cancel_requested = False
+        self.resume_event = threading.Event()
+        self.resume_event.set()
+        self.summary = {}
+
+    def pause(self):
+        self.resume_event.clear()
+
+    def resume(self):
+        self.resume_event.set()
+
+    @property
+    def paused(self):
+        return not self.resume_event.is_set()
+
+    def cancel(self):
+        self.cancel_requested = True
+        self.resume_event.set()
+
+    def run(self):
+        try:
+            self.scan()
+        except Exception as e:
+            print(f"[BATCH HATASI] {e}")
+            self.scan_failed.emit(str(e))
+
+    def scan(self):
+        detector = PyTorchDetector(self.model_path)
+        self.store = get_image_store()
+        total = sum(1 for _ in iter_image_files(self.paths))
+        self.summary = {
+            'total': total, 'processed': 0, 'with_threats': 0, 'errors': 0,
+            'class_counts': {}, 'elapsed': 0.0, 'cancelled': False,
+        }
+        self.start_time = time.time()
+        files = iter_image_files(self.paths)
+        pending = deque()
+
+        with ThreadPoolExecutor(max_workers=self.decode_workers, thread_name_prefix="decode") as pool:
+            def fill():
+                while len(pending) < self.max_in_flight:
+                    path = next(files, None)
+                    if path is None:
+                        return
+                    pending.append((path, pool.submit(decode_image, path)))
+
+            fill()
+            batch = []
+            while pending and not self.cancel_requested:
+                self.resume_event.wait()
+                path, future = pending.popleft()
+                fill()
+                image = future.result()
+                if image is None:
+                    self.summary['errors'] += 1
+                    self.summary['processed'] += 1
+                    continue
+                batch.append((path, image))
+                if len(batch) >= self.batch_size:
+                    self.process_batch(batch, detector, pool)
+                    batch = []
+            if batch and not self.cancel_requested:
+                self.process_batch(batch, detector, pool)
+            for _, future in pending:
+                future.cancel()
+
+        self.summary['elapsed'] = time.time() - self.start_time
+        self.summary['cancelled'] = self.cancel_requested
+        if detector.prescreen is not None:
+            self.summary['cascade'] = detector.cascade_stats.snapshot()
+        if detector.roi is not None:
+            self.summary['roi'] = detector.roi_stats.snapshot()
+        if self.db:
+            self.db.add_log(self.operator, f"Toplu tarama: {self.summary['processed']} dosya, "
+                                           f"{self.summary['with_threats']} tehdit")
+        self.scan_finished.emit(self.summary)
+
+    def process_batch(self, batch, detector, pool):
+        with span("inference", cat="batch", images=len(batch)):
+            results = detector.detect_batch([image for _, image in batch])
+        records = []
+        rows = []
+        save_futures = []
+        for (path, image), detections in zip(batch, results):
+            if not detections:
+                continue
+            save_futures.append((path, image, detections, pool.submit(self.store.put, image)))
+        for path, image, detections, future in save_futures:
+            class_names = [det['class'] for det in detections]
+            records.append({
+                'classes': class_names,
+                'image_path': future.result(),
+                'mode': 'batch',
+                'bboxes': [det['bbox'] for det in detections],
+                'confidences': [det['score'] for det in detections],
+                'operator': self.operator,
+                'role': self.role,
+                'image_size': (image.shape[1], image.shape[0]),
+            })
+            rows.append((path, len(detections), sorted(set(class_names))))
+            for cls in class_names:
+                self.summary['class_counts'][cls] = self.summary['class_counts'].get(cls, 0) + 1
+
+        if records and self.db:
+            self.db.insert_detections_batch(records)
+
+        self.summary['processed'] += len(batch)
+        self.summary['with_threats'] += len(records)
+        elapsed = time.time() - self.start_time
+        rate = self.summary['processed'] / elapsed if elapsed > 0 else 0.0
+        if rows:
+            self.batch_results.emit(rows)
+        self.progress.emit(self.summary['processed'], self.summary['total'], rate)
@@ -0,0 +1,380 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+import cv2
+import numpy as np
+
+# X-ray bagaj görüntülerindeki tipik renkler (BGR): organik turuncu, metal mavi, karışık yeşil
+XRAY_TINTS = [(60, 140, 230), (200, 120, 40), (90, 170, 90), (40, 40, 40)]
+BENCH_CLASSES = ['Gun', 'Folding_Knife', 'Pliers', 'Scissor', 'Wrench', 'Utility_Knife']
+
+
+def synthetic_xray_image(rng, width=1280, height=720):
+    """X-ray benzeri yapay bagaj görüntüsü: açık zemin, bavul çerçevesi, yarı saydam nesneler"""
+    img = np.full((height, width, 3), 235, np.uint8)
+    img += rng.integers(0, 12, size=(height, width, 1), dtype=np.uint8)
+    x0, y0 = int(width * 0.1), int(height * 0.15)
+    x1, y1 = int(width * 0.9), int(height * 0.85)
+    cv2.rectangle(img, (x0, y0), (x1, y1), (150, 150, 150), thickness=int(rng.integers(6, 14)))
+    for _ in range(int(rng.integers(6, 16))):
+        overlay = img.copy()
+        tint = tuple(int(c) for c in XRAY_TINTS[int(rng.integers(len(XRAY_TINTS)))])
+        cx, cy = int(rng.integers(x0, x1)), int(rng.integers(y0, y1))
+        if rng.random() < 0.5:
+            axes = (int(rng.integers(15, width // 8)), int(rng.integers(10, height // 8)))
+            cv2.ellipse(overlay, (cx, cy), axes, float(rng.integers(0, 180)), 0, 360, tint, -1)
+        else:
+            w, h = int(rng.integers(20, width // 6)), int(rng.integers(8, height // 10))
+            cv2.rectangle(overlay, (cx, cy), (min(cx + w, x1), min(cy + h, y1)), tint, -1)
+        alpha = float(rng.uniform(0.35, 0.8))
+        cv2.addWeighted(overlay, alpha, img, 1 - alpha, 0, dst=img)
+    return cv2.GaussianBlur(img, (3, 3), 0)
+
+
+def synthetic_images(count, width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    return [synthetic_xray_image(rng, width, height) for _ in range(count)]
+
+
+def load_sample_images(directory, count):
+    from batch_scan import iter_image_files
+    images = []
+    for path in iter_image_files([directory]):
+        img = cv2.imread(path)
+        if img is not None:
+            images.append(img)
+        if len(images) >= count:
+            break
+    return images
+
+
+def write_synthetic_video(path, frames, fps=30):
+    """Kareleri bantta kayan bagaj gibi yavaşça kaydırarak video dosyası üret"""
+    height, width = frames[0].shape[:2]
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+    for i, frame in enumerate(frames):
+        writer.write(np.roll(frame, shift=(i * 8) % width, axis=1))
+    writer.release()
+    return path
+
+
+class ResourceMonitor:
+    """Ölçüm boyunca tepe RSS ve CPU kullanımını toplar (psutil varsa örnekleyerek)"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        try:
+            import psutil
+            self.process = psutil.Process()
+        except ImportError:
+            self.process = None
+
+    def _rss(self):
+        if self.process is not None:
+            return self.process.memory_info().rss
+        try:
+            import resource
+            # Linux'ta KB, macOS'ta byte; süreç ömrü boyunca tepe değer
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024
+        except ImportError:
+            return 0
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, self._rss())
+
+    def __enter__(self):
+        self.peak_rss = self._rss()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_rss = max(self.peak_rss, self._rss())
+        self.wall_seconds = time.perf_counter() - self._wall
+        self.cpu_seconds = time.process_time() - self._cpu
+        return False
+
+    def summary(self):
+        cores = os.cpu_count() or 1
+        return {
+            'wall_seconds': round(self.wall_seconds, 4),
+            'cpu_seconds': round(self.cpu_seconds, 4),
+            # 100 = tüm çekirdekler tam dolu
+            'cpu_percent': round(100.0 * self.cpu_seconds / max(self.wall_seconds, 1e-9) / cores, 1),
+            'peak_rss_mb': round(self.peak_rss / (1024 * 1024), 1),
+        }
+
+
+def latency_stats(latencies, items=None, wall_seconds=None):
+    """Gecikme listesinden (saniye) p50/p99/ortalama ve saniyedeki öğe sayısı"""
+    arr = np.asarray(latencies, dtype=np.float64) * 1000.0
+    stats = {'count': int(arr.size)}
+    if arr.size:
+        stats.update({
+            'p50_ms': round(float(np.percentile(arr, 50)), 3),
+            'p99_ms': round(float(np.percentile(arr, 99)), 3),
+            'mean_ms': round(float(arr.mean()), 3),
+            'max_ms': round(float(arr.max()), 3),
+        })
+    if wall_seconds:
+        stats['fps'] = round((items if items is not None else arr.size) / wall_seconds, 2)
+    return stats
+
+
+def timed_loop(fn, inputs, items_per_call=1, warmup=2):
+    for item in inputs[:warmup]:
+        fn(item)
+    latencies = []
+    with ResourceMonitor() as monitor:
+        for item in inputs:
+            start = time.perf_counter()
+            fn(item)
+            latencies.append(time.perf_counter() - start)
+    result = latency_stats(latencies, items=len(inputs) * items_per_call, wall_seconds=monitor.wall_seconds)
+    result.update(monitor.summary())
+    return result
+
+
+def bench_detect(detector, images, batch_size):
+    results = {'detect_single': timed_loop(detector.detect, images)}
+    batches = [images[i:i + batch_size] for i in range(0, len(images), batch_size)]
+    batches = [b for b in batches if len(b) == batch_size] or batches
+    result = timed_loop(detector.detect_batch, batches, items_per_call=len(batches[0]), warmup=1)
+    result['batch_size'] = len(batches[0])
+    results['detect_batch'] = result
+    return results
+
+
+def bench_display(images, label_size):
+    from display import prepare_display_frame, render_display_frame
+    from PyQt5.QtGui import QImage
+
+    def to_qimage(rgb):
+        # ImageDisplayWidget.set_frame ile aynı dönüşüm (QPixmap için GUI gerekmez)
+        height, width, channel = rgb.shape
+        return QImage(rgb.data, width, height, channel * width, QImage.Format_RGB888).copy()
+
+    detections = [{'bbox': (100, 120, 400, 380), 'score': 0.91, 'class': 'Gun'},
+                  {'bbox': (500, 200, 700, 260), 'score': 0.64, 'class': 'Pliers'}]
+    return {
+        'display_image': timed_loop(lambda img: to_qimage(prepare_display_frame(img, *label_size)), images),
+        'display_video_frame': timed_loop(
+            lambda img: to_qimage(render_display_frame(img, detections, *label_size)), images),
+    }
+
+
+def bench_video_pipeline(video_path, model_path, label_size, db=None, capture_process=False, playback="throughput"):
+    """VideoStreamThread.run() GUI'siz ve senkron çalıştırılır; her kare detection_updated ile sayılır"""
+    from alarm_service import AlarmService
+    from video_stream import VideoStreamThread
+
+    alarm_service = AlarmService(sinks=[])
+    alarm_service.start()
+    thread = VideoStreamThread(model_path=model_path, db_manager=db, operator="benchmark",
+                               role="benchmark", source=video_path, alarm_service=alarm_service,
+                               capture_process=capture_process, playback=playback)
+    thread.set_display_size(*label_size)
+    stamps = []
+    thread.detection_updated.connect(lambda _: stamps.append(time.perf_counter()))
+    with ResourceMonitor() as monitor:
+        start = time.perf_counter()
+        thread.run()
+    alarm_service.stop()
+    latencies = np.diff([start] + stamps)
+    result = latency_stats(latencies, items=len(stamps), wall_seconds=monitor.wall_seconds)
+    result.update(monitor.summary())
+    result['dropped_display_frames'] = thread.display_mailbox.dropped
+    result['capture_process'] = capture_process
+    result['playback'] = playback
+    result['dropped_source_frames'] = thread.dropped_frames
+    return {'video_pipeline': result}
+
+
+def make_detection_records(rng, count):
+    records = []
+    for _ in range(count):
+        n = int(rng.integers(1, 4))
+        classes = [BENCH_CLASSES[int(i)] for i in rng.integers(0, len(BENCH_CLASSES), n)]
+        records.append({
+            'classes': classes,
+            'image_path': f"results/bench/{int(rng.integers(1 << 40)):010x}.jpg",
+            'mode': 'video' if rng.random() < 0.7 else 'image',
+            'bboxes': [(10, 20, 110, 220)] * n,
+            'confidences': [float(c) for c in rng.uniform(0.3, 0.99, n)],
+            'operator': f"personel{int(rng.integers(1, 6))}",
+            'role': 'personel',
+            'image_size': (1280, 720),
+        })
+    return records
+
+
+def bench_db(row_counts, work_dir, chunk_size=1000, query_repeats=5):
+    from db_manager import DBManager
+    rng = np.random.default_rng(1)
+    results = {}
+    for rows in row_counts:
+        db_path = os.path.join(work_dir, f"bench_{rows}.db")
+        db = DBManager(db_path)
+        insert_latencies = []
+        with ResourceMonitor() as monitor:
+            for offset in range(0, rows, chunk_size):
+                records = make_detection_records(rng, min(chunk_size, rows - offset))
+                start = time.perf_counter()
+                db.insert_detections_batch(records)
+                insert_latencies.append(time.perf_counter() - start)
+        insert = latency_stats(insert_latencies)
+        insert['rows_per_second'] = round(rows / max(sum(insert_latencies), 1e-9), 1)
+        insert.update(monitor.summary())
+
+        today = datetime.now()
+        queries = {
+            'count_all': lambda: db.count_detections(),
+            'count_class': lambda: db.count_detections({'classes': 'Gun'}),
+            'fetch_class_operator': lambda: db.fetch_all_detections({'classes': 'Gun', 'operator': 'personel1'}),
+            'fetch_date_range': lambda: db.count_detections({
+                'date_from': (today - timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S"),
+                'date_to': (today + timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")}),
+            'iter_all': lambda: sum(len(chunk) for chunk in db.iter_detections()),
+        }
+        query_results = {}
+        for name, query in queries.items():
+            latencies = []
+            with ResourceMonitor() as monitor:
+                for _ in range(query_repeats):
+                    start = time.perf_counter()
+                    query()
+                    latencies.append(time.perf_counter() - start)
+            query_results[name] = latency_stats(latencies)
+            query_results[name].update(monitor.summary())
+        db.close()
+        results[f"db_{rows}"] = {'rows': rows, 'insert': insert, 'queries': query_results}
+    return results
+
+
+def environment_info():
+    info = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+    }
+    try:
+        import torch
+        info['torch'] = torch.__version__
+        info['cuda'] = torch.cuda.is_available()
+    except ImportError:
+        pass
+    try:
+        info['git_commit'] = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return info
+
+
+def compare_results(baseline, current, path=""):
+    """İki sonuç dosyasındaki fps/p50/p99 değerlerinin yüzde değişimini yazdır"""
+    for key, value in current.items():
+        name = f"{path}.{key}" if path else key
+        old = baseline.get(key) if isinstance(baseline, dict) else None
+        if isinstance(value, dict):
+            compare_results(old or {}, value, name)
+        elif key in ('fps', 'p50_ms', 'p99_ms', 'rows_per_second', 'peak_rss_mb') and isinstance(old, (int, float)) and old:
+            change = 100.0 * (value - old) / old
+            print(f"[BENCHMARK] {name:<50} {old:>10} -> {value:>10} ({change:+.1f}%)")
+
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def run_benchmarks(args):
+    suites = set(args.suite.split(","))
+    work_dir = tempfile.mkdtemp(prefix="didray_bench_")
+    results = {}
+    try:
+        if args.samples:
+            images = load_sample_images(args.samples, args.images)
+        else:
+            images = synthetic_images(args.images, *args.size)
+        print(f"[BENCHMARK] {len(images)} görüntü, {images[0].shape[1]}x{images[0].shape[0]}")
+
+        if "detect" in suites:
+            from detector_pt import PyTorchDetector
+            load_start = time.perf_counter()
+            detector = PyTorchDetector(args.model)
+            results['model_load'] = {'seconds': round(time.perf_counter() - load_start, 3),
+                                     'compiled': getattr(detector, 'compiled', False),
+                                     'precision': detector.precision}
+            results.update(bench_detect(detector, images, args.batch))
+            if detector.prescreen is not None:
+                results['cascade'] = detector.cascade_stats.snapshot()
+            if detector.roi is not None:
+                results['roi'] = detector.roi_stats.snapshot()
+        if "display" in suites:
+            results.update(bench_display(images, args.label_size))
+        if "video" in suites:
+            video_path = args.video or write_synthetic_video(
+                os.path.join(work_dir, "bench.avi"), synthetic_images(args.video_frames, *args.size, seed=2))
+            results.update(bench_video_pipeline(video_path, args.model, args.label_size,
+                                                capture_process=args.capture_process, playback=args.playback))
+        if "db" in suites:
+            results.update(bench_db(args.db_rows, work_dir))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DIDRay performans ölçümü (yapay X-ray verisi ile)")
+    parser.add_argument("--suite", default="detect,display,video,db",
+                        help="Virgülle ayrılmış: detect, display, video, db")
+    parser.add_argument("--model", help="Model ağırlıkları (varsayılan: utils.get_model_path)")
+    parser.add_argument("--samples", help="Yapay veri yerine bu klasördeki görüntüleri kullan")
+    parser.add_argument("--video", help="Yapay video yerine bu video dosyasını kullan")
+    parser.add_argument("--images", type=int, default=50)
+    parser.add_argument("--video-frames", type=int, default=150)
+    parser.add_argument("--size", type=parse_size, default=(1280, 720), help="Yapay görüntü boyutu, ör. 1920x1080")
+    parser.add_argument("--label-size", type=parse_size, default=(960, 540), help="Görüntü etiketinin boyutu")
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--playback", choices=["throughput", "realtime"], default="throughput",
+                        help="Video oynatma modu (realtime: kaynak FPS'inde, geride kalınca kare atlar)")
+    parser.add_argument("--capture-process", action="store_true",
+                        help="Video testinde decode'u ayrı süreçte çalıştır (shared_memory halka tamponu)")
+    parser.add_argument("--db-rows", type=lambda s: [int(v) for v in s.split(",")], default=[10000, 100000],
+                        help="Virgülle ayrılmış satır sayıları, ör. 10000,100000,1000000")
+    parser.add_argument("--output", default=None, help="JSON çıktı dosyası (varsayılan: benchmarks/bench_<zaman>.json)")
+    parser.add_argument("--compare", help="Karşılaştırılacak önceki JSON sonucu")
+    args = parser.parse_args()
+
+    report = {'environment': environment_info(), 'args': {k: v for k, v in vars(args).items()},
+              'results': run_benchmarks(args)}
+    output = args.output or os.path.join("benchmarks", f"bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"[BENCHMARK] Sonuçlar yazıldı: {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare_results(json.load(f).get('results', {}), report['results'])
@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+from danger_levels import DANGER_LEVELS
+
+# Sınıflandırıcı ön elemede "tehdit yok" anlamına gelen sınıf adları
+NEGATIVE_CLASS_NAMES = {'clear', 'negative', 'background', 'benign', 'safe', 'none'}
+
+
+class CascadeConfig:
+    """İki aşamalı tespit ayarları (cascade.json); dosya yoksa cascade kapalıdır"""
+
+    def __init__(self, enabled=False, model=None, imgsz=320, threshold=0.05, classes=None):
+        self.enabled = enabled and bool(model)
+        self.model = model
+        # Düşük çözünürlükte hızlı ön eleme; eşik geri çağırma (recall) odaklı düşük tutulur
+        self.imgsz = imgsz
+        self.threshold = threshold
+        # Dedektör tipi ön elemede sayılacak sınıflar (varsayılan: DANGER_LEVELS'taki tümü)
+        self.classes = set(classes) if classes else {cls for group in DANGER_LEVELS.values() for cls in group}
+
+    @classmethod
+    def from_file(cls, path="cascade.json"):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding='utf-8') as f:
+            return cls(**json.load(f))
+
+
+class CascadeStats:
+    """Geçiş oranı ve aşama başına süreler (thread-safe sayaçlar)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.frames = 0
+            self.passed = 0
+            self.stage1_seconds = 0.0
+            self.stage2_seconds = 0.0
+
+    def record(self, frames, passed, stage1_seconds, stage2_seconds):
+        with self._lock:
+            self.frames += frames
+            self.passed += passed
+            self.stage1_seconds += stage1_seconds
+            self.stage2_seconds += stage2_seconds
+
+    def snapshot(self):
+        with self._lock:
+            frames, passed = self.frames, self.passed
+            stage1, stage2 = self.stage1_seconds, self.stage2_seconds
+        return {
+            'frames': frames,
+            'passed': passed,
+            'pass_rate': passed / frames if frames else 0.0,
+            'stage1_ms': 1000.0 * stage1 / frames if frames else 0.0,
+            # Tam model sadece geçen karelerde çalışır; süre geçen kare başına
+            'stage2_ms': 1000.0 * stage2 / passed if passed else 0.0,
+        }
+
+
+class Prescreen:
+    """Birinci aşama: küçük model, düşük çözünürlük; karede tehdit olasılığı skoru üretir.
+
+    Sınıflandırma modeli (probs) veya küçük bir dedektör (kutular) olabilir.
+    """
+
+    def __init__(self, config, device="cpu"):
+        from ultralytics import YOLO
+        self.config = config
+        self.threshold = config.threshold
+        self.device = device
+        self.model = YOLO(config.model)
+        print(f"[CASCADE] Ön eleme modeli yüklendi: {config.model} ({config.imgsz}px, eşik {config.threshold})")
+
+    def _score(self, result):
+        probs = getattr(result, 'probs', None)
+        names = result.names if hasattr(result, 'names') else self.model.names
+        if probs is not None:
+            values = probs.data.cpu().numpy()
+            return float(sum(p for idx, p in enumerate(values) if names[idx].lower() not in NEGATIVE_CLASS_NAMES))
+        boxes = result.boxes
+        if boxes is None:
+            return 0.0
+        scores = boxes.conf.cpu().numpy()
+        classes = boxes.cls.cpu().numpy()
+        relevant = [float(s) for s, c in zip(scores, classes) if names[int(c)] in self.config.classes]
+        return max(relevant, default=0.0)
+
+    def score_batch(self, images):
+        # Dedektör tipi ön elemede çok düşük conf ile tüm adaylar alınır; eşik burada uygulanır
+        results = self.model(list(images), imgsz=self.config.imgsz, conf=0.001,
+                             device=self.device, verbose=False)
+        return [self._score(r) for r in results]
+
+    def score(self, image):
+        return self.score_batch([image])[0]
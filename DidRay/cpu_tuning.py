@@ -0,0 +1,197 @@
+import contextlib
+import json
+import os
+import time
+import torch
+from eval_metrics import iou
+
+PRECISION_MODES = ('fp32', 'bf16', 'auto')
+
+
+class CpuTuningConfig:
+    """CPU çıkarım ayarları (cpu_tuning.json); dosya yoksa FP32 ve varsayılan thread ayarları"""
+
+    def __init__(self, precision='fp32', channels_last=True, threads=None, interop_threads=None,
+                 sanity_check=True, sanity_runs=5, min_speedup=1.05, score_tolerance=0.05,
+                 iou_tolerance=0.85, sanity_images=None, sanity_conf=0.001, sanity_top_k=20):
+        if precision not in PRECISION_MODES:
+            raise ValueError(f"Geçersiz precision: {precision} ({', '.join(PRECISION_MODES)})")
+        # 'auto': CPU BF16 destekliyorsa bf16 denenir
+        self.precision = precision
+        self.channels_last = channels_last
+        # None: torch varsayılanı (fiziksel çekirdek sayısı)
+        self.threads = threads
+        self.interop_threads = interop_threads
+        # Düşük hassasiyet FP32 çıktısıyla karşılaştırılır; sapma veya hızlanma yetersizse FP32'ye dönülür
+        self.sanity_check = sanity_check
+        self.sanity_runs = sanity_runs
+        self.min_speedup = min_speedup
+        self.score_tolerance = score_tolerance
+        self.iou_tolerance = iou_tolerance
+        # Karşılaştırma görüntüleri (gerçek X-ray örnekleri içeren dizin); yoksa sentetik kareler
+        self.sanity_images = sanity_images
+        # Çok düşük eşikte çalıştırılır: boş çıktılar (eşleşme = doğrulama yok) yerine
+        # modelin en yüksek skorlu sanity_top_k adayı karşılaştırılır
+        self.sanity_conf = sanity_conf
+        self.sanity_top_k = sanity_top_k
+
+    @classmethod
+    def from_file(cls, path="cpu_tuning.json"):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding='utf-8') as f:
+            return cls(**json.load(f))
+
+
+def cpu_capabilities():
+    """CPU bayraklarından BF16/AMX/AVX-512 desteğini oku (Linux: /proc/cpuinfo)"""
+    flags = set()
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    flags = set(line.split(":", 1)[1].split())
+                    break
+    except OSError:
+        pass
+    try:
+        mkldnn_bf16 = bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except Exception:
+        mkldnn_bf16 = False
+    return {
+        'avx512': 'avx512f' in flags,
+        'avx512_bf16': 'avx512_bf16' in flags,
+        'amx': 'amx_bf16' in flags and 'amx_tile' in flags,
+        # oneDNN'in kendi tespiti bayrak okunamayan platformlarda da çalışır
+        'bf16': 'avx512_bf16' in flags or 'amx_bf16' in flags or mkldnn_bf16,
+        'cores': os.cpu_count() or 1,
+    }
+
+
+def configure_threads(config, caps):
+    """Intra/inter-op thread sayılarını ayarla; inter-op sadece ilk paralel işten önce değiştirilebilir"""
+    if config.threads:
+        torch.set_num_threads(config.threads)
+    if config.interop_threads:
+        try:
+            torch.set_num_interop_threads(config.interop_threads)
+        except RuntimeError as e:
+            print(f"[CPU AYAR] Inter-op thread sayısı değiştirilemedi: {e}")
+    return torch.get_num_threads()
+
+
+def precision_context(precision):
+    if precision == 'bf16':
+        return torch.autocast("cpu", dtype=torch.bfloat16)
+    return contextlib.nullcontext()
+
+
+def apply_channels_last(model):
+    """Ultralytics modeli nn.Module ise ağırlıkları channels_last düzene çevir (TorchScript'te etkisiz)"""
+    module = getattr(model, 'model', None)
+    if isinstance(module, torch.nn.Module):
+        module.to(memory_format=torch.channels_last)
+        return True
+    return False
+
+
+def _covered(top, others, config):
+    return all(any(det['class'] == ref['class']
+                   and iou(det['bbox'], ref['bbox']) >= config.iou_tolerance
+                   and abs(det['score'] - ref['score']) <= config.score_tolerance
+                   for det in others)
+               for ref in top)
+
+
+def _top(detections, config):
+    # Eşiğe score_tolerance'tan yakın adaylar diğer tarafta eşiğin altına düşmüş olabilir; karşılaştırılmaz
+    floor = config.sanity_conf + config.score_tolerance
+    ranked = sorted(detections, key=lambda d: d['score'], reverse=True)[:config.sanity_top_k]
+    return [d for d in ranked if d['score'] >= floor]
+
+
+def outputs_match(reference, candidate, config):
+    """İki taraftaki en yüksek skorlu sanity_top_k adayın her biri diğer tarafta aynı sınıf,
+    yeterli IoU ve yakın skorla bulunmalı"""
+    return (_covered(_top(reference, config), candidate, config)
+            and _covered(_top(candidate, config), reference, config))
+
+
+def load_sanity_images(config, limit=4):
+    """sanity_images dizinindeki ilk birkaç görüntü; yoksa sentetik kareler"""
+    if config.sanity_images and os.path.isdir(config.sanity_images):
+        import cv2
+        from utils import IMAGE_EXTENSIONS
+        names = sorted(n for n in os.listdir(config.sanity_images) if n.lower().endswith(IMAGE_EXTENSIONS))
+        images = [cv2.imread(os.path.join(config.sanity_images, n)) for n in names[:limit]]
+        images = [image for image in images if image is not None]
+        if images:
+            return images
+    from benchmark import synthetic_images
+    return synthetic_images(2, 640, 640, seed=7)
+
+
+def _time_runs(detect, images, precision, runs):
+    with precision_context(precision):
+        detect(images[0])  # ısınma
+        start = time.perf_counter()
+        outputs = [detect(image) for _ in range(runs) for image in images]
+    return (time.perf_counter() - start) / (runs * len(images)), outputs[-len(images):]
+
+
+def select_precision(detect, config, images=None):
+    """BF16'yı FP32'ye karşı doğrula ve ölç; (seçilen mod, hızlanma) döndür.
+
+    detect: görüntü alıp tespit listesi döndüren fonksiyon (hassasiyet bağlamı dışarıdan verilir);
+    sanity_conf eşiğinde, ROI ve cascade olmadan çalışmalıdır.
+    """
+    if images is None:
+        images = load_sanity_images(config)
+    fp32_time, reference = _time_runs(detect, images, 'fp32', config.sanity_runs)
+    bf16_time, candidate = _time_runs(detect, images, 'bf16', config.sanity_runs)
+    speedup = fp32_time / bf16_time if bf16_time > 0 else 0.0
+    if not any(_top(detections, config) for detections in reference):
+        print("[CPU AYAR] Doğrulama görüntülerinde hiç aday yok, BF16 doğrulanamadı; FP32 kullanılacak")
+        return 'fp32', speedup
+    if not all(outputs_match(r, c, config) for r, c in zip(reference, candidate)):
+        print("[CPU AYAR] BF16 çıktısı FP32'den sapıyor, FP32 kullanılacak")
+        return 'fp32', speedup
+    if speedup < config.min_speedup:
+        print(f"[CPU AYAR] BF16 hızlanması yetersiz ({speedup:.2f}x), FP32 kullanılacak")
+        return 'fp32', speedup
+    return 'bf16', speedup
+
+
+def _sanity_detect(detector, config):
+    """Modeli doğrudan çağır: ROI kırpma ve istatistikleri gerçek karelere kalır"""
+    def detect(image):
+        results = detector.model(image, imgsz=detector.imgsz, conf=config.sanity_conf, verbose=False)
+        return [det for r in results for det in detector._parse_result(r)]
+    return detect
+
+
+def tune_detector(detector, config=None):
+    """CPU'da thread/bellek düzeni/hassasiyet ayarlarını uygula; seçilen modu detector.precision'a yaz"""
+    config = config or CpuTuningConfig.from_file()
+    caps = cpu_capabilities()
+    threads = configure_threads(config, caps)
+    if config.channels_last and config.precision != 'fp32' and apply_channels_last(detector.model):
+        detector.channels_last = True
+
+    precision, speedup = 'fp32', None
+    if config.precision != 'fp32':
+        if not caps['bf16']:
+            print("[CPU AYAR] CPU BF16 desteklemiyor (AVX512-BF16/AMX yok), FP32 kullanılacak")
+        elif config.sanity_check:
+            try:
+                precision, speedup = select_precision(_sanity_detect(detector, config), config)
+            except Exception as e:
+                print(f"[CPU AYAR HATASI] BF16 doğrulaması başarısız, FP32 kullanılacak: {e}")
+        else:
+            precision = 'bf16'
+    detector.precision = precision
+    layout = "channels_last" if detector.channels_last else "varsayılan düzen"
+    features = ", ".join(name for name in ('amx', 'avx512_bf16', 'avx512') if caps[name]) or "temel"
+    measured = f", ölçülen BF16 hızlanması: {speedup:.2f}x" if speedup is not None else ""
+    print(f"[CPU AYAR] Mod: {precision}, {layout}, {threads} thread, CPU: {features}{measured}")
+    return precision, speedup
@@ -0,0 +1,20 @@
+# Tehlike seviyeleri ve renkler
+DANGER_LEVELS = {
+    'Çok Yüksek': ['Gun'],
+    'Yüksek': ['Folding_Knife', 'Straight_Knife'],
+    'Orta': ['Multi-tool_Knife', 'Utility_Knife'],
+    'Düşük': ['Pliers', 'Scissor', 'Wrench']
+}
+
+LEVEL_COLORS = {
+    'Çok Yüksek': (255, 0, 255),
+    'Yüksek': (0, 0, 255),
+    'Orta': (0, 165, 255),
+    'Düşük': (0, 255, 0)
+}
+
+def get_danger_level(class_name):
+    for level, classes in DANGER_LEVELS.items():
+        if class_name in classes:
+            return level
+    return 'Düşük'
@@ -0,0 +1,136 @@
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+# Tamamlanana kadar referansı tutulan çağrılar (GC'ye karşı)
+_pending_calls = set()
+
+
+class DBCall(QObject):
+    """DB Future'ını Qt sinyallerine bağlar; sonuç GUI thread'ine kuyrukla iletilir"""
+    result_ready = pyqtSignal(object)
+    error = pyqtSignal(str)
+
+    def __init__(self, future, on_result=None, on_error=None, parent=None):
+        super().__init__(parent)
+        self.future = future
+        if on_result:
+            self.result_ready.connect(on_result)
+        if on_error:
+            self.error.connect(on_error)
+        # Kullanıcı slotlarından sonra bağlanır, böylece en son çalışır
+        self.result_ready.connect(self._release)
+        self.error.connect(self._release)
+        _pending_calls.add(self)
+        future.add_done_callback(self._on_done)
+
+    def _on_done(self, future):
+        # Worker thread'inde çalışır; sinyaller alıcının thread'ine kuyruklanır
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"[DB HATASI] {e}")
+            self.error.emit(str(e))
+            return
+        self.result_ready.emit(result)
+
+    def _release(self, *_):
+        _pending_calls.discard(self)
+
+
+def db_call(db, fn, *args, on_result=None, on_error=None, **kwargs):
+    """fn(*args) çağrısını DB thread havuzunda çalıştır, sonucu sinyal ile geri döndür"""
+    return DBCall(db.submit(fn, *args, **kwargs), on_result=on_result, on_error=on_error)
+
+
+class DetectionFeed(QObject):
+    """Tespit tablosundaki değişiklikleri GUI'ye artımlı iletir (tam tabloyu yeniden sorgulamadan).
+
+    Aynı süreçteki yazmalar DBManager bildirimiyle gelir; ardışık eklemeler coalesce_ms içinde
+    tek sorguda toplanır. Başka süreçlerin (CLI, toplu tarama) eklediği satırlar poll_ms'de bir
+    son görülen id'den sonrası sorgulanarak yakalanır; bu sorgu PK aralığını tarar, maliyeti ihmal edilebilir.
+    """
+    reloaded = pyqtSignal(list)
+    rows_added = pyqtSignal(list)
+    rows_deleted = pyqtSignal(list)
+    _changed = pyqtSignal(str, object)
+
+    def __init__(self, db, poll_ms=5000, coalesce_ms=300, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.filters = None
+        self.last_id = None
+        self.generation = 0
+        self.fetching = False
+        self.dirty = False
+        # Sorgu sürerken silinen id'ler: sorgu sonucu silmeden önceki anı görmüş olabilir
+        self.deleted_while_fetching = set()
+        self._coalesce = QTimer(self)
+        self._coalesce.setSingleShot(True)
+        self._coalesce.setInterval(coalesce_ms)
+        self._coalesce.timeout.connect(self.fetch_new)
+        self._poll = QTimer(self)
+        self._poll.setInterval(poll_ms)
+        self._poll.timeout.connect(self.fetch_new)
+        # Yazıcı thread'inden gelen bildirim sinyal kuyruğuyla GUI thread'ine geçer
+        self._changed.connect(self._on_changed)
+        self._listener = self._changed.emit
+        db.add_change_listener(self._listener)
+
+    def reload(self, filters=None):
+        """Tam yükleme (filtre değişince); sonuç reloaded ile gelir"""
+        self.filters = filters
+        self.generation += 1
+        self.fetching = True
+        self.dirty = False
+        generation = self.generation
+        db_call(self.db, self.db.fetch_detections_since, 0, filters,
+                on_result=lambda result: self._on_rows(generation, result, full=True),
+                on_error=lambda _: self._on_failed(generation))
+
+    def fetch_new(self):
+        if self.last_id is None:
+            return
+        if self.fetching:
+            self.dirty = True
+            return
+        self.fetching = True
+        generation = self.generation
+        db_call(self.db, self.db.fetch_detections_since, self.last_id, self.filters,
+                on_result=lambda result: self._on_rows(generation, result),
+                on_error=lambda _: self._on_failed(generation))
+
+    def _on_rows(self, generation, result, full=False):
+        if generation != self.generation:
+            return  # filtre değişti; eski sorgunun sonucu
+        self.last_id, rows = result
+        if self.deleted_while_fetching:
+            rows = [row for row in rows if row[0] not in self.deleted_while_fetching]
+        self._finish_fetch()
+        if full:
+            self.reloaded.emit(rows)
+            self._poll.start()
+        elif rows:
+            self.rows_added.emit(rows)
+
+    def _on_failed(self, generation):
+        if generation == self.generation:
+            self._finish_fetch()
+
+    def _finish_fetch(self):
+        self.fetching = False
+        self.deleted_while_fetching.clear()
+        if self.dirty:
+            self.dirty = False
+            self._coalesce.start()
+
+    def _on_changed(self, kind, ids):
+        if kind == 'delete':
+            if self.fetching:
+                self.deleted_while_fetching.update(ids)
+            self.rows_deleted.emit(list(ids))
+        elif not self._coalesce.isActive():
+            self._coalesce.start()
+
+    def close(self):
+        self.db.remove_change_listener(self._listener)
+        self._coalesce.stop()
+        self._poll.stop()
@@ -1,143 +1,515 @@
+import json
 import sqlite3
 from datetime import datetime
 import bcrypt
-import csv
 import os
+from db_pool import ConnectionManager, DBExecutor
+from tracing import span
+
+# Sık kullanılan sorgular: sabit metinler bağlantı başına derlenip önbellekte tutulur
+SQL_INSERT_DETECTION = '''
+    INSERT INTO detections (timestamp, classes, bboxes, confidences, image_path, mode, operator, role,
+                            image_width, image_height, source, frame_index, media_msec)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+SQL_SELECT_DETECTIONS = ("SELECT id, timestamp, classes, confidences, mode, image_path, operator, role, "
+                         "source, frame_index, media_msec FROM detections")
+SQL_INSERT_LOG = 'INSERT INTO logs (user, action, timestamp) VALUES (?, ?, ?)'
+SQL_SELECT_USER_PASSWORD = "SELECT password, role FROM users WHERE username = ?"
+SQL_USER_EXISTS = "SELECT 1 FROM users WHERE username = ?"
+
 
 class DBManager:
-    def __init__(self, db_path='detections.db'):
+    def __init__(self, db_path='detections.db', read_pool_size=4):
         self.db_path = db_path
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.pool = ConnectionManager(db_path, read_pool_size=read_pool_size)
+        self.executor = DBExecutor()
+        self._change_listeners = []
         self.create_detection_table()
         self.create_user_table()
         self.create_log_table()
         self.create_user_log_table()
         self.check_and_update_detection_table()
+        self.create_rescore_table()
+        self.create_shadow_table()
+        self.create_timeline_table()
+
+    # DB çağrısını arka planda çalıştır, concurrent.futures.Future döndür
+    # Örn: db.submit(db.fetch_all_detections, filters)
+    def submit(self, fn, *args, **kwargs):
+        return self.executor.submit(fn, *args, **kwargs)
+
+    # Tespit tablosu değişiklik bildirimi (kayıt görüntüleyici gibi canlı görünümler için)
+    # listener(kind, ids): kind 'insert' / 'delete'; commit'ten sonra yazan thread'de çağrılır, kısa tutulmalı
+    # Toplu eklemede ids None'dır; yeni satırlar fetch_detections_since ile alınır
+    def add_change_listener(self, listener):
+        self._change_listeners.append(listener)
+
+    def remove_change_listener(self, listener):
+        if listener in self._change_listeners:
+            self._change_listeners.remove(listener)
+
+    def notify_detection_change(self, kind, ids=None):
+        for listener in list(self._change_listeners):
+            try:
+                listener(kind, ids)
+            except Exception as e:
+                print(f"[DB HATASI] Değişiklik bildirimi iletilemedi: {e}")
 
     # Tespit kayıtları tablosu (operator ve role eklendi)
     def create_detection_table(self):
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS detections (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                classes TEXT,
-                bboxes TEXT,
-                confidences TEXT,
-                image_path TEXT,
-                mode TEXT,
-                operator TEXT,
-                role TEXT
-            )
-        ''')
-        self.conn.commit()
+        with self.pool.writer() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS detections (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT,
+                    classes TEXT,
+                    bboxes TEXT,
+                    confidences TEXT,
+                    image_path TEXT,
+                    mode TEXT,
+                    operator TEXT,
+                    role TEXT
+                )
+            ''')
+
+    # Yeni modelle yeniden puanlama sonuçları (ham kareler üzerinden)
+    def create_rescore_table(self):
+        with self.pool.writer() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS detection_rescores (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    detection_id INTEGER,
+                    model TEXT,
+                    timestamp TEXT,
+                    classes TEXT,
+                    bboxes TEXT,
+                    confidences TEXT
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_rescores_detection ON detection_rescores(detection_id, model)")
+
+    # Gölge (aday) model ile üretim modelinin örneklenen karelerdeki karşılaştırması
+    def create_shadow_table(self):
+        with self.pool.writer() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS shadow_evaluations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT,
+                    model TEXT,
+                    production_model TEXT,
+                    source TEXT,
+                    production_count INTEGER,
+                    shadow_count INTEGER,
+                    matched INTEGER,
+                    missed INTEGER,
+                    extra INTEGER,
+                    per_class TEXT,
+                    production_ms REAL,
+                    shadow_ms REAL
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_shadow_model ON shadow_evaluations(model, timestamp)")
+
+    # Video zaman çizelgesi: sınıf başına kesintisiz tespit aralıkları (kare ve medya zamanı)
+    def create_timeline_table(self):
+        with self.pool.writer() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS video_timeline (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    source TEXT,
+                    class TEXT,
+                    level TEXT,
+                    start_frame INTEGER,
+                    end_frame INTEGER,
+                    start_msec REAL,
+                    end_msec REAL,
+                    peak_score REAL,
+                    hits INTEGER,
+                    created TEXT
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_timeline_source ON video_timeline(source, start_msec)")
 
     # Kullanıcı tablosu
     def create_user_table(self):
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE,
-                password TEXT,
-                role TEXT
-            )
-        ''')
-        self.conn.commit()
+        with self.pool.writer() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT UNIQUE,
+                    password TEXT,
+                    role TEXT
+                )
+            ''')
 
     # Kullanıcı giriş-çıkış log tablosu
     def create_user_log_table(self):
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT,
-                role TEXT,
-                login_time TEXT,
-                logout_time TEXT
-            )
-        ''')
-        self.conn.commit()
+        with self.pool.writer() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS user_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT,
+                    role TEXT,
+                    login_time TEXT,
+                    logout_time TEXT
+                )
+            ''')
 
     # Sistem log tablosu
     def create_log_table(self):
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user TEXT,
-                action TEXT,
-                timestamp TEXT
-            )
-        ''')
-        self.conn.commit()
+        with self.pool.writer() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user TEXT,
+                    action TEXT,
+                    timestamp TEXT
+                )
+            ''')
 
     # Eğer eski detections tablosu varsa kolonları güncelle
     def check_and_update_detection_table(self):
-        cursor = self.conn.cursor()
-        cursor.execute("PRAGMA table_info(detections)")
-        columns = [col[1] for col in cursor.fetchall()]
-        if 'operator' not in columns:
-            cursor.execute("ALTER TABLE detections ADD COLUMN operator TEXT")
-            self.conn.commit()
-        if 'role' not in columns:
-            cursor.execute("ALTER TABLE detections ADD COLUMN role TEXT")
-            self.conn.commit()
+        with self.pool.writer() as conn:
+            columns = [col[1] for col in conn.execute("PRAGMA table_info(detections)").fetchall()]
+            if 'operator' not in columns:
+                conn.execute("ALTER TABLE detections ADD COLUMN operator TEXT")
+            if 'role' not in columns:
+                conn.execute("ALTER TABLE detections ADD COLUMN role TEXT")
+            # Kanıt görüntüsünün saklama durumu: full / thumbnail / deleted
+            if 'image_state' not in columns:
+                conn.execute("ALTER TABLE detections ADD COLUMN image_state TEXT DEFAULT 'full'")
+            # Ham kare boyutu: overlay'i küçük önizlemeye ölçeklemek için (boşsa eski, çizili kayıt)
+            if 'image_width' not in columns:
+                conn.execute("ALTER TABLE detections ADD COLUMN image_width INTEGER")
+                conn.execute("ALTER TABLE detections ADD COLUMN image_height INTEGER")
+            # Video kayıtlarında kaynak dosya ve medya konumu: olay orijinal dosyada bulunabilsin
+            if 'media_msec' not in columns:
+                conn.execute("ALTER TABLE detections ADD COLUMN source TEXT")
+                conn.execute("ALTER TABLE detections ADD COLUMN frame_index INTEGER")
+                conn.execute("ALTER TABLE detections ADD COLUMN media_msec REAL")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_detections_timestamp ON detections(timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_detections_image_path ON detections(image_path)")
 
     # Kullanıcı giriş logu
     def log_user_login(self, username, role):
-        cursor = self.conn.cursor()
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        cursor.execute('INSERT INTO user_logs (username, role, login_time) VALUES (?, ?, ?)', (username, role, now))
-        self.conn.commit()
+        with self.pool.writer() as conn:
+            conn.execute('INSERT INTO user_logs (username, role, login_time) VALUES (?, ?, ?)', (username, role, now))
 
     # Kullanıcı çıkış logu
     def log_user_logout(self, username):
-        cursor = self.conn.cursor()
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        cursor.execute('''
-            UPDATE user_logs SET logout_time = ?
-            WHERE username = ? AND logout_time IS NULL
-            ORDER BY id DESC LIMIT 1
-        ''', (now, username))
-        self.conn.commit()
+        with self.pool.writer() as conn:
+            conn.execute('''
+                UPDATE user_logs SET logout_time = ?
+                WHERE username = ? AND logout_time IS NULL
+                ORDER BY id DESC LIMIT 1
+            ''', (now, username))
 
     # Tespit kaydı ekleme (operator ve role dahil)
-    def insert_detection(self, classes, image_path, mode, bboxes=None, confidences=None, operator=None, role=None):
-        cursor = self.conn.cursor()
+    # image_size: kaydedilen ham karenin (genişlik, yükseklik) bilgisi
+    # source / frame_index / media_msec: video dosyasındaki konum (canlı kaynak ve görüntüde boş)
+    def insert_detection(self, classes, image_path, mode, bboxes=None, confidences=None, operator=None, role=None,
+                         image_size=None, source=None, frame_index=None, media_msec=None):
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        class_str, bbox_str, conf_str = self.format_detection_columns(classes, bboxes, confidences)
+        width, height = image_size if image_size else (None, None)
+
+        with span("db_write", cat="db"), self.pool.writer() as conn:
+            cursor = conn.execute(SQL_INSERT_DETECTION, (now, class_str, bbox_str, conf_str, image_path, mode, operator, role,
+                                                         width, height, source, frame_index, media_msec))
+        self.notify_detection_change('insert', [cursor.lastrowid])
+        return cursor.lastrowid
+
+    # Toplu tespit kaydı: tüm satırlar tek transaction'da yazılır
+    # records: insert_detection parametreleriyle aynı anahtarlara sahip sözlükler
+    def insert_detections_batch(self, records):
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = []
+        for rec in records:
+            class_str, bbox_str, conf_str = self.format_detection_columns(
+                rec['classes'], rec.get('bboxes'), rec.get('confidences'))
+            width, height = rec['image_size'] if rec.get('image_size') else (None, None)
+            rows.append((now, class_str, bbox_str, conf_str, rec['image_path'], rec['mode'],
+                         rec.get('operator'), rec.get('role'), width, height,
+                         rec.get('source'), rec.get('frame_index'), rec.get('media_msec')))
+        with span("db_write", cat="db", rows=len(rows)), self.pool.writer() as conn:
+            conn.executemany(SQL_INSERT_DETECTION, rows)
+        if rows:
+            self.notify_detection_change('insert')
+
+    # Sınıf / kutu / skor listelerini DB metin kolonlarına çevir
+    def format_detection_columns(self, classes, bboxes=None, confidences=None):
         class_str = ', '.join(classes)
-        bbox_str = ';'.join([str(b) for b in bboxes]) if bboxes else ''
+        bbox_str = ';'.join([str([int(v) for v in b]) for b in bboxes]) if bboxes else ''
         conf_str = ';'.join([f"{c:.2f}" for c in confidences]) if confidences else ''
+        return class_str, bbox_str, conf_str
+
+    # Tek bir tespit kaydını sözlük olarak çek
+    def fetch_detection(self, detection_id):
+        with self.pool.reader() as conn:
+            cursor = conn.execute("SELECT * FROM detections WHERE id = ?", (detection_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return dict(zip([col[0] for col in cursor.description], row))
+
+    # Ham karesi hâlâ tam çözünürlükte olan kayıtları id sırasıyla akıt (yeniden puanlama için)
+    def iter_rescorable_detections(self, model, since=None, chunk_size=200):
+        sql = '''
+            SELECT id, image_path FROM detections
+            WHERE image_state = 'full' AND image_width IS NOT NULL AND id > ?
+              AND id NOT IN (SELECT detection_id FROM detection_rescores WHERE model = ?)
+        '''
+        params = [model]
+        if since:
+            sql += " AND timestamp >= ?"
+            params.append(since)
+        sql += " ORDER BY id LIMIT ?"
+        last_id = 0
+        while True:
+            with self.pool.reader() as conn:
+                rows = conn.execute(sql, [last_id] + params + [chunk_size]).fetchall()
+            if not rows:
+                break
+            yield rows
+            last_id = rows[-1][0]
+
+    # Yeniden puanlama sonuçlarını tek transaction'da yaz
+    # results: [(detection_id, classes, bboxes, confidences), ...]
+    def insert_rescores(self, model, results):
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = []
+        for detection_id, classes, bboxes, confidences in results:
+            class_str, bbox_str, conf_str = self.format_detection_columns(classes, bboxes, confidences)
+            rows.append((detection_id, model, now, class_str, bbox_str, conf_str))
+        with self.pool.writer() as conn:
+            conn.executemany('''
+                INSERT INTO detection_rescores (detection_id, model, timestamp, classes, bboxes, confidences)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
 
-        cursor.execute('''
-            INSERT INTO detections (timestamp, classes, bboxes, confidences, image_path, mode, operator, role)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (now, class_str, bbox_str, conf_str, image_path, mode, operator, role))
-        self.conn.commit()
+    # Gölge model sonuçlarını tek transaction'da yaz
+    # rows: ShadowEvaluator.evaluate() sözlükleri (per_class: {sınıf: [eşleşen, kaçırılan, fazla]})
+    def insert_shadow_evaluations(self, rows):
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        values = [(now, r['model'], r['production_model'], r['source'], r['production_count'], r['shadow_count'],
+                   r['matched'], r['missed'], r['extra'], json.dumps(r['per_class'], ensure_ascii=False),
+                   r['production_ms'], r['shadow_ms']) for r in rows]
+        with span("db_write", cat="db", rows=len(values)), self.pool.writer() as conn:
+            conn.executemany('''
+                INSERT INTO shadow_evaluations (timestamp, model, production_model, source, production_count,
+                                                shadow_count, matched, missed, extra, per_class,
+                                                production_ms, shadow_ms)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', values)
+
+    # Aday model başına toplam uyum; sınıf bazlı sayılar JSON kolonundan toplanır
+    def fetch_shadow_summary(self, model=None):
+        sql = "SELECT model, production_model, matched, missed, extra, per_class, production_ms, shadow_ms FROM shadow_evaluations"
+        params = []
+        if model:
+            sql += " WHERE model = ?"
+            params.append(model)
+        summary = {}
+        with self.pool.reader() as conn:
+            for name, production, matched, missed, extra, per_class, production_ms, shadow_ms in conn.execute(sql, params):
+                row = summary.setdefault((name, production), {
+                    'model': name, 'production_model': production, 'frames': 0,
+                    'matched': 0, 'missed': 0, 'extra': 0, 'per_class': {},
+                    '_production_ms': [], '_shadow_ms': [],
+                })
+                row['frames'] += 1
+                row['matched'] += matched
+                row['missed'] += missed
+                row['extra'] += extra
+                for cls, counts in json.loads(per_class or '{}').items():
+                    totals = row['per_class'].setdefault(cls, [0, 0, 0])
+                    for i, value in enumerate(counts):
+                        totals[i] += value
+                if production_ms is not None:
+                    row['_production_ms'].append(production_ms)
+                row['_shadow_ms'].append(shadow_ms)
+        for row in summary.values():
+            production_ms, shadow_ms = row.pop('_production_ms'), row.pop('_shadow_ms')
+            row['production_ms'] = sum(production_ms) / len(production_ms) if production_ms else None
+            row['shadow_ms'] = sum(shadow_ms) / len(shadow_ms) if shadow_ms else None
+        return list(summary.values())
+
+    # Bir videonun işlenen kısmına (until_msec'e kadar) ait eski segmentleri yenileriyle değiştir
+    def replace_timeline(self, source, segments, until_msec=None):
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = [(source, s['class'], s['level'], s['start_frame'], s['end_frame'], s['start_msec'], s['end_msec'],
+                 s['peak_score'], s['hits'], now) for s in segments]
+        with span("db_write", cat="db", rows=len(rows)), self.pool.writer() as conn:
+            if until_msec is None:
+                conn.execute("DELETE FROM video_timeline WHERE source = ?", (source,))
+            else:
+                # Kesim noktasını aşan eski segmentlerin kuyruğu korunur: başlangıç until_msec'e kırpılır
+                conn.execute('''
+                    UPDATE video_timeline
+                    SET start_frame = start_frame + CAST((? - start_msec) * (end_frame - start_frame)
+                                                         / (end_msec - start_msec) AS INTEGER),
+                        start_msec = ?
+                    WHERE source = ? AND start_msec <= ? AND end_msec > ?
+                ''', (until_msec, until_msec, source, until_msec, until_msec))
+                conn.execute("DELETE FROM video_timeline WHERE source = ? AND end_msec <= ?", (source, until_msec))
+            conn.executemany('''
+                INSERT INTO video_timeline (source, class, level, start_frame, end_frame, start_msec, end_msec,
+                                            peak_score, hits, created)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+
+    def fetch_timeline(self, source):
+        with self.pool.reader() as conn:
+            cursor = conn.execute('''
+                SELECT class, level, start_frame, end_frame, start_msec, end_msec, peak_score, hits
+                FROM video_timeline WHERE source = ? ORDER BY start_msec
+            ''', (source,))
+            columns = [col[0] for col in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    # Kayıt görüntüleyici filtrelerinden WHERE koşulu üret
+    # filters: {'classes', 'mode', 'operator', 'date_from', 'date_to'}
+    def build_detection_filter(self, filters=None):
+        clauses = []
+        params = []
+        filters = filters or {}
+        if filters.get('classes'):
+            clauses.append("classes LIKE ?")
+            params.append(f"%{filters['classes']}%")
+        if filters.get('mode'):
+            clauses.append("mode = ?")
+            params.append(filters['mode'])
+        if filters.get('operator'):
+            clauses.append("operator LIKE ?")
+            params.append(f"%{filters['operator']}%")
+        if filters.get('date_from'):
+            clauses.append("timestamp >= ?")
+            params.append(filters['date_from'])
+        if filters.get('date_to'):
+            clauses.append("timestamp <= ?")
+            params.append(filters['date_to'])
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
 
     # Tüm tespit kayıtlarını çekme
-    def fetch_all_detections(self):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT timestamp, classes, confidences, mode, image_path, operator, role FROM detections ORDER BY id DESC")
-        return cursor.fetchall()
+    def fetch_all_detections(self, filters=None):
+        where, params = self.build_detection_filter(filters)
+        with self.pool.reader() as conn:
+            return conn.execute(f"{SQL_SELECT_DETECTIONS}{where} ORDER BY id DESC", params).fetchall()
+
+    # last_id'den sonra eklenmiş, filtreye uyan kayıtlar ve o anki en büyük id: (max_id, satırlar)
+    # id PK olduğundan sorgu sadece yeni satırları tarar; last_id=0 tam yükleme demektir
+    def fetch_detections_since(self, last_id=0, filters=None):
+        where, params = self.build_detection_filter(filters)
+        where += " AND id > ? AND id <= ?" if where else " WHERE id > ? AND id <= ?"
+        with self.pool.reader() as conn:
+            max_id = conn.execute("SELECT MAX(id) FROM detections").fetchone()[0] or 0
+            if max_id <= last_id:
+                return max(max_id, last_id), []
+            # Üst sınır: iki sorgu arasında eklenen satırlar bir sonraki çağrıya kalır
+            rows = conn.execute(f"{SQL_SELECT_DETECTIONS}{where} ORDER BY id DESC", params + [last_id, max_id]).fetchall()
+            return max_id, rows
+
+    # Filtreye uyan kayıt sayısı
+    def count_detections(self, filters=None):
+        where, params = self.build_detection_filter(filters)
+        with self.pool.reader() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM detections{where}", params).fetchone()[0]
+
+    # Tespit kayıtlarını chunk'lar halinde akıt (dışa aktarma için sabit bellek)
+    def iter_detections(self, filters=None, chunk_size=1000):
+        where, params = self.build_detection_filter(filters)
+        # Okuma havuzundan bağlantı: yazıcı ve GUI sorguları beklemez
+        with self.pool.reader() as conn:
+            cursor = conn.execute(f"{SQL_SELECT_DETECTIONS}{where} ORDER BY id DESC", params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
 
     # Tespit kaydı silme
-    def delete_detection(self, timestamp):
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM detections WHERE timestamp = ?", (timestamp,))
-        self.conn.commit()
+    def delete_detection(self, detection_id):
+        with self.pool.writer() as conn:
+            conn.execute("DELETE FROM detections WHERE id = ?", (detection_id,))
+        self.notify_detection_change('delete', [detection_id])
+
+    # Toplu silme (saklama politikası / arşivleme)
+    def delete_detections(self, ids):
+        ids = list(ids)
+        with self.pool.writer() as conn:
+            conn.executemany("DELETE FROM detections WHERE id = ?", [(i,) for i in ids])
+        if ids:
+            self.notify_detection_change('delete', ids)
+
+    # Belirli tarihten eski kayıtların tüm kolonlarını çek (kolon adları, satırlar)
+    def fetch_detection_rows_before(self, cutoff, limit=500, image_state=None):
+        sql = "SELECT * FROM detections WHERE timestamp < ?"
+        params = [cutoff]
+        if image_state:
+            sql += " AND image_state = ?"
+            params.append(image_state)
+        sql += " ORDER BY id LIMIT ?"
+        params.append(limit)
+        with self.pool.reader() as conn:
+            cursor = conn.execute(sql, params)
+            columns = [col[0] for col in cursor.description]
+            return columns, cursor.fetchall()
+
+    # Aynı görüntü dosyasını kullanan kayıt sayısı (içerik hash'i ile tekilleştirme)
+    def count_image_references(self, image_path, image_state=None):
+        sql = "SELECT COUNT(*) FROM detections WHERE image_path = ?"
+        params = [image_path]
+        if image_state:
+            sql += " AND image_state = ?"
+            params.append(image_state)
+        with self.pool.reader() as conn:
+            return conn.execute(sql, params).fetchone()[0]
+
+    # Görüntü saklama durumunu güncelle
+    def set_image_state(self, ids, state):
+        with self.pool.writer() as conn:
+            conn.executemany("UPDATE detections SET image_state = ? WHERE id = ?", [(state, i) for i in ids])
+
+    # Bakım: boş sayfaları geri ver, istatistikleri güncelle, WAL'ı kısalt
+    def run_maintenance(self, vacuum_pages=1000):
+        with self.pool.writer() as conn:
+            auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if auto_vacuum != 2:
+            # Artımlı vacuum için bir kereye mahsus tam VACUUM gerekir (transaction dışında)
+            with self.pool.writer() as conn:
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.execute("VACUUM")
+        with self.pool.writer() as conn:
+            conn.execute(f"PRAGMA incremental_vacuum({int(vacuum_pages)})").fetchall()
+            conn.execute("ANALYZE")
+            conn.execute("PRAGMA optimize")
+        with self.pool.writer() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
 
     # Kullanıcı ekleme (hashlenmiş şifre)
     def add_user(self, username, password, role):
         hashed_password = self.hash_password(password)
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('INSERT INTO users (username, password, role) VALUES (?, ?, ?)', (username, hashed_password, role))
-            self.conn.commit()
+            with self.pool.writer() as conn:
+                conn.execute('INSERT INTO users (username, password, role) VALUES (?, ?, ?)', (username, hashed_password, role))
         except sqlite3.IntegrityError:
             pass
 
+    def user_exists(self, username):
+        with self.pool.reader() as conn:
+            return conn.execute(SQL_USER_EXISTS, (username,)).fetchone() is not None
+
+    # Varsayılan kullanıcı: önce varlık kontrolü, bcrypt sadece gerçekten eklenecekse çalışır
+    def ensure_user(self, username, password, role):
+        if self.user_exists(username):
+            return False
+        self.add_user(username, password, role)
+        return True
+
     # Şifre hashleme
     def hash_password(self, password):
         hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
@@ -149,9 +521,8 @@ class DBManager:
 
     # Kullanıcı doğrulama
     def validate_user(self, username, password):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT password, role FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
+        with self.pool.reader() as conn:
+            result = conn.execute(SQL_SELECT_USER_PASSWORD, (username,)).fetchone()
         if result:
             hashed_password, role = result
             if self.check_password(password, hashed_password):
@@ -160,63 +531,51 @@ class DBManager:
 
     # Tüm kullanıcıları çek
     def get_all_users(self):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT id, username, role FROM users ORDER BY id")
-        return cursor.fetchall()
+        with self.pool.reader() as conn:
+            return conn.execute("SELECT id, username, role FROM users ORDER BY id").fetchall()
 
     # Kullanıcı silme
     def delete_user(self, user_id):
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
-        self.conn.commit()
+        with self.pool.writer() as conn:
+            conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
 
     # Yönetim logları (action log)
     def add_log(self, user, action):
-        cursor = self.conn.cursor()
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        cursor.execute('INSERT INTO logs (user, action, timestamp) VALUES (?, ?, ?)', (user, action, timestamp))
-        self.conn.commit()
+        with self.pool.writer() as conn:
+            conn.execute(SQL_INSERT_LOG, (user, action, timestamp))
 
     def get_all_logs(self):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT user, action, timestamp FROM logs ORDER BY id DESC")
-        return cursor.fetchall()
+        with self.pool.reader() as conn:
+            return conn.execute("SELECT user, action, timestamp FROM logs ORDER BY id DESC").fetchall()
 
     # Kullanıcı giriş/çıkış loglarını çek
     def get_all_user_logs(self):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT username, role, login_time, logout_time FROM user_logs ORDER BY id DESC")
-        return cursor.fetchall()
+        with self.pool.reader() as conn:
+            return conn.execute("SELECT username, role, login_time, logout_time FROM user_logs ORDER BY id DESC").fetchall()
 
     # İstatistik raporu
     def get_detection_statistics(self):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT classes FROM detections")
-        data = cursor.fetchall()
-
         class_count = {}
-        for row in data:
-            classes = row[0].split(', ')
-            for cls in classes:
-                class_count[cls] = class_count.get(cls, 0) + 1
+        with self.pool.reader() as conn:
+            for row in conn.execute("SELECT classes FROM detections"):
+                classes = row[0].split(', ')
+                for cls in classes:
+                    class_count[cls] = class_count.get(cls, 0) + 1
 
         return class_count
 
-    # Export CSV
-    def export_detections_to_csv(self, filename):
-        data = self.fetch_all_detections()
-        with open(filename, mode='w', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            writer.writerow(["timestamp", "classes", "confidences", "mode", "image_path", "operator", "role"])
-            for row in data:
-                writer.writerow(row)
+    # Export CSV (akış halinde, tüm tabloyu belleğe almadan)
+    def export_detections_to_csv(self, filename, filters=None):
+        from exporter import export_detections
+        return export_detections(self, filename, fmt='csv', filters=filters)
 
     # Yetki sorgulama
     def get_user_role(self, username):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT role FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
+        with self.pool.reader() as conn:
+            result = conn.execute("SELECT role FROM users WHERE username = ?", (username,)).fetchone()
         return result[0] if result else None
 
     def close(self):
-        self.conn.close()
+        self.executor.shutdown(wait=True)
+        self.pool.close()
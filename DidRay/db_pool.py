@@ -0,0 +1,119 @@
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+# sqlite3 modülü derlenen ifadeleri bağlantı başına SQL metnine göre önbelleğe alır.
+# Sabit SQL metinleri kullanıldığı sürece sorgular hazır (prepared) ifade olarak yeniden kullanılır.
+STATEMENT_CACHE_SIZE = 256
+
+
+class ConnectionManager:
+    """Tek yazıcı + salt-okunur bağlantı havuzu (WAL modunda)"""
+
+    def __init__(self, db_path, read_pool_size=4, busy_timeout=5.0):
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self.read_pool_size = read_pool_size
+        self._write_lock = threading.RLock()
+        self._writer = sqlite3.connect(
+            db_path, timeout=busy_timeout, check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        self._configure(self._writer)
+        # Yeni veritabanlarında etkili olur; eskiler ilk bakımda dönüştürülür
+        self._writer.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute("PRAGMA synchronous=NORMAL")
+
+        self._readers = queue.Queue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+        self._closed = False
+
+    def _configure(self, conn):
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+
+    def _open_reader(self):
+        # Bellek içi veritabanı ayrı bağlantıdan görülemez, yazıcı bağlantısına düş
+        if self.db_path == ':memory:':
+            return None
+        uri = Path(os.path.abspath(self.db_path)).as_uri() + "?mode=ro"
+        conn = sqlite3.connect(
+            uri, uri=True, timeout=self.busy_timeout, check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        self._configure(conn)
+        return conn
+
+    @contextmanager
+    def writer(self):
+        """Yazma işlemleri tek bağlantı üzerinden sıraya alınır, blok sonunda commit edilir"""
+        with self._write_lock:
+            try:
+                yield self._writer
+                self._writer.commit()
+            except BaseException:
+                self._writer.rollback()
+                raise
+
+    @contextmanager
+    def reader(self):
+        """Havuzdan salt-okunur bir bağlantı ödünç al"""
+        conn = self._acquire_reader()
+        if conn is None:
+            with self._write_lock:
+                yield self._writer
+            return
+        try:
+            yield conn
+        finally:
+            if self._closed:
+                conn.close()
+            else:
+                self._readers.put(conn)
+
+    def _acquire_reader(self):
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._reader_lock:
+            if self._reader_count < self.read_pool_size:
+                conn = self._open_reader()
+                if conn is not None:
+                    self._reader_count += 1
+                return conn
+        # İç içe okumalar (ör. dışa aktarma akışı + kayıt başına fetch) havuzu tüketebilir;
+        # süresiz beklemek kilitlenmeye yol açar, süre dolunca yazıcı bağlantısına düşülür
+        try:
+            return self._readers.get(timeout=self.busy_timeout)
+        except queue.Empty:
+            print("[DB] Okuma havuzu dolu, sorgu yazıcı bağlantısında çalışacak")
+            return None
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._write_lock:
+            self._writer.close()
+
+
+class DBExecutor:
+    """DB çağrılarını arka plan thread'lerinde çalıştırıp Future döndürür"""
+
+    def __init__(self, max_workers=2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+
+    def submit(self, fn, *args, **kwargs):
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,49 @@
+import time
+from collections import Counter, deque
+from danger_levels import get_danger_level
+
+
+class DetectionBannerModel:
+    """Video tespit bandı için durum modeli.
+
+    Her kare sadece kuyruğa eklenir (ucuz); GUI birkaç Hz'de snapshot() çağırır ve
+    sadece metin/önem derecesi değiştiyse widget'a dokunur. Sayımlar son
+    window_seconds içindeki kareler üzerinden yuvarlanır, böylece kare kare titremez.
+    """
+
+    def __init__(self, window_seconds=3.0):
+        self.window_seconds = window_seconds
+        self._frames = deque()
+
+    def reset(self):
+        self._frames.clear()
+
+    def add_frame(self, detections, now=None):
+        now = now or time.monotonic()
+        counts = Counter(det['class'] for det in detections if 'class' in det)
+        self._frames.append((now, counts))
+        self._expire(now)
+
+    def _expire(self, now):
+        while self._frames and now - self._frames[0][0] > self.window_seconds:
+            self._frames.popleft()
+
+    def peak_counts(self, now=None):
+        """Pencere içinde tek karede görülen en yüksek sınıf sayıları"""
+        self._expire(now or time.monotonic())
+        peaks = Counter()
+        for _, counts in self._frames:
+            peaks |= counts
+        return dict(peaks)
+
+    def snapshot(self, now=None):
+        """(metin, önem) döndür; önem: 'processing', 'clear', 'threat' veya 'critical'"""
+        counts = self.peak_counts(now)
+        if not self._frames:
+            return "✅ Processing video...", 'processing'
+        if not counts:
+            return "✅ No threats detected", 'clear'
+        ordered = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        summary = ", ".join(f"{cls} ×{count}" for cls, count in ordered)
+        severity = 'critical' if any(get_danger_level(cls) == 'Çok Yüksek' for cls in counts) else 'threat'
+        return f"⚠️ {summary} (last {self.window_seconds:g}s)", severity
@@ -1,39 +1,164 @@
+import time
 import torch
 from ultralytics import YOLO
 from utils import get_model_path
+from model_cache import DEFAULT_IMGSZ, get_model_cache
+from cascade import CascadeConfig, CascadeStats, Prescreen
+from roi import RoiConfig, RoiCropper, RoiStats
+from cpu_tuning import precision_context, tune_detector
 
 class PyTorchDetector:
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, use_cache=True, imgsz=DEFAULT_IMGSZ, cascade=None, roi=None, cpu_tuning=None,
+                 conf=None):
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.imgsz = imgsz
+        # None: modelin varsayılan güven eşiği
+        self.conf = conf
+        self.compiled = False
+        self.precision = "fp32"
+        self.channels_last = False
+        self.prescreen = None
+        self.cascade_stats = CascadeStats()
+        self.roi = None
+        self.roi_stats = RoiStats()
         
         # Model path'i otomatik belirle
         if model_path is None:
             model_path = get_model_path()
+        self.model_path = model_path
         
         try:
-            self.model = YOLO(model_path)
-            self.model.to(self.device)
-            print(f"[MODEL] {model_path} yüklendi ({self.device})")
+            self.model = self._load(model_path, use_cache)
+            kind = "derlenmiş" if self.compiled else "ağırlık"
+            print(f"[MODEL] {model_path} yüklendi ({self.device}, {kind})")
         except Exception as e:
             print(f"[MODEL HATASI] Model yüklenemedi: {e}")
             raise
 
+        # İki aşamalı mod: cascade=None ise cascade.json'a bakılır, False ile kapatılır
+        if cascade is None:
+            cascade = CascadeConfig.from_file()
+        if cascade and cascade.enabled:
+            try:
+                self.prescreen = Prescreen(cascade, self.device)
+            except Exception as e:
+                print(f"[CASCADE HATASI] Ön eleme modeli yüklenemedi, tek aşama kullanılacak: {e}")
+
+        # Bagaj bölgesi kırpma: roi=None ise roi.json'a bakılır, False ile kapatılır
+        if roi is None:
+            roi = RoiConfig.from_file()
+        if roi and roi.enabled:
+            self.roi = RoiCropper(roi)
+            self.roi_stats = self.roi.stats
+
+        # CPU'da thread/BF16/channels_last ayarı: cpu_tuning=None ise cpu_tuning.json, False ile kapalı
+        if self.device == "cpu" and cpu_tuning is not False:
+            try:
+                tune_detector(self, cpu_tuning)
+            except Exception as e:
+                print(f"[CPU AYAR HATASI] Ayarlar uygulanamadı, FP32 kullanılacak: {e}")
+                self.precision = "fp32"
+
+    def _load(self, model_path, use_cache):
+        """Önbellekte derlenmiş TorchScript varsa onu yükle, yoksa .pt'yi yükleyip export'u arka planda başlat"""
+        if use_cache and model_path.endswith(".pt"):
+            cache = get_model_cache()
+            artifact = cache.lookup(model_path, torch.__version__, self.imgsz, self.device)
+            if artifact:
+                try:
+                    model = YOLO(artifact, task="detect")
+                    model.overrides.update(device=self.device, imgsz=self.imgsz)
+                    model.names  # meta veriyi şimdi oku; bozuk dosya burada hata verir
+                    self.compiled = True
+                    return model
+                except Exception as e:
+                    print(f"[MODEL ÖNBELLEK HATASI] {artifact} yüklenemedi, .pt kullanılıyor: {e}")
+                    cache.invalidate(artifact)
+            cache.export_async(model_path, torch.__version__, self.imgsz, self.device)
+
+        model = YOLO(model_path)
+        if model_path.endswith(".pt"):
+            model.to(self.device)
+        else:
+            # Dışa aktarılmış formatlar (onnx, openvino, engine) doğrudan yüklenir; cihaz tahmin sırasında seçilir
+            model.overrides.update(device=self.device, imgsz=self.imgsz)
+        return model
+
+    def _predict(self, source, **kwargs):
+        kwargs['imgsz'] = self.imgsz
+        if self.conf is not None:
+            kwargs['conf'] = self.conf
+        with precision_context(self.precision):
+            return self.model(source, **kwargs)
+
+    def _crop(self, image):
+        if self.roi is None:
+            return image, (0, 0)
+        return self.roi.crop(image)
+
+    def _parse_result(self, r, offset=(0, 0)):
+        """Kutular kırpılmış görüntüden tam kare koordinatlarına taşınır"""
+        dx, dy = offset
+        detections = []
+        boxes = r.boxes.xyxy.cpu().numpy()
+        scores = r.boxes.conf.cpu().numpy()
+        classes = r.boxes.cls.cpu().numpy()
+        for (box, score, cls) in zip(boxes, scores, classes):
+            x1, y1, x2, y2 = box.astype(int)
+            detections.append({
+                'bbox': (int(x1) + dx, int(y1) + dy, int(x2) + dx, int(y2) + dy),
+                'score': float(score),
+                'class': self.model.names[int(cls)]
+            })
+        return detections
+
     def detect(self, image):
+        """Cascade açıksa önce ön eleme; eşiğin altındaki karelerde tam model çalışmaz"""
+        if self.prescreen is None:
+            return self.detect_full(image)
+        return self.detect_batch([image])[0]
+
+    def detect_batch(self, images):
+        if self.prescreen is None or not images:
+            return self.detect_full_batch(images)
+        start = time.perf_counter()
+        try:
+            scores = self.prescreen.score_batch(images)
+        except Exception as e:
+            print(f"[CASCADE HATASI] Ön eleme başarısız, tam model kullanılıyor: {e}")
+            scores = [1.0] * len(images)
+        stage1 = time.perf_counter() - start
+        passed = [i for i, score in enumerate(scores) if score >= self.prescreen.threshold]
+        results = [[] for _ in images]
+        start = time.perf_counter()
+        if passed:
+            for i, detections in zip(passed, self.detect_full_batch([images[i] for i in passed])):
+                results[i] = detections
+        self.cascade_stats.record(len(images), len(passed), stage1, time.perf_counter() - start)
+        return results
+
+    def detect_full(self, image):
         try:
-            results = self.model(image)
+            crop, offset = self._crop(image)
+            results = self._predict(crop)
             detections = []
             for r in results:
-                boxes = r.boxes.xyxy.cpu().numpy()
-                scores = r.boxes.conf.cpu().numpy()
-                classes = r.boxes.cls.cpu().numpy()
-                for (box, score, cls) in zip(boxes, scores, classes):
-                    x1, y1, x2, y2 = box.astype(int)
-                    detections.append({
-                        'bbox': (x1, y1, x2, y2),
-                        'score': float(score),
-                        'class': self.model.names[int(cls)]
-                    })
+                detections.extend(self._parse_result(r, offset))
             return detections
         except Exception as e:
             print(f"[DETECTION HATASI] : {e}")
-            return []
\ No newline at end of file
+            return []
+
+    def detect_full_batch(self, images):
+        """Birden fazla görüntüyü tek forward pass'te analiz et, görüntü başına tespit listesi döndür"""
+        if not images:
+            return []
+        if len(images) == 1:
+            return [self.detect_full(images[0])]
+        try:
+            crops, offsets = zip(*(self._crop(image) for image in images))
+            results = self._predict(list(crops), verbose=False)
+            return [self._parse_result(r, offset) for r, offset in zip(results, offsets)]
+        except Exception as e:
+            print(f"[DETECTION HATASI] Toplu analiz: {e}")
+            return [self.detect_full(image) for image in images]
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import deque
+import cv2
+from overlay import draw_detections
+
+
+def fit_size(width, height, max_width, max_height):
+    """En-boy oranını koruyarak (max_width, max_height) kutusuna sığan boyut"""
+    if width <= 0 or height <= 0 or max_width <= 0 or max_height <= 0:
+        return width, height
+    scale = min(max_width / width, max_height / height)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def prepare_display_frame(img, max_width, max_height):
+    """Kareyi etiket boyutuna küçültüp RGB'ye çevir (worker thread'inde çağrılır).
+
+    Önce küçültme yapıldığı için renk dönüşümü ve QImage kopyası tam çözünürlükte yapılmaz.
+    """
+    height, width = img.shape[:2]
+    target_w, target_h = fit_size(width, height, max_width, max_height)
+    if (target_w, target_h) != (width, height):
+        interpolation = cv2.INTER_AREA if target_w < width else cv2.INTER_LINEAR
+        img = cv2.resize(img, (target_w, target_h), interpolation=interpolation)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+
+def render_display_frame(frame, detections, max_width, max_height):
+    """Canlı görüntü karesi: küçült, kutuları küçük karede çiz, RGB'ye çevir.
+
+    Ham kare değiştirilmez; kutular ölçeklenerek küçültülmüş kopyaya çizilir.
+    """
+    height, width = frame.shape[:2]
+    target_w, target_h = fit_size(width, height, max_width, max_height)
+    if (target_w, target_h) != (width, height):
+        interpolation = cv2.INTER_AREA if target_w < width else cv2.INTER_LINEAR
+        img = cv2.resize(frame, (target_w, target_h), interpolation=interpolation)
+    else:
+        img = frame.copy()
+    draw_detections(img, detections, scale=target_w / float(width))
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)
+
+
+class FrameMailbox:
+    """Tek slotluk kare kutusu: sadece en yeni kare boyanır, eskiler düşürülür"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frame = None
+        self.dropped = 0
+
+    def post(self, frame):
+        """Kareyi bırak; slot boştaysa True döner (GUI'ye bildirim gönderilmeli)"""
+        with self._lock:
+            was_empty = self._frame is None
+            if not was_empty:
+                self.dropped += 1
+            self._frame = frame
+            return was_empty
+
+    def take(self):
+        with self._lock:
+            frame, self._frame = self._frame, None
+            return frame
+
+
+class FpsCounter:
+    """Son window_seconds içindeki olay sayısından FPS hesaplar"""
+
+    def __init__(self, window_seconds=2.0):
+        self.window_seconds = window_seconds
+        self._times = deque()
+
+    def tick(self, now=None):
+        now = now or time.monotonic()
+        self._times.append(now)
+        while self._times and now - self._times[0] > self.window_seconds:
+            self._times.popleft()
+
+    def fps(self, now=None):
+        now = now or time.monotonic()
+        while self._times and now - self._times[0] > self.window_seconds:
+            self._times.popleft()
+        if len(self._times) < 2:
+            return 0.0
+        return (len(self._times) - 1) / max(now - self._times[0], 1e-6)
@@ -0,0 +1,135 @@
+import argparse
+import json
+import cv2
+from cascade import CascadeConfig, Prescreen
+from danger_levels import DANGER_LEVELS, get_danger_level
+from eval_metrics import iter_labeled_images, load_yolo_labels, match_detections
+
+CRITICAL_LEVEL = 'Çok Yüksek'
+SWEEP_THRESHOLDS = [0.001, 0.005, 0.01, 0.02, 0.05, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5]
+
+
+def collect(detector, prescreen, folder, iou_threshold=0.5):
+    """Her etiketli görüntü için tam model eşleşmeleri ve ön eleme skorunu topla"""
+    records = []
+    for image_path, label_path in iter_labeled_images(folder):
+        img = cv2.imread(image_path)
+        if img is None:
+            print(f"[CASCADE EVAL] Okunamadı: {image_path}")
+            continue
+        height, width = img.shape[:2]
+        ground_truth = load_yolo_labels(label_path, width, height, detector.model.names)
+        matched, _ = match_detections(ground_truth, detector.detect_full(img), iou_threshold)
+        records.append({
+            'path': image_path,
+            'levels': [get_danger_level(cls) for cls, _ in ground_truth],
+            'matched': matched,
+            'score': prescreen.score(img),
+        })
+    return records
+
+
+def recall_by_level(records, threshold=None):
+    """Seviye başına geri çağırma; threshold verilirse eşiğin altında kalan görüntülerin nesneleri kaçmış sayılır"""
+    totals = {level: 0 for level in DANGER_LEVELS}
+    found = {level: 0 for level in DANGER_LEVELS}
+    for record in records:
+        passed = threshold is None or record['score'] >= threshold
+        for idx, level in enumerate(record['levels']):
+            totals[level] += 1
+            if passed and idx in record['matched']:
+                found[level] += 1
+    return {level: (found[level] / totals[level] if totals[level] else None) for level in DANGER_LEVELS}
+
+
+def critical_rejections(records, threshold):
+    """Tam modelin bulduğu kritik nesneyi içerip ön elemede reddedilen görüntüler"""
+    return [r['path'] for r in records if r['score'] < threshold and any(
+        level == CRITICAL_LEVEL and idx in r['matched'] for idx, level in enumerate(r['levels']))]
+
+
+def pass_rate(records, threshold):
+    return sum(1 for r in records if r['score'] >= threshold) / len(records) if records else 0.0
+
+
+def safe_threshold(records):
+    """Kritik geri çağırmayı hiç düşürmeyen en yüksek eşik (= kritik görüntülerdeki en düşük skor)"""
+    scores = [r['score'] for r in records if any(
+        level == CRITICAL_LEVEL and idx in r['matched'] for idx, level in enumerate(r['levels']))]
+    return min(scores) if scores else None
+
+
+def evaluate(records, threshold):
+    report = {
+        'images': len(records),
+        'threshold': threshold,
+        'recall_full': recall_by_level(records),
+        'recall_cascade': recall_by_level(records, threshold),
+        'pass_rate': pass_rate(records, threshold),
+        'critical_rejected': critical_rejections(records, threshold),
+        'sweep': [
+            {'threshold': t, 'pass_rate': pass_rate(records, t),
+             'critical_rejected': len(critical_rejections(records, t)),
+             'recall': recall_by_level(records, t)}
+            for t in sorted(set(SWEEP_THRESHOLDS + [threshold]))
+        ],
+    }
+    safe = safe_threshold(records)
+    report['safe_threshold'] = safe
+    report['safe_pass_rate'] = pass_rate(records, safe) if safe is not None else None
+    return report
+
+
+def print_report(report):
+    def fmt(value):
+        return "-" if value is None else f"{value:.1%}"
+
+    print(f"[CASCADE EVAL] {report['images']} görüntü, eşik {report['threshold']}, "
+          f"geçiş oranı {report['pass_rate']:.1%}")
+    print(f"[CASCADE EVAL] {'Seviye':<12} {'Tam model':>10} {'Cascade':>10}")
+    for level in DANGER_LEVELS:
+        print(f"[CASCADE EVAL] {level:<12} {fmt(report['recall_full'][level]):>10} "
+              f"{fmt(report['recall_cascade'][level]):>10}")
+    for entry in report['sweep']:
+        print(f"[CASCADE EVAL] eşik {entry['threshold']:<6} geçiş {entry['pass_rate']:>6.1%}  "
+              f"kaçan kritik görüntü: {entry['critical_rejected']}")
+    if report['safe_threshold'] is not None:
+        print(f"[CASCADE EVAL] Kritik kayıpsız en yüksek eşik: {report['safe_threshold']:.4f} "
+              f"(geçiş oranı {report['safe_pass_rate']:.1%})")
+    for path in report['critical_rejected']:
+        print(f"[CASCADE EVAL] Kritik tehdit reddedildi: {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cascade ön elemesinin etiketli veri üzerinde geri çağırma kaybını ölç")
+    parser.add_argument("--data", required=True, help="YOLO formatında etiketli klasör (images/ + labels/)")
+    parser.add_argument("--model", help="Tam model ağırlıkları (varsayılan: utils.get_model_path)")
+    parser.add_argument("--prescreen", help="Ön eleme modeli (varsayılan: cascade.json)")
+    parser.add_argument("--imgsz", type=int, help="Ön eleme çözünürlüğü")
+    parser.add_argument("--threshold", type=float, help="Ön eleme eşiği")
+    parser.add_argument("--iou", type=float, default=0.5)
+    parser.add_argument("--output", help="JSON rapor dosyası")
+    args = parser.parse_args()
+
+    from detector_pt import PyTorchDetector
+
+    config = CascadeConfig.from_file()
+    if args.prescreen:
+        config.model = args.prescreen
+    if args.imgsz:
+        config.imgsz = args.imgsz
+    if args.threshold is not None:
+        config.threshold = args.threshold
+    if not config.model:
+        parser.error("Ön eleme modeli yok: --prescreen verin veya cascade.json oluşturun")
+
+    detector = PyTorchDetector(args.model, cascade=False)
+    records = collect(detector, Prescreen(config, detector.device), args.data, args.iou)
+    report = evaluate(records, config.threshold)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"[CASCADE EVAL] Rapor yazıldı: {args.output}")
+    # Yapılandırılan eşik kritik tehdit kaçırıyorsa CI/kurulum kontrolü başarısız olsun
+    raise SystemExit(1 if report['critical_rejected'] else 0)
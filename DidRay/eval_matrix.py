@@ -0,0 +1,312 @@
+import argparse
+import itertools
+import json
+import multiprocessing as mp
+import os
+import time
+from datetime import datetime
+import cv2
+import numpy as np
+from danger_levels import DANGER_LEVELS, get_danger_level
+from eval_metrics import average_precision, iter_labeled_images, load_yolo_labels, match_detections
+
+IOU_THRESHOLDS = [round(0.5 + 0.05 * i, 2) for i in range(10)]
+# Pareto eksenlerinde "tehdit" geri çağırması bu seviyelerden hesaplanır
+THREAT_LEVELS = ('Çok Yüksek', 'Yüksek')
+
+
+def backend_name(model_path):
+    path = model_path.rstrip("/\\")
+    if path.endswith("_int8_openvino_model"):
+        return "openvino-int8"
+    if path.endswith("_openvino_model"):
+        return "openvino"
+    return {
+        '.pt': 'torch', '.torchscript': 'torchscript', '.onnx': 'onnx', '.engine': 'tensorrt',
+    }.get(os.path.splitext(path)[1], os.path.splitext(path)[1].lstrip(".") or "?")
+
+
+def export_variants(model_path, formats, calibration_data=None):
+    """.pt modelden karşılaştırma için onnx / int8 (OpenVINO) kopyaları üret; başarısız olan atlanır"""
+    from ultralytics import YOLO
+    paths = []
+    for fmt in formats:
+        try:
+            if fmt == "onnx":
+                paths.append(YOLO(model_path).export(format="onnx", dynamic=True))
+            elif fmt == "int8":
+                kwargs = {'data': calibration_data} if calibration_data else {}
+                paths.append(YOLO(model_path).export(format="openvino", int8=True, dynamic=True, **kwargs))
+            else:
+                print(f"[EVAL] Bilinmeyen export formatı: {fmt}")
+        except Exception as e:
+            print(f"[EVAL HATASI] {fmt} export başarısız, atlanıyor: {e}")
+    return [str(p) for p in paths]
+
+
+class TiledDetector:
+    """Görüntüyü örtüşen karolara bölüp her karoda çıkarım yapar, kutuları sınıf bazlı NMS ile birleştirir.
+
+    Üretimde yok; küçük nesnelerde karolamanın hız/doğruluk karşılığını ölçmek için.
+    """
+
+    def __init__(self, detector, grid=2, overlap=0.2, nms_iou=0.5):
+        self.detector = detector
+        self.grid = grid
+        self.overlap = overlap
+        self.nms_iou = nms_iou
+
+    def tiles(self, image):
+        height, width = image.shape[:2]
+        tile_w = int(width / (self.grid - (self.grid - 1) * self.overlap))
+        tile_h = int(height / (self.grid - (self.grid - 1) * self.overlap))
+        step_x = (width - tile_w) // max(1, self.grid - 1)
+        step_y = (height - tile_h) // max(1, self.grid - 1)
+        for row in range(self.grid):
+            for col in range(self.grid):
+                x, y = col * step_x, row * step_y
+                yield (x, y), image[y:y + tile_h, x:x + tile_w]
+
+    def detect(self, image):
+        offsets, crops = zip(*self.tiles(image))
+        merged = []
+        for (dx, dy), detections in zip(offsets, self.detector.detect_full_batch(list(crops))):
+            for det in detections:
+                x1, y1, x2, y2 = det['bbox']
+                merged.append(dict(det, bbox=(x1 + dx, y1 + dy, x2 + dx, y2 + dy)))
+        keep = []
+        for cls in {det['class'] for det in merged}:
+            group = [det for det in merged if det['class'] == cls]
+            boxes = [[x1, y1, x2 - x1, y2 - y1] for x1, y1, x2, y2 in (det['bbox'] for det in group)]
+            indices = cv2.dnn.NMSBoxes(boxes, [det['score'] for det in group], 0.0, self.nms_iou)
+            keep.extend(group[int(i)] for i in np.array(indices).flatten())
+        return keep
+
+
+def load_dataset(folder, names, limit=None):
+    """(görüntü yolu, etiketler) listesi; görüntüler bellekte tutulmaz, ölçüm sırasında diskten okunur"""
+    samples = []
+    for image_path, label_path in iter_labeled_images(folder):
+        img = cv2.imread(image_path)
+        if img is None:
+            continue
+        height, width = img.shape[:2]
+        samples.append((image_path, load_yolo_labels(label_path, width, height, names)))
+        if limit and len(samples) >= limit:
+            break
+    return samples
+
+
+def score_config(samples, detections, conf_thresholds):
+    """Tek yapılandırmanın çıktısından mAP50, mAP50-95 ve eşik başına sınıf/seviye geri çağırması"""
+    classes = sorted({cls for _, gt in samples for cls, _ in gt})
+    gt_counts = {cls: sum(1 for _, gt in samples for c, _ in gt if c == cls) for cls in classes}
+
+    ap_by_iou = {}
+    for threshold in IOU_THRESHOLDS:
+        scored = {cls: [] for cls in classes}
+        for (_, gt), dets in zip(samples, detections):
+            for score, correct, cls in match_detections(gt, dets, threshold)[1]:
+                if cls in scored:
+                    scored[cls].append((score, correct))
+        ap_by_iou[threshold] = {cls: average_precision(scored[cls], gt_counts[cls]) for cls in classes}
+    ap50 = ap_by_iou[0.5]
+    result = {
+        'map50': float(np.mean(list(ap50.values()))) if classes else None,
+        'map50_95': float(np.mean([np.mean(list(aps.values())) for aps in ap_by_iou.values()])) if classes else None,
+        'ap50': ap50,
+        'thresholds': {},
+    }
+
+    for conf in conf_thresholds:
+        found = {cls: 0 for cls in classes}
+        true_positive = predicted = 0
+        for (_, gt), dets in zip(samples, detections):
+            kept = [d for d in dets if d['score'] >= conf]
+            matched, scored = match_detections(gt, kept, 0.5)
+            for idx in matched:
+                found[gt[idx][0]] += 1
+            true_positive += len(matched)
+            predicted += len(kept)
+        level_totals = {level: 0 for level in DANGER_LEVELS}
+        level_found = {level: 0 for level in DANGER_LEVELS}
+        for cls in classes:
+            level_totals[get_danger_level(cls)] += gt_counts[cls]
+            level_found[get_danger_level(cls)] += found[cls]
+        threat_total = sum(level_totals[level] for level in THREAT_LEVELS)
+        result['thresholds'][str(conf)] = {
+            'recall': {cls: found[cls] / gt_counts[cls] for cls in classes},
+            'level_recall': {level: level_found[level] / level_totals[level]
+                             for level in DANGER_LEVELS if level_totals[level]},
+            'threat_recall': (sum(level_found[level] for level in THREAT_LEVELS) / threat_total
+                              if threat_total else None),
+            'precision': true_positive / predicted if predicted else None,
+        }
+    return result
+
+
+def run_config(config, data, limit, conf_thresholds):
+    """Tek yapılandırma (ayrı süreçte): modeli yükle, tüm veriyi çıkarımdan geçir, metrikleri hesapla"""
+    from benchmark import ResourceMonitor, latency_stats
+    from detector_pt import PyTorchDetector
+
+    roi = False
+    if config.get('roi'):
+        # roi.json'daki kırpma parametreleri, dosyada kapalı olsa bile bu yapılandırmada açık
+        from roi import RoiConfig
+        roi = RoiConfig.from_file()
+        roi.enabled = True
+
+    with ResourceMonitor() as load_monitor:
+        # Tüm adaylar ham çıktı üzerinden karşılaştırılır: cascade/CPU ayarı kapalı, çok düşük conf
+        detector = PyTorchDetector(config['model'], use_cache=False, imgsz=config['imgsz'],
+                                   cascade=False, roi=roi, cpu_tuning=False, conf=0.001)
+        if config['precision'] != "fp32":
+            from cpu_tuning import apply_channels_last
+            detector.precision = config['precision']
+            detector.channels_last = apply_channels_last(detector.model)
+    samples = load_dataset(data, detector.model.names, limit)
+    if not samples:
+        raise RuntimeError(f"Etiketli görüntü bulunamadı: {data}")
+    runner = TiledDetector(detector, config['tiles']) if config['tiles'] > 1 else detector
+    runner.detect(cv2.imread(samples[0][0]))  # ısınma
+
+    def timed_pass():
+        # Tepe RSS veri kümesinin boyutunu değil, arka ucun belleğini yansıtsın: bellekte tek görüntü
+        outputs, latencies = [], []
+        for image_path, _ in samples:
+            image = cv2.imread(image_path)
+            start = time.perf_counter()
+            outputs.append(runner.detect(image))
+            latencies.append(time.perf_counter() - start)
+        return outputs, latency_stats(latencies, wall_seconds=sum(latencies))
+
+    with ResourceMonitor() as monitor:
+        # Doğruluk: tüm adaylar tek geçişte, eşikler sonradan uygulanır
+        detections, scoring_latency = timed_pass()
+        # Hız: conf=0.001'deki NMS yükü gerçek çalışma noktasını temsil etmez; her eşik ayrı ölçülür
+        latency_by_conf = {}
+        for conf in conf_thresholds:
+            detector.conf = conf
+            latency_by_conf[str(conf)] = timed_pass()[1]
+    result = dict(config)
+    result['backend'] = backend_name(config['model'])
+    result['images'] = len(samples)
+    result['scoring_latency'] = scoring_latency
+    result['latency'] = latency_by_conf
+    result['fps'] = {conf: stats.get('fps') for conf, stats in latency_by_conf.items()}
+    result['load_seconds'] = round(load_monitor.wall_seconds, 3)
+    result['peak_rss_mb'] = monitor.summary()['peak_rss_mb']
+    result.update(score_config(samples, detections, conf_thresholds))
+    return result
+
+
+def pareto_front(rows, keys):
+    """keys eksenlerinin hepsinde büyük olan iyi; başka bir satır tarafından domine edilmeyenler"""
+    def value(row, key):
+        return row[key] if row[key] is not None else -1.0
+
+    front = []
+    for row in rows:
+        dominated = any(
+            all(value(other, k) >= value(row, k) for k in keys) and any(value(other, k) > value(row, k) for k in keys)
+            for other in rows if other is not row)
+        if not dominated:
+            front.append(row)
+    return front
+
+
+def build_table(results):
+    rows = []
+    for result in results:
+        for conf, metrics in result['thresholds'].items():
+            rows.append({
+                'model': os.path.basename(result['model'].rstrip("/\\")),
+                'backend': result['backend'],
+                'imgsz': result['imgsz'],
+                'tiles': result['tiles'],
+                'roi': result.get('roi', False),
+                'precision_mode': result['precision'],
+                'conf': float(conf),
+                'fps': result['fps'][conf],
+                'map50': result['map50'],
+                'threat_recall': metrics['threat_recall'],
+                'precision': metrics['precision'],
+                'peak_rss_mb': result['peak_rss_mb'],
+            })
+    front = pareto_front(rows, ('fps', 'threat_recall', 'precision'))
+    for row in rows:
+        row['pareto'] = row in front
+    return rows
+
+
+def print_table(rows):
+    def fmt(value, pattern="{:.3f}"):
+        return "-" if value is None else pattern.format(value)
+
+    print(f"[EVAL] {'':1} {'model':<22} {'backend':<14} {'imgsz':>5} {'tile':>4} {'roi':>3} {'prec':>5} {'conf':>5} "
+          f"{'fps':>7} {'mAP50':>6} {'tehdit R':>8} {'P':>6} {'RSS MB':>7}")
+    for row in sorted(rows, key=lambda r: (not r['pareto'], -(r['fps'] or 0))):
+        print(f"[EVAL] {'*' if row['pareto'] else ' '} {row['model'][:22]:<22} {row['backend']:<14} "
+              f"{row['imgsz']:>5} {row['tiles']:>4} {'on' if row['roi'] else 'off':>3} {row['precision_mode']:>5} "
+              f"{row['conf']:>5} "
+              f"{fmt(row['fps'], '{:.1f}'):>7} {fmt(row['map50']):>6} {fmt(row['threat_recall']):>8} "
+              f"{fmt(row['precision']):>6} {fmt(row['peak_rss_mb'], '{:.0f}'):>7}")
+    print("[EVAL] * = Pareto cephesi (fps, tehdit geri çağırması, kesinlik)")
+
+
+def parse_list(cast):
+    return lambda text: [cast(v) for v in text.split(",") if v]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Etiketli veri üzerinde dedektör ayarlarının doğruluk/hız matrisi")
+    parser.add_argument("--data", required=True, help="YOLO formatında etiketli klasör (images/ + labels/)")
+    parser.add_argument("--models", type=parse_list(str), help="Model yolları (.pt, .torchscript, .onnx, *_openvino_model)")
+    parser.add_argument("--export", type=parse_list(str), default=[], help="İlk .pt modelden üret: onnx,int8")
+    parser.add_argument("--calibration-data", help="INT8 kalibrasyonu için ultralytics veri yaml'ı")
+    parser.add_argument("--sizes", type=parse_list(int), default=[640])
+    parser.add_argument("--tiles", type=parse_list(int), default=[1], help="Karo ızgarası (1 = karolama yok, 2 = 2x2)")
+    parser.add_argument("--roi", type=parse_list(str), default=["off"], help="Bagaj bölgesi kırpma: off,on")
+    parser.add_argument("--precision", type=parse_list(str), default=["fp32"], help="fp32,bf16 (sadece torch)")
+    parser.add_argument("--conf", type=parse_list(float), default=[0.1, 0.25, 0.4])
+    parser.add_argument("--limit", type=int, help="En fazla bu kadar görüntü")
+    parser.add_argument("--no-isolate", action="store_true", help="Yapılandırmaları aynı süreçte çalıştır")
+    parser.add_argument("--output", default=None, help="JSON çıktı (varsayılan: benchmarks/eval_<zaman>.json)")
+    args = parser.parse_args()
+
+    from utils import get_model_path
+    models = args.models or [get_model_path()]
+    pt_models = [m for m in models if m.endswith(".pt")]
+    if args.export and pt_models:
+        models += export_variants(pt_models[0], args.export, args.calibration_data)
+
+    configs = []
+    roi_modes = [mode == "on" for mode in args.roi]
+    for model, imgsz, tiles, roi, precision in itertools.product(models, args.sizes, args.tiles, roi_modes,
+                                                                 args.precision):
+        if precision != "fp32" and backend_name(model) not in ("torch", "torchscript"):
+            continue
+        configs.append({'model': model, 'imgsz': imgsz, 'tiles': tiles, 'roi': roi, 'precision': precision})
+    print(f"[EVAL] {len(configs)} yapılandırma, eşikler: {args.conf}")
+
+    results = []
+    for config in configs:
+        print(f"[EVAL] {config}")
+        try:
+            if args.no_isolate:
+                results.append(run_config(config, args.data, args.limit, args.conf))
+            else:
+                # Her yapılandırma yeni süreçte: tepe bellek ölçümü öncekilerden etkilenmez
+                with mp.get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+                    results.append(pool.apply(run_config, (config, args.data, args.limit, args.conf)))
+        except Exception as e:
+            print(f"[EVAL HATASI] {config}: {e}")
+
+    rows = build_table(results)
+    print_table(rows)
+    output = args.output or os.path.join("benchmarks", f"eval_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({'data': args.data, 'results': results, 'table': rows}, f, indent=2, ensure_ascii=False)
+    print(f"[EVAL] Sonuçlar yazıldı: {output}")
@@ -0,0 +1,96 @@
+import os
+from utils import IMAGE_EXTENSIONS
+
+
+def iter_labeled_images(folder):
+    """YOLO formatındaki etiketli klasörden (görüntü, etiket) yollarını üret.
+
+    Desteklenen düzenler: images/ + labels/ alt klasörleri veya görüntü ile aynı adlı .txt.
+    Etiketi olmayan görüntü "temiz" (nesne yok) sayılır.
+    """
+    images_dir = os.path.join(folder, "images")
+    labels_dir = os.path.join(folder, "labels")
+    root = images_dir if os.path.isdir(images_dir) else folder
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            image_path = os.path.join(dirpath, name)
+            stem = os.path.splitext(name)[0] + ".txt"
+            if root == images_dir:
+                label_path = os.path.join(labels_dir, os.path.relpath(dirpath, images_dir), stem)
+            else:
+                label_path = os.path.join(dirpath, stem)
+            yield image_path, label_path
+
+
+def load_yolo_labels(label_path, width, height, names=None):
+    """'sınıf cx cy w h' (normalize) satırlarını [(sınıf, (x1, y1, x2, y2)), ...] olarak oku"""
+    objects = []
+    if not os.path.exists(label_path):
+        return objects
+    with open(label_path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 5:
+                continue
+            cls_id = int(float(parts[0]))
+            cx, cy, w, h = (float(v) for v in parts[1:5])
+            box = ((cx - w / 2) * width, (cy - h / 2) * height, (cx + w / 2) * width, (cy + h / 2) * height)
+            objects.append((names[cls_id] if names else cls_id, box))
+    return objects
+
+
+def iou(a, b):
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, ix2 - ix1) * max(0.0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def average_precision(scored, ground_truth_count):
+    """Tek sınıf için AP: [(skor, doğru_mu), ...] listesinden tüm noktalı interpolasyonla (VOC/COCO)"""
+    if ground_truth_count == 0:
+        return None
+    if not scored:
+        return 0.0
+    scored = sorted(scored, key=lambda item: -item[0])
+    tp = fp = 0
+    recalls, precisions = [], []
+    for _, correct in scored:
+        tp += correct
+        fp += not correct
+        recalls.append(tp / ground_truth_count)
+        precisions.append(tp / (tp + fp))
+    # Kesinlik zarfı: her geri çağırma düzeyinde sağdaki en yüksek kesinlik
+    for i in range(len(precisions) - 2, -1, -1):
+        precisions[i] = max(precisions[i], precisions[i + 1])
+    ap, previous = 0.0, 0.0
+    for recall, precision in zip(recalls, precisions):
+        ap += (recall - previous) * precision
+        previous = recall
+    return ap
+
+
+def match_detections(ground_truth, detections, iou_threshold=0.5):
+    """Sınıf bazlı açgözlü eşleştirme (yüksek skor önce).
+
+    ground_truth: [(sınıf, kutu)], detections: tespit sözlükleri ('class', 'bbox', 'score').
+    Döner: (eşleşen gt indeksleri kümesi, [(skor, doğru_mu, sınıf), ...] her tespit için)
+    """
+    matched = set()
+    scored = []
+    for det in sorted(detections, key=lambda d: -d['score']):
+        best, best_iou = None, iou_threshold
+        for idx, (cls, box) in enumerate(ground_truth):
+            if idx in matched or cls != det['class']:
+                continue
+            overlap = iou(box, det['bbox'])
+            if overlap >= best_iou:
+                best, best_iou = idx, overlap
+        if best is not None:
+            matched.add(best)
+        scored.append((det['score'], best is not None, det['class']))
+    return matched, scored
+
@@ -0,0 +1,191 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+import zipfile
+from PyQt5.QtCore import QThread, pyqtSignal
+
+# Dışa aktarılan kolonlar (fetch_all_detections ile aynı sıra)
+# source / frame_index / media_msec: video kayıtlarında olayın orijinal dosyadaki yeri
+EXPORT_COLUMNS = ["id", "timestamp", "classes", "confidences", "mode", "image_path", "operator", "role",
+                  "source", "frame_index", "media_msec"]
+
+EXPORT_CHUNK_SIZE = 1000
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class CsvExportWriter:
+    def __init__(self, filename, db=None, compress=False):
+        if compress:
+            self.file = gzip.open(filename, mode='wt', newline='', encoding='utf-8')
+        else:
+            self.file = open(filename, mode='w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(EXPORT_COLUMNS)
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class JsonLinesExportWriter:
+    def __init__(self, filename, db=None):
+        self.file = open(filename, mode='w', encoding='utf-8')
+
+    def write_rows(self, rows):
+        self.file.writelines(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n" for row in rows
+        )
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetExportWriter:
+    def __init__(self, filename, db=None):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet dışa aktarımı için 'pyarrow' paketi gerekli")
+        self.pa = pa
+        self.schema = pa.schema([(col, pa.string()) for col in EXPORT_COLUMNS])
+        # Her chunk ayrı bir row group olarak yazılır, bellek sabit kalır
+        self.writer = pq.ParquetWriter(filename, self.schema, compression='snappy')
+
+    def write_rows(self, rows):
+        columns = list(zip(*rows))
+        # Şema metin; sayısal kolonlar (id, frame_index, media_msec) metne çevrilir
+        arrays = [self.pa.array([None if v is None else str(v) for v in col], type=self.pa.string())
+                  for col in columns]
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class AnnotatedZipExportWriter:
+    """Kayıtları, overlay'i talep anında çizilmiş görüntüleriyle birlikte zip'e yaz"""
+
+    def __init__(self, filename, db=None):
+        import cv2
+        from overlay import get_overlay_renderer
+        self.cv2 = cv2
+        self.db = db
+        self.renderer = get_overlay_renderer()
+        self.zip = zipfile.ZipFile(filename, mode='w', compression=zipfile.ZIP_STORED)
+        # Metadata diske akıtılır, sonunda zip'e eklenir (bellek sabit)
+        self.metadata = tempfile.TemporaryFile(mode='w+', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.metadata)
+        self.writer.writerow(EXPORT_COLUMNS + ["annotated_image"])
+
+    def write_rows(self, rows):
+        for row in rows:
+            name = ''
+            # Her kayıt bir kez okunur; önbelleğe almak sadece belleği doldururdu
+            img = self.renderer.render_record(self.db, row[0], "full", cache=False)
+            if img is not None:
+                ok, buf = self.cv2.imencode(".jpg", img, [self.cv2.IMWRITE_JPEG_QUALITY, 90])
+                if ok:
+                    name = f"images/{row[0]}.jpg"
+                    self.zip.writestr(name, buf.tobytes())
+            self.writer.writerow(list(row) + [name])
+
+    def close(self):
+        self.metadata.seek(0)
+        with self.zip.open("detections.csv", mode='w') as f:
+            for line in self.metadata:
+                f.write(line.encode('utf-8'))
+        self.metadata.close()
+        self.zip.close()
+
+
+EXPORT_FORMATS = {
+    'csv': CsvExportWriter,
+    'csv.gz': lambda filename, db=None: CsvExportWriter(filename, compress=True),
+    'jsonl': JsonLinesExportWriter,
+    'parquet': ParquetExportWriter,
+    'zip': AnnotatedZipExportWriter,
+}
+
+
+def detect_export_format(filename):
+    """Dosya uzantısından dışa aktarma formatını belirle"""
+    name = filename.lower()
+    if name.endswith('.csv.gz') or name.endswith('.gz'):
+        return 'csv.gz'
+    if name.endswith('.jsonl') or name.endswith('.ndjson'):
+        return 'jsonl'
+    if name.endswith('.parquet'):
+        return 'parquet'
+    if name.endswith('.zip'):
+        return 'zip'
+    return 'csv'
+
+
+def export_detections(db, filename, fmt=None, filters=None, chunk_size=EXPORT_CHUNK_SIZE,
+                      progress_callback=None, is_cancelled=None):
+    """Tespit kayıtlarını chunk'lar halinde akıtarak dosyaya yaz, yazılan satır sayısını döndür"""
+    fmt = fmt or detect_export_format(filename)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Desteklenmeyen dışa aktarma formatı: {fmt}")
+
+    total = db.count_detections(filters) if progress_callback else 0
+    writer = EXPORT_FORMATS[fmt](filename, db)
+    written = 0
+    try:
+        for rows in db.iter_detections(filters, chunk_size=chunk_size):
+            if is_cancelled and is_cancelled():
+                raise ExportCancelled()
+            writer.write_rows(rows)
+            written += len(rows)
+            if progress_callback:
+                progress_callback(written, total)
+    except BaseException:
+        writer.close()
+        # Yarım kalan dosyayı bırakma
+        if os.path.exists(filename):
+            os.remove(filename)
+        raise
+    writer.close()
+    return written
+
+
+class ExportThread(QThread):
+    progress = pyqtSignal(int, int)
+    export_finished = pyqtSignal(int, str)
+    export_failed = pyqtSignal(str)
+    export_cancelled = pyqtSignal()
+
+    def __init__(self, db, filename, fmt=None, filters=None):
+        super().__init__()
+        self.db = db
+        self.filename = filename
+        self.fmt = fmt
+        self.filters = filters
+        self.cancel_requested = False
+
+    def cancel(self):
+        self.cancel_requested = True
+
+    def run(self):
+        try:
+            count = export_detections(
+                self.db, self.filename,
+                fmt=self.fmt,
+                filters=self.filters,
+                progress_callback=self.progress.emit,
+                is_cancelled=lambda: self.cancel_requested
+            )
+            self.export_finished.emit(count, self.filename)
+        except ExportCancelled:
+            self.export_cancelled.emit()
+        except Exception as e:
+            print(f"[EXPORT HATASI] {e}")
+            self.export_failed.emit(str(e))
@@ -0,0 +1,231 @@
+import argparse
+import json
+import os
+import time
+from collections import Counter
+import numpy as np
+
+# Kare kaydı: tespitleri detections dosyasında [first, first + count) aralığındadır
+FRAME_DTYPE = np.dtype([
+    ('frame_index', '<i8'),
+    ('pos_msec', '<f8'),
+    ('wall_time', '<f8'),
+    ('first', '<i8'),
+    ('count', '<i4'),
+])
+DETECTION_DTYPE = np.dtype([
+    ('frame_index', '<i8'),
+    ('x1', '<i4'), ('y1', '<i4'), ('x2', '<i4'), ('y2', '<i4'),
+    ('score', '<f4'),
+    ('class_id', '<i2'),
+])
+FORMAT_VERSION = 1
+
+
+def log_paths(base):
+    return base + ".json", base + ".frames", base + ".dets"
+
+
+class FrameLogWriter:
+    """Sadece ekleme yapılan kare başına tespit kaydı.
+
+    <base>.json (sınıf adları, kaynak, model), <base>.frames ve <base>.dets (sabit boyutlu ikili
+    kayıtlar) yazılır. Tespitler kareden önce yazılır; yarım kalan dosya okunurken kırpılır.
+    """
+
+    def __init__(self, base, class_names, source=None, model=None, flush_every=30):
+        self.base = base
+        if not isinstance(class_names, dict):
+            class_names = dict(enumerate(class_names))
+        self.class_ids = {name: idx for idx, name in class_names.items()}
+        meta_path, frames_path, dets_path = log_paths(base)
+        os.makedirs(os.path.dirname(os.path.abspath(base)), exist_ok=True)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({
+                'version': FORMAT_VERSION,
+                'names': {str(idx): name for idx, name in class_names.items()},
+                'source': str(source) if source is not None else None,
+                'model': model,
+                'created': time.time(),
+            }, f, ensure_ascii=False, indent=2)
+        self.frames_file = open(frames_path, "wb")
+        self.dets_file = open(dets_path, "wb")
+        self.next_detection = 0
+        self.flush_every = flush_every
+        self.pending = 0
+        self.frames = 0
+
+    def append(self, frame_index, pos_msec, detections):
+        count = len(detections)
+        if count:
+            records = np.empty(count, dtype=DETECTION_DTYPE)
+            for i, det in enumerate(detections):
+                x1, y1, x2, y2 = det['bbox']
+                records[i] = (frame_index, x1, y1, x2, y2, det['score'], self.class_ids.get(det['class'], -1))
+            self.dets_file.write(records.tobytes())
+        frame = np.array([(frame_index, pos_msec, time.time(), self.next_detection, count)], dtype=FRAME_DTYPE)
+        self.frames_file.write(frame.tobytes())
+        self.next_detection += count
+        self.frames += 1
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self.dets_file.flush()
+        self.frames_file.flush()
+        self.pending = 0
+
+    def close(self):
+        if self.frames_file.closed:
+            return
+        self.flush()
+        self.dets_file.close()
+        self.frames_file.close()
+        print(f"[KARE KAYDI] {self.frames} kare yazıldı: {self.base}")
+
+
+def _memmap(path, dtype):
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    count = size // dtype.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+
+class FrameLog:
+    """Kare kaydını kopyasız okur: frames ve detections salt okunur NumPy memmap dizileridir"""
+
+    def __init__(self, base):
+        meta_path, frames_path, dets_path = log_paths(base)
+        with open(meta_path, encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.names = {int(idx): name for idx, name in self.meta['names'].items()}
+        self.detections = _memmap(dets_path, DETECTION_DTYPE)
+        frames = _memmap(frames_path, FRAME_DTYPE)
+        # Yazım sırasında kesilen kayıt: tespitleri tam yazılmamış son kareler atılır
+        complete = len(frames)
+        while complete and frames['first'][complete - 1] + frames['count'][complete - 1] > len(self.detections):
+            complete -= 1
+        self.frames = frames[:complete]
+
+    def __len__(self):
+        return len(self.frames)
+
+    def frame_detections(self, i):
+        """i. kare kaydının tespitleri detector.detect() formatında"""
+        first, count = int(self.frames['first'][i]), int(self.frames['count'][i])
+        return [{
+            'bbox': (int(d['x1']), int(d['y1']), int(d['x2']), int(d['y2'])),
+            'score': float(d['score']),
+            'class': self.names.get(int(d['class_id']), '?'),
+        } for d in self.detections[first:first + count]]
+
+    def replay(self):
+        """(kare_no, medya_zamanı_ms, tespitler) üretir; çıkarım yapılmaz"""
+        for i in range(len(self.frames)):
+            yield int(self.frames['frame_index'][i]), float(self.frames['pos_msec'][i]), self.frame_detections(i)
+
+    def class_counts(self):
+        counts = np.bincount(self.detections['class_id'].astype(np.int64) + 1)
+        return {self.names.get(idx - 1, '?'): int(n) for idx, n in enumerate(counts) if n}
+
+
+def diff_logs(a, b, iou_threshold=0.5):
+    """İki kaydı (ör. iki model sürümü) kare numarasına göre eşleştirip sınıf bazlı fark çıkar"""
+    from eval_metrics import match_detections
+
+    index_b = {int(idx): i for i, idx in enumerate(b.frames['frame_index'])}
+    matched, only_a, only_b = Counter(), Counter(), Counter()
+    changed_frames = []
+    for i, frame_index in enumerate(a.frames['frame_index']):
+        j = index_b.get(int(frame_index))
+        if j is None:
+            continue
+        dets_a, dets_b = a.frame_detections(i), b.frame_detections(j)
+        ground = [(d['class'], d['bbox']) for d in dets_a]
+        hits, scored = match_detections(ground, dets_b, iou_threshold)
+        for idx, (cls, _) in enumerate(ground):
+            (matched if idx in hits else only_a)[cls] += 1
+        for _, correct, cls in scored:
+            if not correct:
+                only_b[cls] += 1
+        if len(hits) != len(dets_a) or len(hits) != len(dets_b):
+            changed_frames.append(int(frame_index))
+    return {
+        'frames_compared': sum(1 for idx in a.frames['frame_index'] if int(idx) in index_b),
+        'changed_frames': changed_frames,
+        'matched': dict(matched),
+        'only_a': dict(only_a),
+        'only_b': dict(only_b),
+    }
+
+
+def session_log_path(directory, source):
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    name = os.path.splitext(os.path.basename(str(source)))[0] or "camera"
+    return os.path.join(directory, f"{stamp}_{name}")
+
+
+def _render_replay(log, video_path, output_path):
+    import cv2
+    from overlay import draw_detections
+
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    writer = None
+    position = 0
+    for frame_index, _, detections in log.replay():
+        frame = None
+        while position <= frame_index:
+            ret, frame = cap.read()
+            position += 1
+            if not ret:
+                frame = None
+                break
+        if frame is None:
+            break
+        if writer is None:
+            height, width = frame.shape[:2]
+            writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+        writer.write(draw_detections(frame, detections))
+    cap.release()
+    if writer is not None:
+        writer.release()
+    print(f"[KARE KAYDI] Tekrar oynatma yazıldı: {output_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kare başına tespit kaydını incele, tekrar oynat veya karşılaştır")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info = sub.add_parser("info")
+    info.add_argument("log", help="Kayıt yolu (uzantısız)")
+    replay = sub.add_parser("replay", help="Kayıttaki kutuları videonun üzerine çiz (çıkarım yapmadan)")
+    replay.add_argument("log")
+    replay.add_argument("--video", required=True)
+    replay.add_argument("--output", default="replay.avi")
+    diff = sub.add_parser("diff", help="İki kaydı kare kare karşılaştır")
+    diff.add_argument("a")
+    diff.add_argument("b")
+    diff.add_argument("--iou", type=float, default=0.5)
+    diff.add_argument("--output", help="JSON rapor dosyası")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        log = FrameLog(args.log)
+        print(f"[KARE KAYDI] {len(log)} kare, {len(log.detections)} tespit, model: {log.meta.get('model')}, "
+              f"kaynak: {log.meta.get('source')}")
+        for cls, count in sorted(log.class_counts().items(), key=lambda item: -item[1]):
+            print(f"[KARE KAYDI]   {cls}: {count}")
+    elif args.command == "replay":
+        _render_replay(FrameLog(args.log), args.video, args.output)
+    else:
+        report = diff_logs(FrameLog(args.a), FrameLog(args.b), args.iou)
+        print(f"[KARE KAYDI] {report['frames_compared']} kare karşılaştırıldı, "
+              f"{len(report['changed_frames'])} karede fark var")
+        for cls in sorted(set(report['matched']) | set(report['only_a']) | set(report['only_b'])):
+            print(f"[KARE KAYDI]   {cls}: ortak {report['matched'].get(cls, 0)}, "
+                  f"sadece A {report['only_a'].get(cls, 0)}, sadece B {report['only_b'].get(cls, 0)}")
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,203 @@
+import multiprocessing as mp
+import queue
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+
+# Alt süreç 'spawn' ile başlatılır: Qt/torch thread'leri varken fork güvenli değil
+_ctx = mp.get_context("spawn")
+
+
+def attach_shared_memory(name):
+    """Var olan bloğa bağlan (bloğun sahibi ve silen taraf ana süreçtir)"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        # Eski sürümler: spawn ile başlayan alt süreç ana sürecin resource tracker'ını paylaşır,
+        # kayıt ana süreçteki unlink ile birlikte silinir
+        return shared_memory.SharedMemory(name=name)
+
+
+class FrameRing:
+    """Sabit boyutlu kare slotlarından oluşan shared_memory halka tamponu.
+
+    Kare pikselleri süreçler arasında kopyalanmaz/pickle edilmez; kuyruklarda
+    sadece slot numarası ve küçük metadata dolaşır.
+    """
+
+    def __init__(self, shm, slots, shape, owner):
+        self.shm = shm
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.owner = owner
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, slots, shape):
+        size = slots * int(np.prod(shape))
+        return cls(shared_memory.SharedMemory(create=True, size=size), slots, shape, owner=True)
+
+    @classmethod
+    def attach(cls, name, slots, shape):
+        return cls(attach_shared_memory(name), slots, shape, owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        # ndarray görünümü bırakılmadan buffer kapatılamaz
+        self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # çağıran hâlâ bir kare görünümü tutuyor; eşleme onunla birlikte bırakılır
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def capture_worker(source, shm_name, slots, shape, free_slots, ready, stop_event):
+    """Alt süreç: kareleri decode edip boş slotlara yazar, slot numarasını ready kuyruğuna koyar.
+
+    Geri basınç: boş slot yoksa (tüketici geride) bekler. Bitişte ('eof',) gönderilir.
+    """
+    ring = FrameRing.attach(shm_name, slots, shape)
+    cap = cv2.VideoCapture(source)
+    index = 0
+    try:
+        if not cap.isOpened():
+            ready.put(('error', f"Video açılamadı: {source}"))
+            return
+        height, width = shape[:2]
+        while not stop_event.is_set():
+            try:
+                slot = free_slots.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            target = ring.frames[slot]
+            # Slot boyutu uyuyorsa decode doğrudan paylaşılan belleğe yapılır
+            ret, frame = cap.read(target)
+            if not ret:
+                break
+            if frame is not target and frame.shape[:2] != (height, width):
+                frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+            if frame is not target:
+                np.copyto(target, frame)
+            ready.put(('frame', slot, index, cap.get(cv2.CAP_PROP_POS_MSEC)))
+            index += 1
+    except Exception as e:
+        ready.put(('error', str(e)))
+    finally:
+        ready.put(('eof',))
+        cap.release()
+        ring.close()
+
+
+class ProcessCapture:
+    """cv2.VideoCapture yerine kullanılır: decode ayrı süreçte, kareler shared_memory üzerinden gelir.
+
+    read() dönen kare bir slot görünümüdür ve bir sonraki read()/release() çağrısına kadar
+    geçerlidir (döngü turu boyunca kopyasız kullanılır).
+    """
+
+    def __init__(self, source, slots=4, startup_timeout=15.0):
+        self.source = source
+        self.slots = slots
+        self.startup_timeout = startup_timeout
+        self.opened = False
+        self.process = None
+        self.ring = None
+        self.current_slot = None
+        self.last_meta = None
+        self.fps = 0.0
+
+        # Kare boyutu paylaşılan belleği ayırmak için önceden okunur
+        probe = cv2.VideoCapture(source)
+        if not probe.isOpened():
+            print(f"[CAPTURE HATASI] Video açılamadı: {source}")
+            return
+        width = int(probe.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(probe.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = probe.get(cv2.CAP_PROP_FPS)
+        probe.release()
+        if width <= 0 or height <= 0:
+            print(f"[CAPTURE HATASI] Kare boyutu okunamadı: {source}")
+            return
+
+        self.ring = FrameRing.create(slots, (height, width, 3))
+        self.free_slots = _ctx.Queue()
+        self.ready = _ctx.Queue()
+        self.stop_event = _ctx.Event()
+        for slot in range(slots):
+            self.free_slots.put(slot)
+        self.process = _ctx.Process(
+            target=capture_worker, name="didray-capture", daemon=True,
+            args=(source, self.ring.name, slots, self.ring.shape, self.free_slots, self.ready, self.stop_event),
+        )
+        try:
+            self.process.start()
+        except Exception:
+            self.ring.close()
+            self.process = None
+            raise
+        self.opened = True
+        print(f"[CAPTURE] Decode süreci başladı (pid {self.process.pid}, {slots} slot, {width}x{height})")
+
+    def isOpened(self):
+        return self.opened
+
+    def _release_current(self):
+        if self.current_slot is not None:
+            self.free_slots.put(self.current_slot)
+            self.current_slot = None
+
+    def read(self):
+        """(True, kare) veya akış bittiyse (False, None)"""
+        self._release_current()
+        if not self.opened:
+            return False, None
+        timeout = self.startup_timeout if self.last_meta is None else 5.0
+        try:
+            message = self.ready.get(timeout=timeout)
+        except queue.Empty:
+            print("[CAPTURE HATASI] Decode süreci yanıt vermiyor")
+            self.opened = False
+            return False, None
+        if message[0] == 'frame':
+            _, slot, index, pos_msec = message
+            self.current_slot = slot
+            self.last_meta = {'frame_index': index, 'pos_msec': pos_msec}
+            return True, self.ring.frames[slot]
+        if message[0] == 'error':
+            print(f"[CAPTURE HATASI] {message[1]}")
+        self.opened = False
+        return False, None
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_POS_MSEC and self.last_meta:
+            return self.last_meta['pos_msec']
+        if prop == cv2.CAP_PROP_POS_FRAMES and self.last_meta:
+            return self.last_meta['frame_index'] + 1
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return 0.0
+
+    def release(self):
+        """Kapanış: durdurma sinyali, süreci bekle (gerekirse sonlandır), belleği serbest bırak"""
+        self.opened = False
+        if self.process is None:
+            return
+        self.current_slot = None
+        self.stop_event.set()
+        self.process.join(timeout=3.0)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=1.0)
+        for q in (self.free_slots, self.ready):
+            q.cancel_join_thread()
+            q.close()
+        self.ring.close()
+        self.process = None
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+from tracing import span
+
+THUMBS_DIR = "thumbs"
+
+
+class ImageStore:
+    """İçerik hash'i ile adlandırılan, alt dizinlere bölünmüş kanıt görüntüsü deposu.
+
+    results/ab/cd/<hash>.jpg       -> tam çözünürlük
+    results/thumbs/ab/cd/<hash>.jpg -> yazma anında üretilen küçük önizleme
+    """
+
+    def __init__(self, root="results", image_format=".jpg", quality=90, thumb_max_side=256, thumb_quality=75):
+        self.root = root
+        # Ham kareler bu format/kalitede saklanır (.jpg, .png, .webp)
+        self.image_format = image_format
+        self.quality = quality
+        self.thumb_max_side = thumb_max_side
+        self.thumb_quality = thumb_quality
+        self._loader = ThreadPoolExecutor(max_workers=2, thread_name_prefix="image-load")
+
+    @classmethod
+    def from_file(cls, path="storage.json"):
+        """JSON dosyasından depo ayarlarını yükle, dosya yoksa varsayılanları kullan"""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding='utf-8') as f:
+            return cls(**json.load(f))
+
+    def encode_params(self, ext, quality):
+        if ext in (".jpg", ".jpeg"):
+            return [cv2.IMWRITE_JPEG_QUALITY, quality]
+        if ext == ".webp":
+            return [cv2.IMWRITE_WEBP_QUALITY, quality]
+        if ext == ".png":
+            # PNG kayıpsız; kaliteyi sıkıştırma seviyesine çevir (0-9)
+            return [cv2.IMWRITE_PNG_COMPRESSION, max(0, min(9, (100 - quality) // 10))]
+        return []
+
+    # Aynı pikseller aynı anahtarı üretir (tekrarlanan kareler tek dosya)
+    @staticmethod
+    def content_hash(img):
+        h = hashlib.blake2b(digest_size=16)
+        h.update(str(img.shape).encode())
+        h.update(img.tobytes())
+        return h.hexdigest()
+
+    def _sharded(self, base, digest, ext):
+        return os.path.join(base, digest[:2], digest[2:4], digest + ext)
+
+    def full_path(self, digest, ext=None):
+        return self._sharded(self.root, digest, ext or self.image_format)
+
+    def is_managed(self, image_path):
+        """Yol bu depoya ait, hash ile adlandırılmış bir dosya mı?"""
+        try:
+            rel = os.path.relpath(image_path, self.root)
+        except ValueError:
+            return False
+        parts = rel.split(os.sep)
+        return len(parts) == 3 and parts[0] != THUMBS_DIR and parts[2].startswith(parts[0] + parts[1])
+
+    def thumbnail_path(self, image_path):
+        if self.is_managed(image_path):
+            name = os.path.basename(image_path)
+            return self._sharded(os.path.join(self.root, THUMBS_DIR), os.path.splitext(name)[0], ".jpg")
+        # Eski düz isimli dosyalar: yol hash'i ile ayrı bir klasörde tembel üretilir
+        digest = hashlib.blake2b(image_path.encode('utf-8'), digest_size=16).hexdigest()
+        return os.path.join(self.root, THUMBS_DIR, "legacy", digest + ".jpg")
+
+    def _write_atomic(self, path, img, params):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        ext = os.path.splitext(path)[1]
+        ok, buf = cv2.imencode(ext, img, params)
+        if not ok:
+            raise IOError(f"Görüntü kodlanamadı: {path}")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(buf.tobytes())
+        os.replace(tmp_path, path)
+
+    def make_thumbnail(self, img):
+        height, width = img.shape[:2]
+        scale = self.thumb_max_side / max(height, width)
+        if scale >= 1:
+            return img
+        return cv2.resize(img, (max(1, int(width * scale)), max(1, int(height * scale))),
+                          interpolation=cv2.INTER_AREA)
+
+    def put(self, img):
+        """Görüntüyü depola ve DB'ye yazılacak yolu döndür (aynı içerik tekrar yazılmaz)"""
+        with span("encode", cat="io"):
+            digest = self.content_hash(img)
+            path = self.full_path(digest)
+            if not os.path.exists(path):
+                self._write_atomic(path, img, self.encode_params(self.image_format, self.quality))
+                self._write_atomic(self.thumbnail_path(path), self.make_thumbnail(img),
+                                   self.encode_params(".jpg", self.thumb_quality))
+            return path
+
+    def load(self, image_path, variant="thumb"):
+        """variant='thumb' küçük önizleme, 'full' tam çözünürlük döndürür (yoksa None)"""
+        thumb_path = self.thumbnail_path(image_path)
+        if variant == "full":
+            if os.path.exists(image_path):
+                return cv2.imread(image_path)
+            # Saklama politikası tam görüntüyü silmiş olabilir
+            variant = "thumb"
+        if os.path.exists(thumb_path):
+            return cv2.imread(thumb_path)
+        if not os.path.exists(image_path):
+            return None
+        # Önizlemesi olmayan eski dosya: küçültülmüş decode ile üret ve sakla
+        img = cv2.imread(image_path, cv2.IMREAD_REDUCED_COLOR_4)
+        if img is None:
+            return None
+        thumb = self.make_thumbnail(img)
+        self._write_atomic(thumb_path, thumb, self.encode_params(".jpg", self.thumb_quality))
+        return thumb
+
+    def load_async(self, image_path, variant="thumb"):
+        return self._loader.submit(self.load, image_path, variant)
+
+    def remove_full(self, image_path):
+        """Sadece tam çözünürlüğü sil, önizleme kalır"""
+        if image_path and os.path.exists(image_path):
+            os.remove(image_path)
+
+    def remove(self, image_path):
+        """Tam görüntü ve önizlemeyi birlikte sil"""
+        self.remove_full(image_path)
+        if image_path:
+            thumb_path = self.thumbnail_path(image_path)
+            if os.path.exists(thumb_path):
+                os.remove(thumb_path)
+
+
+_default_store = None
+
+
+def get_image_store():
+    """Uygulama genelinde paylaşılan ImageStore örneği"""
+    global _default_store
+    if _default_store is None:
+        _default_store = ImageStore.from_file()
+    return _default_store
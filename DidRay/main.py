@@ -1,18 +1,26 @@
 import sys
 import os
-import cv2
+from startup import StartupTimer, warm_up_detector
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, 
     QFileDialog, QLineEdit, QDialog, QMessageBox, QTableWidget, QTableWidgetItem,
-    QFrame, QGridLayout, QProgressBar, QGroupBox, QComboBox
+    QFrame, QGridLayout, QProgressBar, QGroupBox, QComboBox, QProgressDialog, QListWidget, QListWidgetItem
 )
-from PyQt5.QtGui import QPixmap, QImage, QFont, QIcon, QPalette, QColor
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPixmap, QImage, QFont, QIcon, QPalette, QColor, QPainter
+from PyQt5.QtCore import Qt, QTimer, QRectF, pyqtSignal
+from concurrent.futures import ThreadPoolExecutor
 from db_manager import DBManager
-from detector_pt import PyTorchDetector
-from video_stream import VideoStreamThread
+from db_async import DBCall, DetectionFeed, db_call
+from detection_banner import DetectionBannerModel
+from alarm_service import LogSink, QtAlarmSink, get_alarm_service
+import tracing
+from exporter import ExportThread, detect_export_format
+from danger_levels import LEVEL_COLORS
+# cv2/numpy/torch-backed modules (image_store, overlay, display, analysis_worker,
+# batch_scan, video_stream, retention) are imported where used so the login
+# window only waits for PyQt; warm_up_detector() loads them in the background.
 from utils import get_model_path, get_icon_path
 
 
@@ -242,11 +250,18 @@ class LoginDialog(QDialog):
         username = self.username_input.text()
         password = self.password_input.text()
 
-        role = self.db.validate_user(username, password)
+        # bcrypt check runs on the DB worker pool so the dialog stays responsive
+        self.login_btn.setEnabled(False)
+        db_call(self.db, self.db.validate_user, username, password,
+                on_result=lambda role, u=username: self.on_login_result(u, role),
+                on_error=lambda _: self.on_login_result(username, None))
+
+    def on_login_result(self, username, role):
+        self.login_btn.setEnabled(True)
         if role:
             self.role = role
             self.username = username
-            self.db.log_user_login(username, role)
+            self.db.submit(self.db.log_user_login, username, role)
             self.accept()
         else:
             msg = QMessageBox(self)
@@ -275,6 +290,7 @@ class AdminPanelDialog(QDialog):
         self.db = db
         self.role = role
         self.current_user = current_user
+        self.users = []
         self.init_ui()
         
     def init_ui(self):
@@ -411,17 +427,70 @@ class AdminPanelDialog(QDialog):
             if isinstance(widget, QLabel) and widget != form_title:
                 widget.setStyleSheet("color: #ecf0f1; font-weight: 600;")
         
+        # Diagnostics card: pipeline tracing (Chrome trace JSON) and profiler snapshots
+        diag_card = ModernCard()
+        diag_layout = QHBoxLayout(diag_card)
+        diag_layout.setContentsMargins(40, 20, 40, 20)
+        
+        diag_title = QLabel("Diagnostics")
+        diag_title.setStyleSheet("color: #3498db; font-size: 16pt; font-weight: bold;")
+        
+        self.trace_btn = ModernButton("")
+        self.trace_btn.clicked.connect(self.toggle_trace)
+        self.profile_btn = ModernButton("📈 Profile 10 s")
+        self.profile_btn.clicked.connect(self.capture_profile)
+        self.diag_label = QLabel("")
+        self.diag_label.setStyleSheet("color: #95a5a6;")
+        self.diag_label.setWordWrap(True)
+        self.update_trace_button()
+        
+        diag_layout.addWidget(diag_title)
+        diag_layout.addWidget(self.trace_btn)
+        diag_layout.addWidget(self.profile_btn)
+        diag_layout.addWidget(self.diag_label, 1)
+        
         # Add to main layout with better proportions
         main_layout.addWidget(header)
         main_layout.addWidget(table_card, 3)
         main_layout.addWidget(form_card, 1)
+        main_layout.addWidget(diag_card)
         
         self.setLayout(main_layout)
         self.load_users()
 
     def load_users(self):
+        db_call(self.db, self.db.get_all_users, on_result=self.populate_users)
+
+    def update_trace_button(self):
+        self.trace_btn.setText("⏹ Stop Trace" if tracing.is_enabled() else "⏺ Start Trace")
+
+    def toggle_trace(self):
+        if tracing.is_enabled():
+            path = tracing.disable()
+            self.diag_label.setText(f"Trace saved: {path} (open in ui.perfetto.dev)")
+            db_call(self.db, self.db.add_log, self.current_user, f"Trace kaydedildi: {path}")
+        else:
+            path = tracing.enable()
+            self.diag_label.setText(f"Tracing to {path}...")
+        self.update_trace_button()
+
+    def capture_profile(self):
+        self.profile_btn.setEnabled(False)
+        self.diag_label.setText("Sampling all threads for 10 s...")
+        DBCall(tracing.capture_profile_async(seconds=10.0),
+               on_result=self.on_profile_ready, on_error=self.on_profile_failed)
+
+    def on_profile_ready(self, paths):
+        self.profile_btn.setEnabled(True)
+        self.diag_label.setText(f"Profile saved: {paths['report']}")
+
+    def on_profile_failed(self, message):
+        self.profile_btn.setEnabled(True)
+        self.diag_label.setText(f"Profiling failed: {message}")
+
+    def populate_users(self, users):
+        self.users = users
         self.table.setRowCount(0)
-        users = self.db.get_all_users()
         for row_idx, (user_id, username, role) in enumerate(users):
             self.table.insertRow(row_idx)
             self.table.setItem(row_idx, 0, QTableWidgetItem(str(user_id)))
@@ -446,17 +515,21 @@ class AdminPanelDialog(QDialog):
             role = "personel"
 
         if username and password:
-            self.db.add_user(username, password, role)
-            self.db.add_log(self.current_user, f"{role} kullanıcısı eklendi: {username}")
-            self.load_users()
+            db_call(self.db, self.add_user_task, username, password, role,
+                    on_result=lambda _: self.load_users())
             self.username_input.clear()
             self.password_input.clear()
         else:
             QMessageBox.warning(self, "Error", "Please fill all fields!")
 
+    def add_user_task(self, username, password, role):
+        # Runs on the DB worker pool (bcrypt hashing is slow)
+        self.db.add_user(username, password, role)
+        self.db.add_log(self.current_user, f"{role} kullanıcısı eklendi: {username}")
+
     def delete_user(self, user_id, username):
         if self.role == "şef":
-            user = [u for u in self.db.get_all_users() if u[0] == user_id]
+            user = [u for u in self.users if u[0] == user_id]
             if user and user[0][2] != "personel":
                 QMessageBox.warning(self, "Permission Denied", "You can only delete personnel!")
                 return
@@ -465,11 +538,30 @@ class AdminPanelDialog(QDialog):
                                    f"Are you sure you want to delete user '{username}'?",
                                    QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            self.db.delete_user(user_id)
-            self.db.add_log(self.current_user, f"Kullanıcı silindi: {username}")
-            self.load_users()
+            db_call(self.db, self.delete_user_task, user_id, username,
+                    on_result=lambda _: self.load_users())
+
+    def delete_user_task(self, user_id, username):
+        self.db.delete_user(user_id)
+        self.db.add_log(self.current_user, f"Kullanıcı silindi: {username}")
 
 class RecordViewerDialog(QDialog):
+    PERIODS = {
+        "All time": None,
+        "Last 24 hours": 1,
+        "Last 7 days": 7,
+        "Last 30 days": 30,
+        "Last 365 days": 365,
+    }
+
+    EXPORT_FILTERS = {
+        "CSV Files (*.csv)": 'csv',
+        "Gzip CSV Files (*.csv.gz)": 'csv.gz',
+        "JSON Lines (*.jsonl)": 'jsonl',
+        "Parquet Files (*.parquet)": 'parquet',
+        "Annotated Images (*.zip)": 'zip',
+    }
+
     def __init__(self, db):
         super().__init__()
         self.db = db
@@ -500,23 +592,60 @@ class RecordViewerDialog(QDialog):
             }
         """)
         
-        self.export_btn = ModernButton("Export CSV", primary=True)
+        self.export_btn = ModernButton("Export", primary=True)
         self.export_btn.clicked.connect(self.export_csv)
         
         header_layout.addWidget(title)
         header_layout.addStretch()
         header_layout.addWidget(self.export_btn)
         
+        # Filter bar (shared by the table and the export)
+        filter_layout = QHBoxLayout()
+        filter_layout.setSpacing(10)
+        
+        self.class_filter = ModernLineEdit("Filter by class")
+        self.operator_filter = ModernLineEdit("Filter by operator")
+        self.mode_filter = QComboBox()
+        self.mode_filter.addItems(["All modes", "image", "video"])
+        self.period_filter = QComboBox()
+        self.period_filter.addItems(list(self.PERIODS.keys()))
+        for combo in (self.mode_filter, self.period_filter):
+            combo.setStyleSheet("""
+                QComboBox {
+                    background: #2c3e50;
+                    border: 2px solid #34495e;
+                    border-radius: 8px;
+                    padding: 10px 14px;
+                    color: white;
+                    font-size: 10pt;
+                }
+                QComboBox QAbstractItemView {
+                    background: #2c3e50;
+                    color: white;
+                }
+            """)
+        
+        self.apply_filter_btn = ModernButton("Apply Filters")
+        self.apply_filter_btn.clicked.connect(self.load_data)
+        self.class_filter.returnPressed.connect(self.load_data)
+        self.operator_filter.returnPressed.connect(self.load_data)
+        
+        filter_layout.addWidget(self.class_filter, 2)
+        filter_layout.addWidget(self.operator_filter, 2)
+        filter_layout.addWidget(self.mode_filter, 1)
+        filter_layout.addWidget(self.period_filter, 1)
+        filter_layout.addWidget(self.apply_filter_btn)
+        
         # Table card
         table_card = ModernCard()
         table_layout = QVBoxLayout(table_card)
         table_layout.setContentsMargins(25, 25, 25, 25)
         
         self.table = QTableWidget()
-        self.table.setColumnCount(9)
+        self.table.setColumnCount(10)
         self.table.setHorizontalHeaderLabels([
             "Timestamp", "Classes", "Confidences", "Mode",
-            "Image Path", "Operator", "Role", "View", "Delete"
+            "Image Path", "Video Position", "Operator", "Role", "View", "Delete"
         ])
         
         self.table.setStyleSheet("""
@@ -544,7 +673,7 @@ class RecordViewerDialog(QDialog):
         """)
         
         # Set optimized column widths
-        column_widths = [140, 220, 140, 90, 240, 120, 100, 100, 100]
+        column_widths = [140, 220, 140, 90, 240, 200, 120, 100, 100, 100]
         for i, width in enumerate(column_widths):
             self.table.setColumnWidth(i, width)
         
@@ -552,54 +681,114 @@ class RecordViewerDialog(QDialog):
         
         # Add to main layout
         main_layout.addLayout(header_layout)
+        main_layout.addLayout(filter_layout)
         main_layout.addWidget(table_card)
         
         self.setLayout(main_layout)
+        self.export_thread = None
+        
+        # Live updates: new detections are appended and deleted ones removed without re-querying the table
+        self.row_items = {}
+        self.feed = DetectionFeed(self.db, parent=self)
+        self.feed.reloaded.connect(self.populate_table)
+        self.feed.rows_added.connect(self.prepend_rows)
+        self.feed.rows_deleted.connect(self.remove_rows)
+        self.finished.connect(self.feed.close)
         self.load_data()
 
+    def current_filters(self):
+        """Filters selected in the filter bar, in DBManager format"""
+        filters = {
+            'classes': self.class_filter.text().strip(),
+            'operator': self.operator_filter.text().strip(),
+        }
+        if self.mode_filter.currentIndex() > 0:
+            filters['mode'] = self.mode_filter.currentText()
+        days = self.PERIODS[self.period_filter.currentText()]
+        if days is not None:
+            filters['date_from'] = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+        return filters
+
     def load_data(self):
-        records = self.db.fetch_all_detections()
+        self.feed.reload(self.current_filters())
+
+    def populate_table(self, records):
+        self.row_items = {}
         self.table.setRowCount(len(records))
 
         for row_idx, record in enumerate(records):
-            timestamp, classes, confs, mode, path, operator, role = record
-
-            self.table.setItem(row_idx, 0, QTableWidgetItem(timestamp))
-            self.table.setItem(row_idx, 1, QTableWidgetItem(classes))
-            self.table.setItem(row_idx, 2, QTableWidgetItem(confs))
-            self.table.setItem(row_idx, 3, QTableWidgetItem(mode))
-            self.table.setItem(row_idx, 4, QTableWidgetItem(path))
-            self.table.setItem(row_idx, 5, QTableWidgetItem(operator))
-            self.table.setItem(row_idx, 6, QTableWidgetItem(role))
-
-            # View button
-            btn_show = ModernButton("View")
-            btn_show.setMinimumWidth(80)
-            btn_show.setMaximumWidth(80)
-            btn_show.setMinimumHeight(35)
-            btn_show.clicked.connect(lambda _, p=path: self.show_image(p))
-            self.table.setCellWidget(row_idx, 7, btn_show)
-
-            # Delete button
-            btn_delete = ModernButton("Delete", danger=True)
-            btn_delete.setMinimumWidth(80)
-            btn_delete.setMaximumWidth(80)
-            btn_delete.setMinimumHeight(35)
-            btn_delete.clicked.connect(lambda _, t=timestamp, p=path: self.delete_record(t, p))
-            self.table.setCellWidget(row_idx, 8, btn_delete)
+            self.fill_row(row_idx, record)
 
-    def delete_record(self, timestamp, path):
+    def prepend_rows(self, records):
+        """New records (newest first) go on top; existing rows are left untouched"""
+        self.table.setUpdatesEnabled(False)
+        for record in reversed(records):
+            self.table.insertRow(0)
+            self.fill_row(0, record)
+        self.table.setUpdatesEnabled(True)
+
+    def remove_rows(self, record_ids):
+        for record_id in record_ids:
+            item = self.row_items.pop(record_id, None)
+            if item is not None:
+                self.table.removeRow(item.row())
+
+    def fill_row(self, row_idx, record):
+        record_id, timestamp, classes, confs, mode, path, operator, role, source, frame_index, media_msec = record
+
+        # Rows shift as records come and go; the timestamp item tracks its own row
+        self.row_items[record_id] = QTableWidgetItem(timestamp)
+        self.table.setItem(row_idx, 0, self.row_items[record_id])
+        self.table.setItem(row_idx, 1, QTableWidgetItem(classes))
+        self.table.setItem(row_idx, 2, QTableWidgetItem(confs))
+        self.table.setItem(row_idx, 3, QTableWidgetItem(mode))
+        self.table.setItem(row_idx, 4, QTableWidgetItem(path))
+        # Where the incident is in the original video file (empty for images and live cameras)
+        position = QTableWidgetItem("")
+        if source:
+            from timeline import format_msec
+            position.setText(f"{os.path.basename(source)} @ {format_msec(media_msec or 0)} (#{frame_index})")
+            position.setToolTip(source)
+        self.table.setItem(row_idx, 5, position)
+        self.table.setItem(row_idx, 6, QTableWidgetItem(operator))
+        self.table.setItem(row_idx, 7, QTableWidgetItem(role))
+
+        # View button
+        btn_show = ModernButton("View")
+        btn_show.setMinimumWidth(80)
+        btn_show.setMaximumWidth(80)
+        btn_show.setMinimumHeight(35)
+        btn_show.clicked.connect(lambda _, r=record_id, p=path: self.show_image(r, p))
+        self.table.setCellWidget(row_idx, 8, btn_show)
+
+        # Delete button
+        btn_delete = ModernButton("Delete", danger=True)
+        btn_delete.setMinimumWidth(80)
+        btn_delete.setMaximumWidth(80)
+        btn_delete.setMinimumHeight(35)
+        btn_delete.clicked.connect(lambda _, r=record_id, p=path: self.delete_record(r, p))
+        self.table.setCellWidget(row_idx, 9, btn_delete)
+
+    def delete_record(self, record_id, path):
         reply = QMessageBox.question(self, "Confirm Delete", 
                                    "Are you sure you want to delete this record?", 
                                    QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            self.db.delete_detection(timestamp)
-            if os.path.exists(path):
-                os.remove(path)
-            self.load_data()
+            # The row is removed by the change feed once the delete commits
+            db_call(self.db, self.delete_record_task, record_id, path)
+
+    def delete_record_task(self, record_id, path):
+        self.db.delete_detection(record_id)
+        # Identical frames share one file; only remove it when no record uses it
+        if path and self.db.count_image_references(path) == 0:
+            from image_store import get_image_store
+            get_image_store().remove(path)
 
-    def show_image(self, path):
-        if not os.path.exists(path):
+    def show_image(self, record_id, path):
+        from image_store import get_image_store
+        from overlay import get_overlay_renderer
+        store = get_image_store()
+        if not (os.path.exists(path) or os.path.exists(store.thumbnail_path(path))):
             QMessageBox.warning(self, "Error", "Image not found!")
             return
             
@@ -614,35 +803,338 @@ class RecordViewerDialog(QDialog):
         
         layout = QVBoxLayout()
         
-        # Create image display with optimized scaling
-        label = QLabel()
-        original_pixmap = QPixmap(path)
-        
         # Calculate optimal display size
         viewer_size = viewer.size()
         display_width = viewer_size.width() - 50
         display_height = viewer_size.height() - 50
         
-        # Scale image while maintaining aspect ratio
-        scaled_pixmap = original_pixmap.scaled(
-            display_width, display_height, 
-            Qt.KeepAspectRatio, 
-            Qt.SmoothTransformation
-        )
-        
-        label.setPixmap(scaled_pixmap)
+        label = QLabel()
         label.setAlignment(Qt.AlignCenter)
         label.setStyleSheet("border: 2px solid #34495e; border-radius: 8px;")
         
+        full_shown = []
+        
+        def set_image(img, full=False):
+            if img is None or full_shown:
+                return
+            if full:
+                full_shown.append(True)
+            # Scale image while maintaining aspect ratio
+            label.setPixmap(ndarray_to_pixmap(img).scaled(
+                display_width, display_height, 
+                Qt.KeepAspectRatio, 
+                Qt.SmoothTransformation
+            ))
+        
+        # Overlays are rendered on demand from the raw frame + stored detections:
+        # the thumbnail version first (instant), then full resolution
+        renderer = get_overlay_renderer()
+        set_thumb = lambda img: set_image(img)
+        set_full = lambda img: set_image(img, full=True)
+        thumb_call = db_call(self.db, renderer.render_record, self.db, record_id, "thumb", on_result=set_thumb)
+        full_call = db_call(self.db, renderer.render_record, self.db, record_id, "full", on_result=set_full)
+        
         layout.addWidget(label)
         viewer.setLayout(layout)
         viewer.exec_()
+        thumb_call.result_ready.disconnect(set_thumb)
+        full_call.result_ready.disconnect(set_full)
 
     def export_csv(self):
-        filename, _ = QFileDialog.getSaveFileName(self, "Save CSV", "", "CSV Files (*.csv)")
-        if filename:
-            self.db.export_detections_to_csv(filename)
-            QMessageBox.information(self, "Success", "CSV file saved successfully!")
+        if self.export_thread and self.export_thread.isRunning():
+            return
+        filename, selected_filter = QFileDialog.getSaveFileName(
+            self, "Export Detections", "",
+            ";;".join(self.EXPORT_FILTERS.keys())
+        )
+        if not filename:
+            return
+        fmt = self.EXPORT_FILTERS.get(selected_filter) or detect_export_format(filename)
+        extension = '.' + fmt
+        if not filename.lower().endswith(extension):
+            filename += extension
+
+        self.export_progress = QProgressDialog("Exporting detections...", "Cancel", 0, 0, self)
+        self.export_progress.setWindowTitle("Export")
+        self.export_progress.setWindowModality(Qt.WindowModal)
+        self.export_progress.setMinimumDuration(0)
+
+        self.export_thread = ExportThread(self.db, filename, fmt=fmt, filters=self.current_filters())
+        self.export_thread.progress.connect(self.on_export_progress)
+        self.export_thread.export_finished.connect(self.on_export_finished)
+        self.export_thread.export_failed.connect(self.on_export_failed)
+        self.export_thread.export_cancelled.connect(self.export_progress.close)
+        self.export_progress.canceled.connect(self.export_thread.cancel)
+        self.export_btn.setEnabled(False)
+        self.export_thread.finished.connect(lambda: self.export_btn.setEnabled(True))
+        self.export_thread.start()
+
+    def on_export_progress(self, written, total):
+        self.export_progress.setMaximum(total)
+        self.export_progress.setValue(written)
+        self.export_progress.setLabelText(f"Exporting detections... {written}/{total}")
+
+    def on_export_finished(self, count, filename):
+        self.export_progress.close()
+        QMessageBox.information(self, "Success", f"{count} records exported to {filename}")
+
+    def on_export_failed(self, error):
+        self.export_progress.close()
+        QMessageBox.warning(self, "Export Error", f"Export failed: {error}")
+
+    def closeEvent(self, event):
+        if self.export_thread and self.export_thread.isRunning():
+            self.export_thread.cancel()
+            self.export_thread.wait()
+        event.accept()
+
+class BatchScanDialog(QDialog):
+    """Folder / file-list re-analysis with progress, pause/resume and summary"""
+    TABLE_STYLE = """
+        QTableWidget {
+            background: #34495e;
+            color: white;
+            border: none;
+            border-radius: 8px;
+            gridline-color: #2c3e50;
+        }
+        QHeaderView::section {
+            background: #2c3e50;
+            color: white;
+            padding: 8px;
+            border: none;
+            font-weight: bold;
+        }
+    """
+
+    def __init__(self, db, operator, role):
+        super().__init__()
+        self.db = db
+        self.operator = operator
+        self.role = role
+        self.scan_thread = None
+        self.init_ui()
+
+    def init_ui(self):
+        self.setWindowTitle("Batch Scan")
+        self.setMinimumSize(1000, 750)
+        self.setStyleSheet("""
+            QDialog {
+                background: #1a252f;
+            }
+            QLabel {
+                color: #ecf0f1;
+            }
+        """)
+        
+        main_layout = QVBoxLayout()
+        main_layout.setSpacing(15)
+        main_layout.setContentsMargins(25, 25, 25, 25)
+        
+        title = QLabel("Batch Scan")
+        title.setStyleSheet("color: #3498db; font-size: 20pt; font-weight: bold;")
+        
+        # Source selection
+        source_layout = QHBoxLayout()
+        self.btn_folder = ModernButton("📁 Select Folder", primary=True)
+        self.btn_folder.clicked.connect(self.select_folder)
+        self.btn_files = ModernButton("🗂 Select Files")
+        self.btn_files.clicked.connect(self.select_files)
+        self.source_label = QLabel("No source selected")
+        source_layout.addWidget(self.btn_folder)
+        source_layout.addWidget(self.btn_files)
+        source_layout.addWidget(self.source_label, 1)
+        
+        # Controls
+        control_layout = QHBoxLayout()
+        self.btn_start = ModernButton("▶ Start Scan", primary=True)
+        self.btn_start.setEnabled(False)
+        self.btn_start.clicked.connect(self.start_scan)
+        self.btn_pause = ModernButton("⏸ Pause")
+        self.btn_pause.setEnabled(False)
+        self.btn_pause.clicked.connect(self.toggle_pause)
+        self.btn_cancel = ModernButton("✖ Cancel", danger=True)
+        self.btn_cancel.setEnabled(False)
+        self.btn_cancel.clicked.connect(self.cancel_scan)
+        control_layout.addWidget(self.btn_start)
+        control_layout.addWidget(self.btn_pause)
+        control_layout.addWidget(self.btn_cancel)
+        
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFormat("%v / %m files")
+        self.rate_label = QLabel("")
+        
+        # Files with threats
+        self.results_table = QTableWidget()
+        self.results_table.setColumnCount(3)
+        self.results_table.setHorizontalHeaderLabels(["File", "Detections", "Classes"])
+        self.results_table.horizontalHeader().setStretchLastSection(True)
+        self.results_table.setColumnWidth(0, 520)
+        self.results_table.setStyleSheet(self.TABLE_STYLE)
+        
+        # Summary per class
+        self.summary_table = QTableWidget()
+        self.summary_table.setColumnCount(2)
+        self.summary_table.setHorizontalHeaderLabels(["Class", "Count"])
+        self.summary_table.horizontalHeader().setStretchLastSection(True)
+        self.summary_table.setMaximumHeight(220)
+        self.summary_table.setStyleSheet(self.TABLE_STYLE)
+        self.summary_label = QLabel("")
+        
+        main_layout.addWidget(title)
+        main_layout.addLayout(source_layout)
+        main_layout.addLayout(control_layout)
+        main_layout.addWidget(self.progress_bar)
+        main_layout.addWidget(self.rate_label)
+        main_layout.addWidget(self.results_table, 1)
+        main_layout.addWidget(self.summary_label)
+        main_layout.addWidget(self.summary_table)
+        self.setLayout(main_layout)
+        self.paths = []
+
+    def select_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select Folder")
+        if folder:
+            self.set_paths([folder], folder)
+
+    def select_files(self):
+        files, _ = QFileDialog.getOpenFileNames(
+            self, "Select Images", "",
+            "Images (*.jpg *.jpeg *.png *.bmp *.tif *.tiff)"
+        )
+        if files:
+            self.set_paths(files, f"{len(files)} files selected")
+
+    def set_paths(self, paths, description):
+        self.paths = paths
+        self.source_label.setText(description)
+        self.btn_start.setEnabled(True)
+
+    def start_scan(self):
+        self.results_table.setRowCount(0)
+        self.summary_table.setRowCount(0)
+        self.summary_label.setText("")
+        self.rate_label.setText("Scanning...")
+        self.progress_bar.setRange(0, 0)
+        
+        from batch_scan import BatchScanThread
+        self.scan_thread = BatchScanThread(self.paths, self.db, operator=self.operator, role=self.role)
+        self.scan_thread.progress.connect(self.on_progress)
+        self.scan_thread.batch_results.connect(self.on_batch_results)
+        self.scan_thread.scan_finished.connect(self.on_finished)
+        self.scan_thread.scan_failed.connect(self.on_failed)
+        self.scan_thread.start()
+        
+        self.btn_start.setEnabled(False)
+        self.btn_folder.setEnabled(False)
+        self.btn_files.setEnabled(False)
+        self.btn_pause.setEnabled(True)
+        self.btn_cancel.setEnabled(True)
+
+    def toggle_pause(self):
+        if not self.scan_thread:
+            return
+        if self.scan_thread.paused:
+            self.scan_thread.resume()
+            self.btn_pause.setText("⏸ Pause")
+        else:
+            self.scan_thread.pause()
+            self.btn_pause.setText("▶ Resume")
+            self.rate_label.setText("Paused")
+
+    def cancel_scan(self):
+        if self.scan_thread:
+            self.scan_thread.cancel()
+            self.rate_label.setText("Cancelling...")
+
+    def on_progress(self, processed, total, rate):
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(processed)
+        if not self.scan_thread.paused:
+            remaining = (total - processed) / rate if rate > 0 else 0
+            self.rate_label.setText(f"{rate:.1f} images/s - ETA {int(remaining // 60)}m {int(remaining % 60)}s")
+
+    def on_batch_results(self, rows):
+        for path, count, classes in rows:
+            row_idx = self.results_table.rowCount()
+            self.results_table.insertRow(row_idx)
+            self.results_table.setItem(row_idx, 0, QTableWidgetItem(path))
+            self.results_table.setItem(row_idx, 1, QTableWidgetItem(str(count)))
+            self.results_table.setItem(row_idx, 2, QTableWidgetItem(", ".join(classes)))
+
+    def on_finished(self, summary):
+        self.reset_controls()
+        state = "Cancelled" if summary['cancelled'] else "Completed"
+        rate = summary['processed'] / summary['elapsed'] if summary['elapsed'] > 0 else 0
+        self.rate_label.setText(f"{state} in {summary['elapsed']:.1f}s ({rate:.1f} images/s)")
+        self.summary_label.setText(
+            f"Processed: {summary['processed']}/{summary['total']}   "
+            f"With threats: {summary['with_threats']}   Unreadable: {summary['errors']}"
+        )
+        cascade = summary.get('cascade')
+        if cascade:
+            self.rate_label.setText(
+                f"{self.rate_label.text()} | cascade pass: {cascade['pass_rate']:.0%} "
+                f"(stage 1 {cascade['stage1_ms']:.1f} ms, stage 2 {cascade['stage2_ms']:.1f} ms)"
+            )
+        roi = summary.get('roi')
+        if roi:
+            self.rate_label.setText(
+                f"{self.rate_label.text()} | ROI cropped {roi['crop_rate']:.0%}, "
+                f"avg {roi['mean_area']:.0%} of frame"
+            )
+        counts = sorted(summary['class_counts'].items(), key=lambda item: -item[1])
+        self.summary_table.setRowCount(len(counts))
+        for row_idx, (cls, count) in enumerate(counts):
+            self.summary_table.setItem(row_idx, 0, QTableWidgetItem(cls))
+            self.summary_table.setItem(row_idx, 1, QTableWidgetItem(str(count)))
+
+    def on_failed(self, message):
+        self.reset_controls()
+        QMessageBox.warning(self, "Batch Scan Error", f"Batch scan failed: {message}")
+
+    def reset_controls(self):
+        self.btn_start.setEnabled(True)
+        self.btn_folder.setEnabled(True)
+        self.btn_files.setEnabled(True)
+        self.btn_pause.setEnabled(False)
+        self.btn_pause.setText("⏸ Pause")
+        self.btn_cancel.setEnabled(False)
+
+    def closeEvent(self, event):
+        if self.scan_thread and self.scan_thread.isRunning():
+            self.scan_thread.cancel()
+            self.scan_thread.wait()
+        event.accept()
+
+def _banner_style(background, weight="bold"):
+    return f"""
+        QLabel {{
+            background: {background};
+            color: white;
+            padding: 8px 15px;
+            border-radius: 6px;
+            font-weight: {weight};
+            min-width: 150px;
+        }}
+    """
+
+# Detection banner styles per severity (parsed by Qt only when severity changes)
+BANNER_STYLES = {
+    'idle': _banner_style("rgba(52, 73, 94, 0.8)", weight="500").replace("color: white", "color: #ecf0f1"),
+    'processing': _banner_style("rgba(241, 196, 15, 0.8)"),
+    'clear': _banner_style("rgba(46, 204, 113, 0.8)"),
+    'threat': _banner_style("rgba(231, 76, 60, 0.8)"),
+    'critical': _banner_style("rgba(192, 57, 43, 0.95)"),
+}
+
+def ndarray_to_pixmap(img):
+    """Convert a BGR ndarray to a QPixmap"""
+    import cv2
+    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    height, width, channel = img_rgb.shape
+    q_img = QImage(img_rgb.data, width, height, channel * width, QImage.Format_RGB888)
+    return QPixmap.fromImage(q_img)
 
 class ImageDisplayWidget(QLabel):
     """Custom widget for displaying images with modern styling and optimized scaling"""
@@ -662,19 +1154,146 @@ class ImageDisplayWidget(QLabel):
         self.setAlignment(Qt.AlignCenter)
         self.setText("Drop image here or click 'Load Image'")
         self.setScaledContents(False)
+        self.active = False
+
+    def available_size(self):
+        """Pixel area available for the image (accounting for padding)"""
+        return max(1, self.width() - 20), max(1, self.height() - 20)
+
+    def set_frame(self, img_rgb):
+        """Paint an RGB frame that is already sized to the label"""
+        height, width, channel = img_rgb.shape
+        q_img = QImage(img_rgb.data, width, height, channel * width, QImage.Format_RGB888)
+        self.setPixmap(QPixmap.fromImage(q_img))
+        self.set_active(True)
+
+    def set_active(self, active):
+        # Re-parsing a stylesheet is expensive; only do it when the state flips
+        if active == self.active:
+            return
+        self.active = active
+        self.setStyleSheet("""
+            QLabel {
+                background: #2c3e50;
+                border: 2px solid #34495e;
+                border-radius: 12px;
+            }
+        """)
+
+class TimelineWidget(QWidget):
+    """Detection segments of a recorded video, one lane per danger level; click to seek"""
+    seek_requested = pyqtSignal(float)
+    LANES = ['Çok Yüksek', 'Yüksek', 'Orta', 'Düşük']
+
+    def __init__(self):
+        super().__init__()
+        self.segments = []
+        self.duration_msec = 0.0
+        self.position_msec = None
+        self.setMinimumHeight(64)
+        self.setCursor(Qt.PointingHandCursor)
+        self.setToolTip("Click to jump to that moment")
+
+    def set_segments(self, segments, duration_msec):
+        self.segments = segments
+        # Frame count metadata can be missing or short; never clip the last segment
+        self.duration_msec = max(duration_msec, max((s['end_msec'] for s in segments), default=0.0), 1.0)
+        self.position_msec = None
+        self.update()
+
+    def set_position(self, msec):
+        self.position_msec = msec
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#2c3e50"))
+        lane_height = self.height() / len(self.LANES)
+        scale = self.width() / self.duration_msec
+        for segment in self.segments:
+            lane = self.LANES.index(segment['level']) if segment['level'] in self.LANES else len(self.LANES) - 1
+            b, g, r = LEVEL_COLORS.get(segment['level'], (0, 255, 0))
+            width = max(2.0, (segment['end_msec'] - segment['start_msec']) * scale)
+            painter.fillRect(QRectF(segment['start_msec'] * scale, lane * lane_height + 2, width, lane_height - 4),
+                             QColor(r, g, b))
+        if self.position_msec is not None:
+            painter.setPen(QColor("white"))
+            x = int(self.position_msec * scale)
+            painter.drawLine(x, 0, x, self.height())
+
+    def mousePressEvent(self, event):
+        if self.segments and event.button() == Qt.LeftButton:
+            ratio = min(max(event.x() / max(1, self.width()), 0.0), 1.0)
+            self.seek_requested.emit(self.duration_msec * ratio)
 
 class XrayDetectionApp(QWidget):
-    def __init__(self, db, role, username):
+    def __init__(self, db, role, username, detector_future=None):
         super().__init__()
+        from analysis_worker import AnalysisQueue
         self.db = db
         self.role = role
         self.username = username
-        # Model path'i otomatik belirle
-        self.detector = PyTorchDetector()  # Model path parametresini kaldır
+        # The model loads in the background (usually already started behind the login window)
+        self.detector = None
         self.original_image = None
         self.video_thread = None
+        # Timeline seeks decode on one worker thread; clicks made while a seek runs collapse to the latest
+        self.seek_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="seek")
+        self.seeker = None
+        self.seek_pending = False
+        self.seek_target = None
+        self.timeline_segments = []
         self.init_ui()
         
+        # Single-image analysis queue (runs off the GUI thread)
+        self.analysis_queue = AnalysisQueue(self.detector, self.db, operator=self.username, role=self.role, parent=self)
+        self.analysis_queue.progress.connect(self.on_analysis_progress)
+        self.analysis_queue.finished.connect(self.on_analysis_finished)
+        self.analysis_queue.failed.connect(self.on_analysis_failed)
+        self.analysis_queue.queue_changed.connect(self.on_analysis_queue_changed)
+        
+        # Process-wide alarm service: streams post events, this window shows/acks them
+        self.alarm_service = get_alarm_service()
+        self.alarm_ui_sink = QtAlarmSink()
+        self.alarm_ui_sink.alarm_changed.connect(self.on_alarm_changed)
+        self.alarm_log_sink = LogSink(self.db, self.username)
+        self.alarm_service.add_sink(self.alarm_ui_sink)
+        self.alarm_service.add_sink(self.alarm_log_sink)
+        
+        if detector_future is None:
+            detector_future = warm_up_detector()
+        if not detector_future.done():
+            self.update_status("Loading detection model...", "#f39c12")
+        self.detector_call = DBCall(detector_future, on_result=self.on_detector_ready,
+                                    on_error=self.on_detector_failed, parent=self)
+        
+    def on_detector_ready(self, detector):
+        self.detector = detector
+        self.analysis_queue.detector = detector
+        self.btn_detect.setEnabled(self.original_image is not None)
+        self.update_status("Ready", "#2ecc71")
+
+    def on_alarm_changed(self, kind, state):
+        if not state['active']:
+            self.btn_ack_alarm.setVisible(False)
+            self.update_status("Alarm cleared", "#2ecc71")
+            return
+        label = "🚨 ESCALATED" if state['escalated'] else "🚨"
+        classes = ", ".join(state['classes'])
+        if state['acknowledged']:
+            self.btn_ack_alarm.setVisible(False)
+            self.update_status(f"Alarm acknowledged ({state['level']}): {classes}", "#f39c12")
+            return
+        self.btn_ack_alarm.setText(f"🔕 Acknowledge {state['level']} Alarm")
+        self.btn_ack_alarm.setVisible(True)
+        self.update_status(f"{label} {state['level']}: {classes}", "#e74c3c")
+
+    def acknowledge_alarm(self):
+        self.alarm_service.acknowledge(self.username)
+
+    def on_detector_failed(self, message):
+        self.update_status(f"Model could not be loaded: {message}", "#e74c3c")
+        
     def init_ui(self):
         self.setWindowTitle("X-Ray Threat Detection System")
         self.setMinimumSize(1400, 900)
@@ -766,13 +1385,52 @@ class XrayDetectionApp(QWidget):
         self.btn_video = ModernButton("🎥 Process Video")
         self.btn_video.clicked.connect(self.start_video_stream)
         
+        # File playback: paced at source FPS (drops when behind) or every frame as fast as possible
+        self.playback_combo = QComboBox()
+        self.playback_combo.addItem("▶ Realtime playback", "realtime")
+        self.playback_combo.addItem("⏩ Max throughput (every frame)", "throughput")
+        self.playback_combo.setToolTip("How video files are processed")
+        self.playback_combo.setStyleSheet("""
+            QComboBox {
+                background: #2c3e50;
+                border: 2px solid #34495e;
+                border-radius: 8px;
+                padding: 6px 12px;
+                color: white;
+            }
+            QComboBox QAbstractItemView {
+                background: #2c3e50;
+                color: white;
+            }
+        """)
+        
+        self.btn_timeline = ModernButton("🕒 Video Timeline")
+        self.btn_timeline.setToolTip("Browse detections of an already processed video")
+        self.btn_timeline.clicked.connect(self.open_timeline)
+        
         self.btn_pause_resume = ModernButton("⏸ Pause Video")
         self.btn_pause_resume.setEnabled(False)
         self.btn_pause_resume.clicked.connect(self.toggle_video_pause)
         
+        self.btn_batch = ModernButton("📂 Batch Scan")
+        self.btn_batch.clicked.connect(self.open_batch_scan)
+        
+        self.btn_cancel_analysis = ModernButton("✖ Cancel Analysis", danger=True)
+        self.btn_cancel_analysis.clicked.connect(self.cancel_analysis)
+        self.btn_cancel_analysis.setVisible(False)
+        
+        self.btn_ack_alarm = ModernButton("🔕 Acknowledge Alarm", danger=True)
+        self.btn_ack_alarm.clicked.connect(self.acknowledge_alarm)
+        self.btn_ack_alarm.setVisible(False)
+        
+        detection_layout.addWidget(self.btn_ack_alarm)
         detection_layout.addWidget(self.btn_load)
         detection_layout.addWidget(self.btn_detect)
+        detection_layout.addWidget(self.btn_cancel_analysis)
+        detection_layout.addWidget(self.btn_batch)
         detection_layout.addWidget(self.btn_video)
+        detection_layout.addWidget(self.playback_combo)
+        detection_layout.addWidget(self.btn_timeline)
         detection_layout.addWidget(self.btn_pause_resume)
 
         # Management controls (for authorized users)
@@ -815,6 +1473,7 @@ class XrayDetectionApp(QWidget):
         
         # Status label with improved styling
         self.status_label = QLabel("Ready")
+        self.status_color = "#2ecc71"
         self.status_label.setStyleSheet("""
             QLabel {
                 color: #2ecc71;
@@ -870,32 +1529,63 @@ class XrayDetectionApp(QWidget):
         
         # Detection info panel with better styling
         self.detection_info = QLabel("No detections")
-        self.detection_info.setStyleSheet("""
-            QLabel {
-                background: rgba(52, 73, 94, 0.8);
-                color: #ecf0f1;
-                padding: 8px 15px;
-                border-radius: 6px;
-                font-weight: 500;
-                min-width: 150px;
-            }
-        """)
+        self.banner_text = "No detections"
+        self.banner_severity = 'idle'
+        self.detection_info.setStyleSheet(BANNER_STYLES['idle'])
+        
+        # Video banner: frames feed the model, a timer repaints at most 4x per second
+        self.banner_model = DetectionBannerModel(window_seconds=3.0)
+        self.banner_timer = QTimer(self)
+        self.banner_timer.setInterval(250)
+        self.banner_timer.timeout.connect(self.refresh_detection_banner)
+        
+        # Displayed FPS / dropped paints (video only, refreshed once per second)
+        self.display_stats = QLabel("")
+        self.display_stats.setStyleSheet("color: #95a5a6; font-size: 9pt;")
+        self.display_stats.setVisible(False)
+        self.paint_fps = None
+        self.display_stats_timer = QTimer(self)
+        self.display_stats_timer.setInterval(1000)
+        self.display_stats_timer.timeout.connect(self.update_display_stats)
         
         header_layout.addWidget(title)
         header_layout.addStretch()
+        header_layout.addWidget(self.display_stats)
         header_layout.addWidget(self.detection_info)
         
         # Image display with optimized container
         self.image_label = ImageDisplayWidget()
         
+        # Timeline of a recorded video (hidden until one is loaded)
+        self.timeline_panel = QFrame()
+        self.timeline_panel.setVisible(False)
+        timeline_layout = QVBoxLayout(self.timeline_panel)
+        timeline_layout.setContentsMargins(0, 0, 0, 0)
+        self.timeline_title = QLabel("")
+        self.timeline_title.setStyleSheet("color: #95a5a6; font-size: 9pt;")
+        self.timeline_widget = TimelineWidget()
+        self.timeline_widget.seek_requested.connect(self.seek_timeline)
+        self.incident_list = QListWidget()
+        self.incident_list.setMaximumHeight(110)
+        self.incident_list.setStyleSheet("QListWidget { background: #2c3e50; color: white; border-radius: 8px; }")
+        self.incident_list.itemClicked.connect(lambda item: self.seek_timeline(item.data(Qt.UserRole)))
+        timeline_layout.addWidget(self.timeline_title)
+        timeline_layout.addWidget(self.timeline_widget)
+        timeline_layout.addWidget(self.incident_list)
+        
         # Add to layout
         layout.addLayout(header_layout)
         layout.addWidget(self.image_label, 1)
+        layout.addWidget(self.timeline_panel)
         
         return panel
 
     def update_status(self, message, color="#2ecc71"):
-        self.status_label.setText(message)
+        if message != self.status_label.text():
+            self.status_label.setText(message)
+        if color == self.status_color:
+            return
+        self.status_color = color
         rgb_values = self.hex_to_rgb(color)
         self.status_label.setStyleSheet(f"""
             QLabel {{
@@ -920,131 +1610,100 @@ class XrayDetectionApp(QWidget):
         )
         if file_path:
             try:
+                import cv2
                 self.original_image = cv2.imread(file_path)
                 if self.original_image is not None:
                     self.display_image(self.original_image)
-                    self.btn_detect.setEnabled(True)
+                    self.btn_detect.setEnabled(self.detector is not None)
                     self.update_status("Image loaded successfully", "#2ecc71")
-                    self.detection_info.setText("Image ready for analysis")
+                    self.set_detection_banner("Image ready for analysis", 'idle')
                 else:
                     self.update_status("Failed to load image", "#e74c3c")
             except Exception as e:
                 self.update_status(f"Error loading image: {str(e)}", "#e74c3c")
 
     def run_detection(self):
-        if self.original_image is not None:
-            try:
-                self.update_status("Running detection...", "#f39c12")
-                self.progress_bar.setVisible(True)
-                self.progress_bar.setRange(0, 0)  # Indeterminate progress
-                
-                # Run detection
-                detections = self.detector.detect(self.original_image)
-                img = self.original_image.copy()
-                
-                # Draw detections with improved visualization
-                for det in detections:
-                    x1, y1, x2, y2 = det['bbox']
-                    cls_name = det['class']
-                    conf = det['score']
-                    
-                    # Draw bounding box with better styling
-                    cv2.rectangle(img, (x1, y1), (x2, y2), (52, 152, 219), 3)
-                    
-                    # Draw label with improved background
-                    label = f"{cls_name} {conf:.2f}"
-                    label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)[0]
-                    cv2.rectangle(img, (x1, y1 - label_size[1] - 10), 
-                                (x1 + label_size[0], y1), (52, 152, 219), -1)
-                    cv2.putText(img, label, (x1, y1 - 5), 
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-
-                self.display_image(img)
-                self.progress_bar.setVisible(False)
-                
-                # Update detection info with better formatting
-                if detections:
-                    class_names = list(set([det['class'] for det in detections]))
-                    detection_count = len(detections)
-                    
-                    self.detection_info.setText(f"⚠️ {detection_count} threats detected: {', '.join(class_names)}")
-                    self.detection_info.setStyleSheet("""
-                        QLabel {
-                            background: rgba(231, 76, 60, 0.8);
-                            color: white;
-                            padding: 8px 15px;
-                            border-radius: 6px;
-                            font-weight: bold;
-                            min-width: 150px;
-                        }
-                    """)
-                    
-                    # Save detection with timestamp
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    os.makedirs("results", exist_ok=True)
-                    save_path = f"results/detect_{timestamp}.jpg"
-                    cv2.imwrite(save_path, img)
-                    
-                    self.db.insert_detection(class_names, save_path, mode="image", 
-                                           operator=self.username, role=self.role)
-                    self.db.add_log(self.username, f"Detection completed: {class_names}")
-                    
-                    self.update_status(f"⚠️ {detection_count} threats detected!", "#e74c3c")
-                else:
-                    self.detection_info.setText("✅ No threats detected")
-                    self.detection_info.setStyleSheet("""
-                        QLabel {
-                            background: rgba(46, 204, 113, 0.8);
-                            color: white;
-                            padding: 8px 15px;
-                            border-radius: 6px;
-                            font-weight: bold;
-                            min-width: 150px;
-                        }
-                    """)
-                    self.update_status("Analysis complete - No threats found", "#2ecc71")
-                    
-            except Exception as e:
-                self.progress_bar.setVisible(False)
-                self.update_status(f"Detection error: {str(e)}", "#e74c3c")
+        if self.original_image is None or self.detector is None:
+            return
+        # Inference, overlay and saving run on the analysis worker; the GUI only queues
+        job_id = self.analysis_queue.submit(self.original_image)
+        self.update_status(f"Analysis #{job_id} queued", "#f39c12")
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setVisible(True)
+
+    def cancel_analysis(self):
+        self.analysis_queue.cancel_all()
+        self.update_status("Analysis cancelled", "#f39c12")
+
+    def on_analysis_queue_changed(self, pending):
+        self.btn_cancel_analysis.setVisible(pending > 0)
+        self.btn_cancel_analysis.setText(f"✖ Cancel Analysis ({pending})")
+        if pending == 0:
+            self.progress_bar.setVisible(False)
+
+    def on_analysis_progress(self, job_id, percent, stage):
+        self.progress_bar.setValue(percent)
+        self.progress_bar.setFormat(f"#{job_id} {stage} - %p%")
+
+    def on_analysis_failed(self, job_id, message):
+        self.update_status(f"Detection error: {message}", "#e74c3c")
+
+    def on_analysis_finished(self, job_id, result):
+        detections = result['detections']
+        self.display_image(result['annotated'])
+        
+        # Update detection info with better formatting
+        if detections:
+            class_names = list(set([det['class'] for det in detections]))
+            detection_count = len(detections)
+            
+            self.set_detection_banner(f"⚠️ {detection_count} threats detected: {', '.join(class_names)}", 'threat')
+            self.update_status(f"⚠️ {detection_count} threats detected!", "#e74c3c")
+        else:
+            self.set_detection_banner("✅ No threats detected", 'clear')
+            self.update_status("Analysis complete - No threats found", "#2ecc71")
 
     def display_image(self, img):
-        """Optimized image display with improved scaling"""
+        """Optimized image display: resize to the label with cv2, then paint"""
         try:
-            # Convert BGR to RGB
-            img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            height, width, channel = img_rgb.shape
-            bytes_per_line = channel * width
-            
-            # Create QImage
-            q_img = QImage(img_rgb.data, width, height, bytes_per_line, QImage.Format_RGB888)
-            
-            # Get display widget dimensions
-            display_size = self.image_label.size()
-            available_width = display_size.width() - 20  # Account for padding
-            available_height = display_size.height() - 20
-            
-            # Create pixmap and scale with high quality
-            original_pixmap = QPixmap.fromImage(q_img)
-            scaled_pixmap = original_pixmap.scaled(
-                available_width, 
-                available_height, 
-                Qt.KeepAspectRatio, 
-                Qt.SmoothTransformation
-            )
-            
-            # Set the scaled pixmap
-            self.image_label.setPixmap(scaled_pixmap)
-            self.image_label.setStyleSheet("""
-                QLabel {
-                    background: #2c3e50;
-                    border: 2px solid #34495e;
-                    border-radius: 12px;
-                }
-            """)
+            from display import prepare_display_frame
+            with tracing.span("paint", cat="ui"):
+                self.image_label.set_frame(prepare_display_frame(img, *self.image_label.available_size()))
         except Exception as e:
             self.update_status(f"Display error: {str(e)}", "#e74c3c")
 
+    def on_video_frame_ready(self):
+        """Paint only the newest pending frame; older ones were dropped by the mailbox"""
+        if not self.video_thread:
+            return
+        frame = self.video_thread.display_mailbox.take()
+        if frame is None:
+            return
+        with tracing.span("paint", cat="ui"):
+            self.image_label.set_frame(frame)
+        self.paint_fps.tick()
+        size = self.image_label.available_size()
+        if size != self.video_thread.display_size:
+            self.video_thread.set_display_size(*size)
+
+    def update_display_stats(self):
+        if not self.video_thread:
+            return
+        text = f"Display: {self.paint_fps.fps():.1f} fps | dropped: {self.video_thread.display_mailbox.dropped}"
+        if self.video_thread.dropped_frames:
+            text += f" | skipped (behind realtime): {self.video_thread.dropped_frames}"
+        if self.video_thread.detector.prescreen is not None:
+            stats = self.video_thread.detector.cascade_stats.snapshot()
+            text += (f" | cascade pass: {stats['pass_rate']:.0%} "
+                     f"({stats['stage1_ms']:.1f} / {stats['stage2_ms']:.1f} ms)")
+        if self.video_thread.detector.roi is not None:
+            stats = self.video_thread.detector.roi_stats.snapshot()
+            text += f" | ROI: {stats['mean_area']:.0%} of frame ({stats['roi_ms']:.1f} ms)"
+        if self.video_thread.resolution is not None:
+            stats = self.video_thread.resolution.snapshot()
+            text += f" | imgsz: {stats['imgsz']}" + (" (min)" if stats['at_minimum'] else "")
+        self.display_stats.setText(text)
+
     def start_video_stream(self):
         video_path, _ = QFileDialog.getOpenFileName(
             self, "Select Video", "", 
@@ -1054,6 +1713,8 @@ class XrayDetectionApp(QWidget):
             return
 
         try:
+            from display import FpsCounter
+            from video_stream import VideoStreamThread
             if self.video_thread:
                 self.video_thread.stop()
             
@@ -1063,11 +1724,21 @@ class XrayDetectionApp(QWidget):
                 db_manager=self.db,  # model_path parametresini kaldır
                 operator=self.username,
                 role=self.role,
-                source=video_path
+                source=video_path,
+                playback=self.playback_combo.currentData()
             )
-            self.video_thread.frame_updated.connect(self.display_image)
+            self.video_thread.set_display_size(*self.image_label.available_size())
+            self.video_thread.frame_ready.connect(self.on_video_frame_ready)
+            self.paint_fps = FpsCounter()
+            self.display_stats.setVisible(True)
+            self.display_stats_timer.start()
+            self.banner_model.reset()
+            self.banner_timer.start()
             # Video stream'den detection bilgilerini almak için yeni sinyal bağlantısı
             self.video_thread.detection_updated.connect(self.update_detection_info)
+            self.video_thread.finished.connect(self.banner_timer.stop)
+            # The thread writes the video's timeline when it stops; show it right away
+            self.video_thread.finished.connect(lambda: self.load_timeline(video_path))
             self.video_thread.start()
             
             self.update_status("Processing video stream...", "#f39c12")
@@ -1075,65 +1746,155 @@ class XrayDetectionApp(QWidget):
         except Exception as e:
             self.update_status(f"Video processing error: {str(e)}", "#e74c3c")
 
-    def update_detection_info(self, detections):
-        """Video stream'den gelen detection bilgilerini güncelle"""
+    def open_timeline(self):
+        video_path, _ = QFileDialog.getOpenFileName(
+            self, "Select Processed Video", "",
+            "Videos (*.mp4 *.avi *.mov *.mkv)"
+        )
+        if video_path:
+            self.load_timeline(video_path)
+
+    def load_timeline(self, video_path):
+        db_call(self.db, self.db.fetch_timeline, video_path,
+                on_result=lambda segments: self.on_timeline_loaded(video_path, segments),
+                on_error=lambda message: self.update_status(f"Timeline error: {message}", "#e74c3c"))
+
+    def on_timeline_loaded(self, video_path, segments):
+        if not segments:
+            self.update_status("No timeline for this video yet - process it first", "#f39c12")
+            return
+        DBCall(self.seek_executor.submit(self.open_seeker, video_path),
+               on_result=lambda duration: self.show_timeline(video_path, segments, duration),
+               on_error=self.on_seeker_failed,
+               parent=self)
+
+    def open_seeker(self, video_path):
+        """Runs on the seek worker; self.seeker is only read and replaced on that thread"""
+        from timeline import VideoSeeker
+        seeker = VideoSeeker(video_path)
+        self.close_seeker()
+        self.seeker = seeker
+        return seeker.duration_msec
+
+    def seek_frame(self, msec):
+        """Runs on the seek worker"""
+        if self.seeker is None:
+            return None, msec
+        return self.seeker.seek(msec)
+
+    def on_seeker_failed(self, message):
+        # Without an open video the timeline cannot seek; hide it rather than show stale incidents
+        self.timeline_segments = []
+        self.timeline_widget.set_segments([], 0.0)
+        self.incident_list.clear()
+        self.timeline_panel.setVisible(False)
+        self.update_status(f"Cannot open video: {message}", "#e74c3c")
+
+    def close_seeker(self):
+        if self.seeker:
+            self.seeker.release()
+            self.seeker = None
+
+    def show_timeline(self, video_path, segments, duration_msec):
+        from timeline import format_msec
+        self.timeline_segments = segments
+        self.timeline_widget.set_segments(segments, duration_msec)
+        self.incident_list.clear()
+        for segment in segments:
+            item = QListWidgetItem(f"{format_msec(segment['start_msec'])} - {format_msec(segment['end_msec'])}  "
+                                   f"{segment['class']} ({segment['level']}, peak {segment['peak_score']:.2f})")
+            item.setData(Qt.UserRole, segment['start_msec'])
+            self.incident_list.addItem(item)
+        self.timeline_title.setText(f"🕒 {os.path.basename(video_path)}: {len(segments)} incidents")
+        self.timeline_panel.setVisible(True)
+        self.update_status(f"Timeline loaded: {len(segments)} incidents", "#2ecc71")
+
+    def seek_timeline(self, msec):
+        if not self.timeline_segments:
+            return
+        if self.seek_pending:
+            self.seek_target = msec
+            return
         try:
-            if detections and len(detections) > 0:
-                # Tespit edilen sınıfları topla
-                class_names = list(set([det['class'] for det in detections if 'class' in det]))
-                detection_count = len(detections)
-                
-                # Detection info'yu güncelle
-                if class_names:
-                    self.detection_info.setText(f"⚠️ {detection_count} threats detected: {', '.join(class_names)}")
-                    self.detection_info.setStyleSheet("""
-                        QLabel {
-                            background: rgba(231, 76, 60, 0.8);
-                            color: white;
-                            padding: 8px 15px;
-                            border-radius: 6px;
-                            font-weight: bold;
-                            min-width: 150px;
-                        }
-                    """)
-                    self.update_status(f"⚠️ {detection_count} threats detected!", "#e74c3c")
-                else:
-                    self.detection_info.setText("✅ Processing video...")
-                    self.detection_info.setStyleSheet("""
-                        QLabel {
-                            background: rgba(241, 196, 15, 0.8);
-                            color: white;
-                            padding: 8px 15px;
-                            border-radius: 6px;
-                            font-weight: bold;
-                            min-width: 150px;
-                        }
-                    """)
-            else:
-                self.detection_info.setText("✅ No threats detected")
-                self.detection_info.setStyleSheet("""
-                    QLabel {
-                        background: rgba(46, 204, 113, 0.8);
-                        color: white;
-                        padding: 8px 15px;
-                        border-radius: 6px;
-                        font-weight: bold;
-                        min-width: 150px;
-                    }
-                """)
-        except Exception as e:
-            print(f"Detection info update error: {str(e)}")
+            future = self.seek_executor.submit(self.seek_frame, msec)
+        except RuntimeError:
+            return  # executor already shut down (window closing)
+        self.seek_pending = True
+        DBCall(future, on_result=self.on_seek_done, on_error=self.on_seek_failed, parent=self)
+
+    def on_seek_done(self, result):
+        frame, position = result
+        self.finish_seek()
+        if frame is None:
+            self.update_status("Could not decode frame at that position", "#e74c3c")
+            return
+        from timeline import format_msec
+        self.original_image = frame
+        self.display_image(frame)
+        self.btn_detect.setEnabled(self.detector is not None)
+        self.timeline_widget.set_position(position)
+        active = sorted({s['class'] for s in self.timeline_segments if s['start_msec'] <= position <= s['end_msec']})
+        self.update_status(f"⏱ {format_msec(position)}" + (f" - {', '.join(active)}" if active else ""), "#2ecc71")
+
+    def on_seek_failed(self, message):
+        self.finish_seek()
+        self.update_status(f"Seek error: {message}", "#e74c3c")
+
+    def finish_seek(self):
+        self.seek_pending = False
+        if self.seek_target is not None:
+            target, self.seek_target = self.seek_target, None
+            self.seek_timeline(target)
+
+    def update_detection_info(self, detections):
+        """Video stream'den gelen detection bilgilerini modele ekle (widget'lara dokunmaz)"""
+        self.banner_model.add_frame(detections)
+
+    def refresh_detection_banner(self):
+        """Throttled (a few Hz) banner refresh from the rolling per-class counts"""
+        if not self.video_thread or self.video_thread.paused:
+            return
+        text, severity = self.banner_model.snapshot()
+        self.set_detection_banner(text, severity)
+        if not self.btn_ack_alarm.isHidden():
+            return  # the alarm message owns the status line until acknowledged
+        if severity in ('threat', 'critical'):
+            self.update_status("⚠️ Threats in view!", "#e74c3c")
+        else:
+            self.update_status("Processing video stream...", "#f39c12")
+
+    def set_detection_banner(self, text, severity):
+        """Only touch the widget when the text or severity actually changed"""
+        if text != self.banner_text:
+            self.banner_text = text
+            self.detection_info.setText(text)
+        if severity != self.banner_severity:
+            self.banner_severity = severity
+            self.detection_info.setStyleSheet(BANNER_STYLES[severity])
 
     def show_records(self):
         dialog = RecordViewerDialog(self.db)
         dialog.exec_()
 
+    def open_batch_scan(self):
+        dialog = BatchScanDialog(self.db, self.username, self.role)
+        dialog.exec_()
+
     def open_admin_panel(self):
         dialog = AdminPanelDialog(self.db, self.role, self.username)
         dialog.exec_()
         
     def closeEvent(self, event):
         """Handle application close event"""
+        self.analysis_queue.shutdown()
+        self.alarm_service.remove_sink(self.alarm_ui_sink)
+        self.alarm_service.remove_sink(self.alarm_log_sink)
+        from shadow import stop_shadow_evaluator
+        stop_shadow_evaluator()
+        self.seek_executor.submit(self.close_seeker)
+        self.seek_executor.shutdown(wait=True)
+        if tracing.is_enabled():
+            tracing.disable()
         if self.video_thread:
             self.video_thread.stop()
             self.video_thread.wait()
@@ -1162,6 +1923,11 @@ def apply_dark_theme(app):
 
 # Program Entry Point
 if __name__ == "__main__":
+    # Frozen (PyInstaller) builds: lets the capture subprocess start from the exe
+    from multiprocessing import freeze_support
+    freeze_support()
+    startup = StartupTimer()
+    startup.mark("PyQt imports")
     app = QApplication(sys.argv)
     
     icon_path = get_icon_path()
@@ -1176,28 +1942,51 @@ if __name__ == "__main__":
     app.setApplicationName("DIDRay Security System")
     app.setApplicationVersion("2.0")
     app.setOrganizationName("Security Solutions")
+    startup.mark("QApplication + theme")
     
     # Initialize database
     db = DBManager()
+    startup.mark("database")
     
-    # Create default users if they don't exist
+    # Create default users if they don't exist (bcrypt only runs for missing users)
     try:
-        db.add_user("admin", "admin123", "admin")
-        db.add_user("şef1", "123456", "şef")
-        db.add_user("personel1", "111111", "personel")
-    except:
-        pass  # Users might already exist
+        db.ensure_user("admin", "admin123", "admin")
+        db.ensure_user("şef1", "123456", "şef")
+        db.ensure_user("personel1", "111111", "personel")
+    except Exception as e:
+        print(f"[KULLANICI HATASI] Varsayılan kullanıcılar oluşturulamadı: {e}")
+    startup.mark("default users")
     
-    # Show login dialog
+    # Show login dialog; heavy modules and the model load behind it
     login_dialog = LoginDialog(db)
+    detector_future = None
+    
+    def on_login_shown():
+        global detector_future
+        startup.mark("login window shown")
+        startup.report("Time to login window")
+        detector_future = warm_up_detector(timer=startup)
+    
+    QTimer.singleShot(0, on_login_shown)
+    startup.mark("login dialog created")
     if login_dialog.exec_() == QDialog.Accepted:
         role = login_dialog.role
         username = login_dialog.username
+        startup.mark("login (user input)")
+        
+        # Background retention / archival / compaction
+        from retention import RetentionJob, RetentionPolicy
+        retention_job = RetentionJob(db, RetentionPolicy.from_file())
+        retention_job.start()
         
         # Create and show main application
-        window = XrayDetectionApp(db, role, username)
+        window = XrayDetectionApp(db, role, username, detector_future=detector_future)
         window.show()
+        startup.mark("main window")
+        QTimer.singleShot(0, lambda: startup.report("Startup"))
         
-        sys.exit(app.exec_())
+        exit_code = app.exec_()
+        retention_job.stop()
+        sys.exit(exit_code)
     else:
         sys.exit()
\ No newline at end of file
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+DEFAULT_IMGSZ = 640
+
+
+class ModelCache:
+    """Derlenmiş (TorchScript) model dosyaları için önbellek.
+
+    Anahtar: ağırlık dosyasının hash'i + torch sürümü + giriş boyutu + cihaz.
+    Ağırlıklar değişince hash değişir, eski dosya kullanılmaz ve yeni export'tan sonra silinir.
+    Hash'ler (yol, boyut, mtime) ile index.json'da tutulur; büyük .pt her açılışta okunmaz.
+    """
+
+    def __init__(self, cache_dir="model_cache"):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self._lock = threading.Lock()
+        self._exporting = set()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def weights_hash(self, weights_path):
+        """Ağırlık dosyasının blake2b hash'i; dosya değişmediyse index'ten okunur"""
+        path = os.path.abspath(weights_path)
+        stat = os.stat(path)
+        with self._lock:
+            index = self._load_index()
+            entry = index.get(path)
+            if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+                return entry["hash"]
+
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+
+        with self._lock:
+            index = self._load_index()
+            index[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest}
+            self._save_index(index)
+        return digest
+
+    def artifact_path(self, weights_path, torch_version, imgsz=DEFAULT_IMGSZ, device="cpu"):
+        stem = os.path.splitext(os.path.basename(weights_path))[0]
+        torch_tag = str(torch_version).replace("+", "_")
+        key = f"{self.weights_hash(weights_path)}-torch{torch_tag}-{imgsz}-{device}"
+        return os.path.join(self.cache_dir, f"{stem}-{key}.torchscript")
+
+    def lookup(self, weights_path, torch_version, imgsz=DEFAULT_IMGSZ, device="cpu"):
+        """Geçerli önbellek dosyası varsa yolunu, yoksa None döndür"""
+        path = self.artifact_path(weights_path, torch_version, imgsz, device)
+        return path if os.path.exists(path) else None
+
+    def invalidate(self, artifact_path):
+        """Yüklenemeyen (bozuk) dosyayı sil; bir sonraki açılışta yeniden üretilir"""
+        try:
+            os.remove(artifact_path)
+            print(f"[MODEL ÖNBELLEK] Geçersiz dosya silindi: {artifact_path}")
+        except OSError:
+            pass
+
+    def remove_stale(self, weights_path, keep_path):
+        """Aynı model için eski anahtarlı (eski ağırlık/torch sürümü) dosyaları sil"""
+        stem = os.path.splitext(os.path.basename(weights_path))[0]
+        keep = os.path.basename(keep_path)
+        device_suffix = keep.rsplit("-", 1)[-1]
+        for name in os.listdir(self.cache_dir):
+            if (name.startswith(f"{stem}-") and name.endswith(device_suffix)
+                    and name != keep and name.count("-") == keep.count("-")):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def export(self, weights_path, torch_version, imgsz=DEFAULT_IMGSZ, device="cpu"):
+        """Ağırlıkları füzyonlanmış, sadece çıkarım yapan TorchScript dosyasına çevir.
+
+        Export geçici bir dizindeki kopya üzerinde yapılır (Ultralytics çıktıyı ağırlığın
+        yanına yazar); bitince atomik olarak önbelleğe taşınır.
+        """
+        from ultralytics import YOLO
+
+        target = self.artifact_path(weights_path, torch_version, imgsz, device)
+        if os.path.exists(target):
+            return target
+        tmp_dir = os.path.join(self.cache_dir, f"tmp-{os.getpid()}-{threading.get_ident()}")
+        os.makedirs(tmp_dir, exist_ok=True)
+        try:
+            tmp_weights = os.path.join(tmp_dir, os.path.basename(weights_path))
+            shutil.copy2(weights_path, tmp_weights)
+            exported = YOLO(tmp_weights).export(format="torchscript", imgsz=imgsz, device=device,
+                                                optimize=False, verbose=False)
+            os.replace(str(exported), target)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.remove_stale(weights_path, target)
+        print(f"[MODEL ÖNBELLEK] Derlenmiş model hazır: {target}")
+        return target
+
+    def export_async(self, weights_path, torch_version, imgsz=DEFAULT_IMGSZ, device="cpu"):
+        """Export'u arka planda başlat (aynı dosya için tek seferde bir export)"""
+        target = self.artifact_path(weights_path, torch_version, imgsz, device)
+        with self._lock:
+            if target in self._exporting:
+                return None
+            self._exporting.add(target)
+
+        def run():
+            try:
+                self.export(weights_path, torch_version, imgsz, device)
+            except Exception as e:
+                print(f"[MODEL ÖNBELLEK HATASI] Export başarısız: {e}")
+            finally:
+                with self._lock:
+                    self._exporting.discard(target)
+
+        thread = threading.Thread(target=run, name="model-export", daemon=True)
+        thread.start()
+        return thread
+
+
+_model_cache = None
+_model_cache_lock = threading.Lock()
+
+
+def get_model_cache():
+    global _model_cache
+    with _model_cache_lock:
+        if _model_cache is None:
+            _model_cache = ModelCache()
+        return _model_cache
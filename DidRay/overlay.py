@@ -0,0 +1,109 @@
+import re
+import threading
+from collections import OrderedDict
+import cv2
+from danger_levels import LEVEL_COLORS, get_danger_level
+
+# "np.int64(12)" gibi eski kayıtlardaki tip adlarını atla
+_INT_RE = re.compile(r'(?<![\w.])-?\d+')
+
+
+def parse_detection_record(classes, bboxes, confidences):
+    """DB'deki metin kolonlarından detector.detect() formatında tespit listesi üret"""
+    class_list = [c for c in (classes or '').split(', ') if c]
+    box_list = []
+    for part in (bboxes or '').split(';'):
+        values = [int(v) for v in _INT_RE.findall(part)]
+        if len(values) == 4:
+            box_list.append(tuple(values))
+    conf_list = [float(c) for c in (confidences or '').split(';') if c]
+
+    detections = []
+    for i, bbox in enumerate(box_list):
+        detections.append({
+            'bbox': bbox,
+            'score': conf_list[i] if i < len(conf_list) else 0.0,
+            'class': class_list[i] if i < len(class_list) else '?'
+        })
+    return detections
+
+
+def draw_detections(img, detections, scale=1.0):
+    """Kutuları ve etiketleri img üzerine çiz (yerinde), img'yi döndür"""
+    thickness = max(1, int(round(2 * max(scale, 0.5))))
+    font_scale = max(0.35, 0.6 * scale)
+    for det in detections:
+        x1, y1, x2, y2 = (int(v * scale) for v in det['bbox'])
+        cls_name = det['class']
+        color = LEVEL_COLORS[get_danger_level(cls_name)]
+
+        cv2.rectangle(img, (x1, y1), (x2, y2), color, thickness)
+        label = f"{cls_name} {det['score']:.2f}"
+        label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)[0]
+        cv2.rectangle(img, (x1, y1 - label_size[1] - 8), (x1 + label_size[0], y1), color, -1)
+        cv2.putText(img, label, (x1, y1 - 4),
+                    cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 255, 255), thickness)
+    return img
+
+
+class OverlayRenderer:
+    """Ham kare + DB'deki tespitlerden overlay'i talep anında çizer, sonuçları LRU önbellekte tutar.
+
+    Önbellek bayt ile sınırlıdır (1080p tam kare ~6 MB); toplu okumalar (dışa aktarma) cache=False kullanır.
+    """
+
+    def __init__(self, image_store, cache_bytes=64 * 1024 * 1024):
+        self.image_store = image_store
+        self.cache_bytes = cache_bytes
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+    def render(self, image_path, detections, variant="thumb", original_size=None, cache=True):
+        """original_size: (genişlik, yükseklik) - kutular küçük görüntüye ölçeklenir"""
+        key = (image_path, variant, tuple((d['bbox'], d['class'], round(d['score'], 2)) for d in detections))
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        img = self.image_store.load(image_path, variant)
+        if img is None:
+            return None
+        scale = 1.0
+        if original_size and original_size[0]:
+            scale = img.shape[1] / float(original_size[0])
+        rendered = draw_detections(img, detections, scale)
+        if not cache or rendered.nbytes > self.cache_bytes:
+            return rendered
+
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = rendered
+                self._cached_bytes += rendered.nbytes
+            while self._cached_bytes > self.cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= evicted.nbytes
+        return rendered
+
+    def render_record(self, db, record_id, variant="thumb", cache=True):
+        record = db.fetch_detection(record_id)
+        if record is None:
+            return None
+        if not record['image_width']:
+            # Eski kayıtlarda kutular görüntünün üzerine zaten çizilmiş
+            return self.image_store.load(record['image_path'], variant)
+        detections = parse_detection_record(record['classes'], record['bboxes'], record['confidences'])
+        original_size = (record['image_width'], record['image_height'])
+        return self.render(record['image_path'], detections, variant, original_size, cache=cache)
+
+
+_default_renderer = None
+
+
+def get_overlay_renderer():
+    global _default_renderer
+    if _default_renderer is None:
+        from image_store import get_image_store
+        _default_renderer = OverlayRenderer(get_image_store())
+    return _default_renderer
@@ -0,0 +1,50 @@
+import argparse
+import os
+import time
+from db_manager import DBManager
+from detector_pt import PyTorchDetector
+from image_store import get_image_store
+
+
+def rescore_history(db, detector, model_name, since=None, limit=None, progress_every=100):
+    """Ham kareleri yeni modelle yeniden analiz et, sonuçları detection_rescores tablosuna yaz"""
+    store = get_image_store()
+    processed = 0
+    start = time.time()
+    for rows in db.iter_rescorable_detections(model_name, since=since):
+        results = []
+        for detection_id, image_path in rows:
+            img = store.load(image_path, "full")
+            if img is None:
+                continue
+            detections = detector.detect(img)
+            results.append((
+                detection_id,
+                [d['class'] for d in detections],
+                [d['bbox'] for d in detections],
+                [d['score'] for d in detections],
+            ))
+            processed += 1
+            if processed % progress_every == 0:
+                print(f"[RESCORE] {processed} kayıt ({processed / (time.time() - start):.1f} kare/sn)")
+            if limit and processed >= limit:
+                break
+        db.insert_rescores(model_name, results)
+        if limit and processed >= limit:
+            break
+    print(f"[RESCORE] Tamamlandı: {processed} kayıt, {time.time() - start:.1f} sn")
+    return processed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kayıtlı ham kareleri yeni bir modelle yeniden puanla")
+    parser.add_argument("--model", required=True, help="Yeni model ağırlıkları (.pt)")
+    parser.add_argument("--db", default="detections.db")
+    parser.add_argument("--since", help="Bu zamandan sonraki kayıtlar (YYYY-MM-DD)")
+    parser.add_argument("--limit", type=int)
+    args = parser.parse_args()
+
+    db = DBManager(args.db)
+    detector = PyTorchDetector(args.model)
+    rescore_history(db, detector, os.path.basename(args.model), since=args.since, limit=args.limit)
+    db.close()
@@ -0,0 +1,175 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+import cv2
+from image_store import get_image_store
+
+
+class RetentionPolicy:
+    """Tespit kayıtları ve kanıt görüntüleri için saklama ayarları"""
+
+    def __init__(self, full_image_days=30, metadata_days=365, thumbnail_max_side=320,
+                 thumbnail_quality=70, archive_dir="archive", batch_size=500,
+                 offpeak_hours=(2, 5), vacuum_pages=2000, interval_seconds=3600):
+        # full_image_days sonrası görüntü küçültülür, metadata_days sonrası kayıt arşivlenir
+        self.full_image_days = full_image_days
+        self.metadata_days = metadata_days
+        self.thumbnail_max_side = thumbnail_max_side
+        self.thumbnail_quality = thumbnail_quality
+        self.archive_dir = archive_dir
+        self.batch_size = batch_size
+        self.offpeak_hours = tuple(offpeak_hours)
+        self.vacuum_pages = vacuum_pages
+        self.interval_seconds = interval_seconds
+
+    @classmethod
+    def from_file(cls, path="retention.json"):
+        """JSON dosyasından politika yükle, dosya yoksa varsayılanları kullan"""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding='utf-8') as f:
+            return cls(**json.load(f))
+
+    def is_offpeak(self, now):
+        start, end = self.offpeak_hours
+        if start <= end:
+            return start <= now.hour < end
+        return now.hour >= start or now.hour < end
+
+
+def downscale_image_file(path, max_side, quality):
+    """Görüntüyü yerinde küçültüp yeniden sıkıştır"""
+    img = cv2.imread(path)
+    if img is None:
+        return False
+    height, width = img.shape[:2]
+    scale = max_side / max(height, width)
+    if scale < 1:
+        img = cv2.resize(img, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+    tmp_path = path + ".tmp.jpg"
+    if not cv2.imwrite(tmp_path, img, [cv2.IMWRITE_JPEG_QUALITY, quality]):
+        return False
+    os.replace(tmp_path, path)
+    return True
+
+
+class RetentionJob(threading.Thread):
+    """Saklama politikasını periyodik olarak uygulayan arka plan işi"""
+
+    def __init__(self, db, policy=None, image_store=None):
+        super().__init__(daemon=True, name="retention")
+        self.db = db
+        self.policy = policy or RetentionPolicy()
+        self.image_store = image_store or get_image_store()
+        self.stop_event = threading.Event()
+        self.last_maintenance_date = None
+
+    def run(self):
+        # Uygulama açılışını yavaşlatmamak için ilk turu biraz geciktir
+        if self.stop_event.wait(60):
+            return
+        while not self.stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"[RETENTION HATASI] {e}")
+            self.stop_event.wait(self.policy.interval_seconds)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run_once(self, now=None):
+        now = now or datetime.now()
+        stats = {
+            'downscaled': self.downscale_old_images(now),
+            'archived': self.archive_old_records(now),
+            'maintenance': False,
+        }
+        if self.policy.is_offpeak(now) and self.last_maintenance_date != now.date():
+            self.db.run_maintenance(self.policy.vacuum_pages)
+            self.last_maintenance_date = now.date()
+            stats['maintenance'] = True
+        if stats['downscaled'] or stats['archived'] or stats['maintenance']:
+            print(f"[RETENTION] {stats}")
+        return stats
+
+    # full_image_days'ten eski görüntüleri küçük boyuta indir
+    def downscale_old_images(self, now):
+        cutoff = (now - timedelta(days=self.policy.full_image_days)).strftime("%Y-%m-%d %H:%M:%S")
+        total = 0
+        while not self.stop_event.is_set():
+            columns, rows = self.db.fetch_detection_rows_before(
+                cutoff, limit=self.policy.batch_size, image_state='full')
+            if not rows:
+                break
+            id_idx, path_idx = columns.index('id'), columns.index('image_path')
+            done, missing, failed, managed = [], [], [], set()
+            for row in rows:
+                path = row[path_idx]
+                if path and self.image_store.is_managed(path):
+                    # Depodaki görüntülerin önizlemesi zaten var, tam görüntü sonra silinir
+                    managed.add(path)
+                    done.append(row[id_idx])
+                elif not path or not os.path.exists(path):
+                    missing.append(row[id_idx])
+                elif downscale_image_file(path, self.policy.thumbnail_max_side, self.policy.thumbnail_quality):
+                    done.append(row[id_idx])
+                else:
+                    # Okunamayan/yazılamayan dosya diskte duruyor: 'deleted' denmez, tekrar denenmez
+                    print(f"[RETENTION HATASI] Görüntü küçültülemedi, tam boyutta bırakıldı: {path}")
+                    failed.append(row[id_idx])
+            self.db.set_image_state(done, 'thumbnail')
+            self.db.set_image_state(missing, 'deleted')
+            self.db.set_image_state(failed, 'failed')
+            for path in managed:
+                # Daha yeni bir kayıt aynı kareyi kullanıyorsa tam görüntü korunur
+                if self.db.count_image_references(path, image_state='full') == 0:
+                    self.image_store.remove_full(path)
+            total += len(rows)
+        return total
+
+    # metadata_days'ten eski kayıtları aylık arşiv veritabanlarına taşı
+    def archive_old_records(self, now):
+        cutoff = (now - timedelta(days=self.policy.metadata_days)).strftime("%Y-%m-%d %H:%M:%S")
+        total = 0
+        while not self.stop_event.is_set():
+            columns, rows = self.db.fetch_detection_rows_before(cutoff, limit=self.policy.batch_size)
+            if not rows:
+                break
+            ts_idx, path_idx = columns.index('timestamp'), columns.index('image_path')
+            by_month = {}
+            for row in rows:
+                by_month.setdefault(row[ts_idx][:7], []).append(row)
+            for month, month_rows in by_month.items():
+                self.write_archive(month, columns, month_rows)
+            # Arşiv yazıldıktan sonra ana tablodan sil ve görüntüleri kaldır
+            self.db.delete_detections([row[columns.index('id')] for row in rows])
+            for path in {row[path_idx] for row in rows}:
+                if path and self.db.count_image_references(path) == 0:
+                    self.image_store.remove(path)
+            total += len(rows)
+        return total
+
+    def archive_path(self, month):
+        os.makedirs(self.policy.archive_dir, exist_ok=True)
+        return os.path.join(self.policy.archive_dir, f"detections_{month.replace('-', '_')}.db")
+
+    def write_archive(self, month, columns, rows):
+        conn = sqlite3.connect(self.archive_path(month))
+        try:
+            column_defs = ", ".join(
+                "id INTEGER PRIMARY KEY" if col == 'id' else f"{col} TEXT" for col in columns)
+            conn.execute(f"CREATE TABLE IF NOT EXISTS detections ({column_defs})")
+            # Arşiv daha eski bir şemayla oluşturulmuş olabilir; sonradan eklenen kolonları tamamla
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(detections)")}
+            for col in columns:
+                if col not in existing:
+                    conn.execute(f"ALTER TABLE detections ADD COLUMN {col} TEXT")
+            placeholders = ", ".join("?" for _ in columns)
+            conn.executemany(
+                f"INSERT OR REPLACE INTO detections ({', '.join(columns)}) VALUES ({placeholders})", rows)
+            conn.commit()
+        finally:
+            conn.close()
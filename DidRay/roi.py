@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+import time
+import cv2
+import numpy as np
+
+
+class RoiConfig:
+    """Bagaj bölgesi (ROI) kırpma ayarları (roi.json); dosya yoksa kapalı.
+
+    Kırpma üretim tespitlerini değiştirir; açmadan önce eval_matrix --roi off,on ile geri çağırma karşılaştırılmalı.
+    """
+
+    def __init__(self, enabled=False, background_threshold=225, padding=0.06, min_area=0.01,
+                 max_coverage=0.85, work_width=320):
+        self.enabled = enabled
+        # X-ray'de boş bant/arka plan açık renktir; bu değerin altındaki pikseller nesne sayılır
+        self.background_threshold = background_threshold
+        # Kırpma kutusu her yönde kenarın bu oranı kadar genişletilir
+        self.padding = padding
+        # Karenin bu oranından küçük konturlar (gürültü, kayış izi) yok sayılır
+        self.min_area = min_area
+        # ROI karenin bu oranından büyükse kırpmanın faydası yok, tam kare kullanılır
+        self.max_coverage = max_coverage
+        # Eşikleme küçültülmüş kopyada yapılır
+        self.work_width = work_width
+
+    @classmethod
+    def from_file(cls, path="roi.json"):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding='utf-8') as f:
+            return cls(**json.load(f))
+
+
+def find_roi(image, config):
+    """Bagajı kapsayan (x1, y1, x2, y2) kutusunu bul; bulunamazsa veya kırpmaya değmezse None"""
+    height, width = image.shape[:2]
+    scale = min(1.0, config.work_width / float(width))
+    small = cv2.resize(image, (max(1, int(width * scale)), max(1, int(height * scale))),
+                       interpolation=cv2.INTER_AREA) if scale < 1.0 else image
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+    gray = cv2.GaussianBlur(gray, (5, 5), 0)
+    _, mask = cv2.threshold(gray, config.background_threshold, 255, cv2.THRESH_BINARY_INV)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, np.ones((7, 7), np.uint8))
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    min_area = config.min_area * mask.shape[0] * mask.shape[1]
+    boxes = [cv2.boundingRect(c) for c in contours if cv2.contourArea(c) >= min_area]
+    if not boxes:
+        return None
+    x1 = min(x for x, _, _, _ in boxes) / scale
+    y1 = min(y for _, y, _, _ in boxes) / scale
+    x2 = max(x + w for x, _, w, _ in boxes) / scale
+    y2 = max(y + h for _, y, _, h in boxes) / scale
+
+    pad_x, pad_y = config.padding * width, config.padding * height
+    x1, y1 = max(0, int(x1 - pad_x)), max(0, int(y1 - pad_y))
+    x2, y2 = min(width, int(x2 + pad_x)), min(height, int(y2 + pad_y))
+    if (x2 - x1) * (y2 - y1) > config.max_coverage * width * height:
+        return None
+    return x1, y1, x2, y2
+
+
+class RoiStats:
+    """Kırpma oranı, ortalama ROI alanı ve ROI aşaması süresi (thread-safe sayaçlar)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.frames = 0
+            self.cropped = 0
+            self.area_sum = 0.0
+            self.seconds = 0.0
+            self.last = None
+
+    def record(self, box, area, seconds):
+        with self._lock:
+            self.frames += 1
+            self.cropped += box is not None
+            self.area_sum += area
+            self.seconds += seconds
+            self.last = {'box': box, 'area': area}
+
+    def snapshot(self):
+        with self._lock:
+            frames = self.frames
+            return {
+                'frames': frames,
+                'cropped': self.cropped,
+                'crop_rate': self.cropped / frames if frames else 0.0,
+                # Modele giden piksel oranı (kırpılmayan kare 1.0 sayılır)
+                'mean_area': self.area_sum / frames if frames else 0.0,
+                'roi_ms': 1000.0 * self.seconds / frames if frames else 0.0,
+                'last': self.last,
+            }
+
+
+class RoiCropper:
+    """Çıkarım öncesi kırpma: kırpılmış görüntü ve kutuları tam kareye taşımak için ofset döndürür"""
+
+    def __init__(self, config=None):
+        self.config = config or RoiConfig.from_file()
+        self.stats = RoiStats()
+
+    def crop(self, image):
+        start = time.perf_counter()
+        box = find_roi(image, self.config)
+        if box is None:
+            self.stats.record(None, 1.0, time.perf_counter() - start)
+            return image, (0, 0)
+        x1, y1, x2, y2 = box
+        height, width = image.shape[:2]
+        crop = np.ascontiguousarray(image[y1:y2, x1:x2])
+        self.stats.record(box, (x2 - x1) * (y2 - y1) / float(width * height), time.perf_counter() - start)
+        return crop, (x1, y1)
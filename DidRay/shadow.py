@@ -0,0 +1,316 @@
+import argparse
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import Counter
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+from eval_metrics import match_detections
+from frame_ring import _ctx, attach_shared_memory
+
+
+class ShadowConfig:
+    """Gölge model ayarları (shadow.json); dosya yoksa kapalı"""
+
+    def __init__(self, enabled=False, model=None, sample_rate=0.05, max_cpu=0.25, queue_size=4,
+                 iou_threshold=0.5, flush_every=20, nice=10, threads=1, max_frame_pixels=1920 * 1080):
+        self.enabled = enabled and bool(model)
+        self.model = model
+        # Karelerin bu oranı gölge modele gönderilir
+        self.sample_rate = sample_rate
+        # Gölge thread'in en fazla bu oranda meşgul kalması için her çıkarımdan sonra beklenir
+        self.max_cpu = max_cpu
+        # Kuyruk doluysa örnek atlanır; üretici thread asla beklemez
+        self.queue_size = queue_size
+        self.iou_threshold = iou_threshold
+        self.flush_every = flush_every
+        # Gölge model ayrı süreçte, düşük öncelikle ve sınırlı intra-op thread ile çalışır
+        self.nice = nice
+        self.threads = threads
+        # Paylaşılan bellek slot boyutu; daha büyük kareler bu boyuta küçültülerek gönderilir
+        self.max_frame_pixels = max_frame_pixels
+
+    @classmethod
+    def from_file(cls, path="shadow.json"):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding='utf-8') as f:
+            return cls(**json.load(f))
+
+
+def compare_detections(production, shadow, iou_threshold=0.5):
+    """Üretim tespitleri referans alınarak sınıf bazlı eşleşen / kaçırılan / fazla sayıları"""
+    ground = [(d['class'], d['bbox']) for d in production]
+    hits, scored = match_detections(ground, shadow, iou_threshold)
+    matched, missed, extra = Counter(), Counter(), Counter()
+    for idx, (cls, _) in enumerate(ground):
+        (matched if idx in hits else missed)[cls] += 1
+    for _, correct, cls in scored:
+        if not correct:
+            extra[cls] += 1
+    return matched, missed, extra
+
+
+def shadow_worker(config, shm_name, slot_bytes, jobs, results, stop_event):
+    """Alt süreç: örnek kareleri paylaşılan bellekten okuyup aday modeli çalıştırır.
+
+    Öncelik ve thread sınırı süreç genelinde geçerlidir; torch'un OpenMP/MKL işçileri de
+    düşük öncelikli kalır ve üretim modelinin çekirdeklerini tamamen kaplamaz.
+    """
+    try:
+        os.nice(config.nice)
+    except (AttributeError, OSError):
+        pass
+    os.environ["OMP_NUM_THREADS"] = str(config.threads)
+    shm = None
+    try:
+        import torch
+        torch.set_num_threads(config.threads)
+        from detector_pt import PyTorchDetector
+        # Cascade ve ROI üretimle aynı dosyalardan (cascade.json, roi.json) okunur: ön elemenin reddettiği
+        # karelerde üretim çıktısı boş olduğundan aday tam modeli çalıştırsaydı her kutusu "fazla" sayılırdı
+        detector = PyTorchDetector(config.model, use_cache=False, cpu_tuning=False)
+        shm = attach_shared_memory(shm_name)
+        results.put(('ready',))
+        while not stop_event.is_set():
+            try:
+                slot, shape = jobs.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            image = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+            start = time.perf_counter()
+            detections = detector.detect(image)
+            elapsed = time.perf_counter() - start
+            del image
+            results.put(('done', slot, detections, elapsed))
+            # Görev döngüsü kotası: max_cpu=0.25 ise her 1 sn çıkarım için 3 sn beklenir
+            if config.max_cpu < 1.0:
+                stop_event.wait(elapsed * (1.0 / max(config.max_cpu, 0.01) - 1.0))
+    except Exception as e:
+        results.put(('error', str(e)))
+    finally:
+        if shm is not None:
+            shm.close()
+
+
+class ShadowEvaluator(threading.Thread):
+    """Örneklenen karelerde aday modeli ayrı süreçte çalıştırıp üretim modeliyle karşılaştırır.
+
+    Bu thread sadece sonuçları toplar ve DB'ye yazar. offer() hiçbir zaman bloklamaz;
+    görüntü sadece örnek seçildiğinde ve boş slot varsa paylaşılan belleğe kopyalanır.
+    """
+
+    def __init__(self, config, db=None):
+        super().__init__(name="shadow-eval", daemon=True)
+        self.config = config
+        self.db = db
+        self.model_name = os.path.basename(config.model)
+        self.slot_bytes = config.max_frame_pixels * 3
+        self.running = True
+        self.ready = False
+        self.shm = None
+        self.process = None
+        self.free_slots = queue.Queue()
+        # slot -> (kaynak, üretim tespitleri, üretim ms, üretim modeli); tespitler süreçler arası gönderilmez
+        self.pending = {}
+        self.rows = []
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.dropped = 0
+        self.shadow_seconds = 0.0
+        self.matched, self.missed, self.extra = Counter(), Counter(), Counter()
+
+    def offer(self, source, image, detections, production_ms=None, production_model=None):
+        if not self.running or not self.ready or random.random() >= self.config.sample_rate:
+            return False
+        try:
+            slot = self.free_slots.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        detections = list(detections)
+        if image.nbytes > self.slot_bytes:
+            # Slota sığacak şekilde küçült; IoU ölçekten bağımsız olduğundan üretim kutuları da ölçeklenir
+            height, width = image.shape[:2]
+            factor = (self.slot_bytes / float(image.nbytes)) ** 0.5
+            image = cv2.resize(image, (max(1, int(width * factor)), max(1, int(height * factor))),
+                               interpolation=cv2.INTER_AREA)
+            scale = image.shape[1] / float(width)
+            detections = [dict(det, bbox=tuple(int(v * scale) for v in det['bbox'])) for det in detections]
+        target = np.ndarray(image.shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+        np.copyto(target, image)
+        del target
+        self.pending[slot] = (source, detections, production_ms, production_model)
+        self.jobs.put((slot, image.shape))
+        return True
+
+    def _start_process(self):
+        self.shm = shared_memory.SharedMemory(create=True, size=self.config.queue_size * self.slot_bytes)
+        self.jobs = _ctx.Queue()
+        self.results = _ctx.Queue()
+        self.stop_event = _ctx.Event()
+        process = _ctx.Process(
+            target=shadow_worker, name="didray-shadow", daemon=True,
+            args=(self.config, self.shm.name, self.slot_bytes, self.jobs, self.results, self.stop_event),
+        )
+        process.start()
+        self.process = process
+
+    def _stop_process(self):
+        if self.process is not None:
+            self.stop_event.set()
+            self.process.join(timeout=5.0)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(timeout=1.0)
+            for q in (self.jobs, self.results):
+                q.cancel_join_thread()
+                q.close()
+            self.process = None
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def run(self):
+        try:
+            self._start_process()
+        except Exception as e:
+            print(f"[GÖLGE MODEL HATASI] Değerlendirme süreci başlatılamadı, gölge değerlendirme kapalı: {e}")
+            self.running = False
+            self._stop_process()
+            return
+        last_flush = time.time()
+        while self.running:
+            try:
+                message = self.results.get(timeout=0.5)
+            except queue.Empty:
+                message = None
+            if message is None:
+                if not self.process.is_alive():
+                    print("[GÖLGE MODEL HATASI] Değerlendirme süreci beklenmedik şekilde kapandı")
+                    self.running = False
+            elif message[0] == 'ready':
+                for slot in range(self.config.queue_size):
+                    self.free_slots.put(slot)
+                self.ready = True
+                print(f"[GÖLGE MODEL] Değerlendirme süreci hazır (pid {self.process.pid}, "
+                      f"{self.config.threads} thread, nice {self.config.nice})")
+            elif message[0] == 'done':
+                _, slot, shadow, elapsed = message
+                job = self.pending.pop(slot)
+                self.free_slots.put(slot)
+                self.evaluate(*job, shadow, elapsed)
+            else:
+                print(f"[GÖLGE MODEL HATASI] Model yüklenemedi veya çalışmadı, gölge değerlendirme kapalı: {message[1]}")
+                self.running = False
+            if self.rows and (len(self.rows) >= self.config.flush_every or time.time() - last_flush > 30):
+                self.flush()
+                last_flush = time.time()
+        self.ready = False
+        self.flush()
+        self._stop_process()
+
+    def evaluate(self, source, production, production_ms, production_model, shadow, elapsed):
+        matched, missed, extra = compare_detections(production, shadow, self.config.iou_threshold)
+        with self._lock:
+            self.frames += 1
+            self.shadow_seconds += elapsed
+            self.matched.update(matched)
+            self.missed.update(missed)
+            self.extra.update(extra)
+        per_class = {cls: [matched[cls], missed[cls], extra[cls]] for cls in set(matched) | set(missed) | set(extra)}
+        self.rows.append({
+            'model': self.model_name,
+            'production_model': production_model,
+            'source': source,
+            'production_count': len(production),
+            'shadow_count': len(shadow),
+            'matched': sum(matched.values()),
+            'missed': sum(missed.values()),
+            'extra': sum(extra.values()),
+            'per_class': per_class,
+            'production_ms': production_ms,
+            'shadow_ms': elapsed * 1000.0,
+        })
+
+    def flush(self):
+        rows, self.rows = self.rows, []
+        if rows and self.db:
+            try:
+                self.db.insert_shadow_evaluations(rows)
+            except Exception as e:
+                print(f"[GÖLGE MODEL HATASI] Sonuçlar kaydedilemedi: {e}")
+
+    def snapshot(self):
+        with self._lock:
+            matched, missed, extra = sum(self.matched.values()), sum(self.missed.values()), sum(self.extra.values())
+            return {
+                'model': self.model_name,
+                'frames': self.frames,
+                'dropped': self.dropped,
+                'agreement': matched / (matched + missed + extra) if matched + missed + extra else 1.0,
+                'matched': dict(self.matched),
+                'missed': dict(self.missed),
+                'extra': dict(self.extra),
+                'shadow_ms': 1000.0 * self.shadow_seconds / self.frames if self.frames else 0.0,
+            }
+
+    def stop(self):
+        self.running = False
+        self.join(timeout=10.0)
+
+
+_shadow_evaluator = None
+_shadow_disabled = False
+_shadow_evaluator_lock = threading.Lock()
+
+
+def get_shadow_evaluator(db=None):
+    """shadow.json ile açılmışsa paylaşılan gölge değerlendiriciyi döndür, değilse None"""
+    global _shadow_evaluator, _shadow_disabled
+    with _shadow_evaluator_lock:
+        if _shadow_disabled:
+            return None
+        if _shadow_evaluator is None:
+            config = ShadowConfig.from_file()
+            if not config.enabled:
+                _shadow_disabled = True
+                return None
+            _shadow_evaluator = ShadowEvaluator(config, db)
+            _shadow_evaluator.start()
+            print(f"[GÖLGE MODEL] {config.model} karelerin %{config.sample_rate * 100:.0f}'inde değerlendirilecek")
+        elif _shadow_evaluator.db is None and db is not None:
+            _shadow_evaluator.db = db
+        return _shadow_evaluator
+
+
+def stop_shadow_evaluator():
+    """Kapanışta bekleyen sonuçları DB'ye yaz"""
+    global _shadow_evaluator
+    with _shadow_evaluator_lock:
+        evaluator, _shadow_evaluator = _shadow_evaluator, None
+    if evaluator is not None:
+        evaluator.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gölge model karşılaştırma sonuçlarını özetle")
+    parser.add_argument("--db", default="detections.db")
+    parser.add_argument("--model", help="Sadece bu aday model")
+    args = parser.parse_args()
+
+    from db_manager import DBManager
+    db = DBManager(args.db)
+    for row in db.fetch_shadow_summary(args.model):
+        agreement = row['matched'] / max(1, row['matched'] + row['missed'] + row['extra'])
+        print(f"[GÖLGE MODEL] {row['model']} ({row['production_model']} karşısında): {row['frames']} kare, "
+              f"uyum {agreement:.1%}, kaçırılan {row['missed']}, fazla {row['extra']}, "
+              f"süre {row['shadow_ms'] or 0:.1f} ms (üretim {row['production_ms'] or 0:.1f} ms)")
+        for cls, (matched, missed, extra) in sorted(row['per_class'].items()):
+            print(f"[GÖLGE MODEL]   {cls}: eşleşen {matched}, kaçırılan {missed}, fazla {extra}")
+    db.close()
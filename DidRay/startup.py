@@ -0,0 +1,71 @@
+import importlib
+import threading
+import time
+from concurrent.futures import Future
+
+# Modül ilk import edildiğinde (main.py'nin en başında) başlangıç saati alınır
+_PROCESS_START = time.perf_counter()
+
+
+class StartupTimer:
+    """Açılış aşamalarının sürelerini tutar ve özet rapor basar"""
+
+    def __init__(self, origin=None):
+        self.origin = origin if origin is not None else _PROCESS_START
+        self._last = self.origin
+        self.phases = []
+        self._lock = threading.Lock()
+
+    def mark(self, phase, since=None):
+        """Önceki işaretten (veya since'ten) bu yana geçen süreyi aşama olarak kaydet"""
+        now = time.perf_counter()
+        with self._lock:
+            start = self._last if since is None else since
+            self.phases.append((phase, now - start))
+            if since is None:
+                self._last = now
+        return now
+
+    def elapsed(self):
+        return time.perf_counter() - self.origin
+
+    def report(self, title="Açılış süreleri"):
+        with self._lock:
+            phases = list(self.phases)
+        print(f"[BAŞLANGIÇ] {title} (toplam {self.elapsed() * 1000:.0f} ms):")
+        for phase, seconds in phases:
+            print(f"[BAŞLANGIÇ]   {phase:<28} {seconds * 1000:8.1f} ms")
+
+
+def warm_up_detector(model_path=None, timer=None):
+    """Ağır modülleri (torch, ultralytics, cv2) ve modeli arka planda yükle.
+
+    Future döner; sonuç hazır PyTorchDetector nesnesidir. Daemon thread kullanılır,
+    böylece giriş iptal edilirse uygulama model yüklemesini beklemeden kapanır.
+    """
+    future = Future()
+
+    def run():
+        future.set_running_or_notify_cancel()
+        started = time.perf_counter()
+        try:
+            import numpy as np
+            importlib.import_module("video_stream")  # cv2, torch
+            from detector_pt import PyTorchDetector
+            if timer:
+                started = timer.mark("arka plan: import", since=started)
+            detector = PyTorchDetector(model_path)
+            if timer:
+                started = timer.mark("arka plan: model yükleme", since=started)
+            # İlk çıkarımdaki tembel kurulum (fuse, bellek ayırma) kullanıcıyı bekletmesin
+            detector.detect(np.zeros((640, 640, 3), dtype=np.uint8))
+            if timer:
+                timer.mark("arka plan: ısınma çıkarımı", since=started)
+        except Exception as e:
+            print(f"[BAŞLANGIÇ HATASI] Arka plan yüklemesi başarısız: {e}")
+            future.set_exception(e)
+            return
+        future.set_result(detector)
+
+    threading.Thread(target=run, name="warmup", daemon=True).start()
+    return future
@@ -0,0 +1,95 @@
+import threading
+import cv2
+from danger_levels import get_danger_level
+
+
+def format_msec(msec):
+    seconds = int(max(0, msec) // 1000)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class TimelineBuilder:
+    """Video işlenirken sınıf başına kesintisiz aralıkları (segment) çıkarır.
+
+    Aynı sınıfın max_gap_seconds'tan kısa aralıklarla görülmesi tek segment sayılır; böylece
+    atlanan kareler (realtime modu) veya tek tük kaçırılan kareler segmenti bölmez.
+    """
+
+    def __init__(self, max_gap_seconds=1.0):
+        self.max_gap_msec = max_gap_seconds * 1000.0
+        self.open = {}
+        self.segments = []
+        self.last_msec = 0.0
+
+    def add(self, frame_index, pos_msec, detections):
+        self.last_msec = pos_msec
+        seen = {}
+        for det in detections:
+            seen[det['class']] = max(seen.get(det['class'], 0.0), det['score'])
+        for cls, score in seen.items():
+            segment = self.open.get(cls)
+            if segment and pos_msec - segment['end_msec'] <= self.max_gap_msec:
+                segment['end_frame'] = frame_index
+                segment['end_msec'] = pos_msec
+                segment['peak_score'] = max(segment['peak_score'], score)
+                segment['hits'] += 1
+                continue
+            if segment:
+                self.segments.append(segment)
+            self.open[cls] = {
+                'class': cls, 'level': get_danger_level(cls),
+                'start_frame': frame_index, 'end_frame': frame_index,
+                'start_msec': pos_msec, 'end_msec': pos_msec,
+                'peak_score': score, 'hits': 1,
+            }
+        for cls in [c for c, s in self.open.items() if c not in seen and pos_msec - s['end_msec'] > self.max_gap_msec]:
+            self.segments.append(self.open.pop(cls))
+
+    def finish(self):
+        self.segments.extend(self.open.values())
+        self.open = {}
+        return sorted(self.segments, key=lambda s: (s['start_msec'], s['class']))
+
+
+class VideoSeeker:
+    """Kayıtlı videoda zamana atlama.
+
+    Uzak hedeflerde CAP_PROP_POS_MSEC kullanılır: FFmpeg önceki anahtar kareye atlar ve sadece
+    o GOP'u hedefe kadar çözer. Yakın ileri hedeflerde (forward_window içinde) grab() ile
+    ilerlemek yeniden konumlanmaktan ucuzdur. Tek thread'den kullanılmalıdır.
+    """
+
+    def __init__(self, path, forward_window_msec=2000.0):
+        self.path = path
+        self.forward_window_msec = forward_window_msec
+        self.cap = cv2.VideoCapture(path)
+        self._lock = threading.Lock()
+        if not self.cap.isOpened():
+            raise IOError(f"Video açılamadı: {path}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+        frames = self.cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0.0
+        self.duration_msec = 1000.0 * frames / self.fps if self.fps else 0.0
+
+    def position(self):
+        return self.cap.get(cv2.CAP_PROP_POS_MSEC)
+
+    def seek(self, msec):
+        """(kare, gerçek_zaman_ms) döndür; okunamazsa (None, msec)"""
+        with self._lock:
+            frame_msec = 1000.0 / self.fps if self.fps else 40.0
+            # Konum (POS_MSEC) son çözülen karenin zamanıdır
+            if not (0 < msec - self.position() <= self.forward_window_msec):
+                # Birkaç kare geriye konumlan; hedefe grab() ile ilerlenir
+                self.cap.set(cv2.CAP_PROP_POS_MSEC, max(0.0, msec - 2 * frame_msec))
+            while True:
+                if not self.cap.grab():
+                    return None, msec
+                position = self.position()
+                if position + frame_msec / 2 >= msec:
+                    break
+            ok, frame = self.cap.retrieve()
+            return (frame if ok else None), position
+
+    def release(self):
+        with self._lock:
+            self.cap.release()
@@ -0,0 +1,217 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from concurrent.futures import Future
+from datetime import datetime
+
+TRACE_DIR = "traces"
+# Bellek sınırı: en eski olaylar düşürülür (olay başına ~100 byte)
+MAX_EVENTS = 200000
+
+
+class _NullSpan:
+    """İzleme kapalıyken dönen paylaşılan boş span (ayırma yok, kayıt yok)"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'cat', 'args', 'start')
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.tracer.record(self.name, self.cat, self.start, end - self.start, self.args)
+        return False
+
+
+class Tracer:
+    """Chrome trace-event (Perfetto / chrome://tracing) formatında span toplayıcı"""
+
+    def __init__(self, max_events=MAX_EVENTS):
+        self.events = deque(maxlen=max_events)
+        self.thread_names = {}
+        self.origin = time.perf_counter_ns()
+        self.pid = os.getpid()
+
+    def record(self, name, cat, start_ns, dur_ns, args=None):
+        tid = threading.get_ident()
+        if tid not in self.thread_names:
+            self.thread_names[tid] = threading.current_thread().name
+        # deque.append GIL altında atomik; kilit gerekmez
+        self.events.append((name, cat, start_ns, dur_ns, tid, args))
+
+    def to_chrome_trace(self):
+        trace_events = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+            for tid, name in list(self.thread_names.items())
+        ]
+        for name, cat, start_ns, dur_ns, tid, args in list(self.events):
+            event = {
+                'name': name, 'cat': cat, 'ph': 'X', 'pid': self.pid, 'tid': tid,
+                'ts': (start_ns - self.origin) / 1000.0, 'dur': dur_ns / 1000.0,
+            }
+            if args:
+                event['args'] = args
+            trace_events.append(event)
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def write(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f)
+        return path
+
+
+_tracer = None
+_trace_path = None
+_lock = threading.Lock()
+
+
+def span(name, cat="pipeline", **args):
+    """with span("inference"): ... -- izleme kapalıyken tek bir global okuması kadar maliyetli"""
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return _Span(tracer, name, cat, args or None)
+
+
+def is_enabled():
+    return _tracer is not None
+
+
+def enable(path=None):
+    """İzlemeyi başlat; disable() çağrılınca (veya çıkışta) olaylar path'e yazılır"""
+    global _tracer, _trace_path
+    with _lock:
+        if _tracer is None:
+            _trace_path = path or os.path.join(TRACE_DIR, f"trace_{datetime.now():%Y%m%d_%H%M%S}.json")
+            _tracer = Tracer()
+            print(f"[TRACE] İzleme açık: {_trace_path}")
+        return _trace_path
+
+
+def disable():
+    """İzlemeyi durdur ve trace dosyasının yolunu döndür (izleme kapalıysa None)"""
+    global _tracer
+    with _lock:
+        tracer, _tracer = _tracer, None
+    if tracer is None:
+        return None
+    path = tracer.write(_trace_path)
+    print(f"[TRACE] {len(tracer.events)} olay yazıldı: {path}")
+    return path
+
+
+def _enable_from_env():
+    # DIDRAY_TRACE=1 -> varsayılan dosya, DIDRAY_TRACE=yol.json -> verilen dosya
+    value = os.environ.get("DIDRAY_TRACE", "").strip()
+    if value and value.lower() not in ("0", "false", "no"):
+        enable(None if value.lower() in ("1", "true", "yes") else value)
+        atexit.register(disable)
+
+
+_enable_from_env()
+
+
+def capture_profile(seconds=10.0, interval=0.005, out_dir=TRACE_DIR, memory=True, top=40):
+    """Tüm thread'lerden yığın örnekleyen profil anlık görüntüsü (+ isteğe bağlı tracemalloc).
+
+    cProfile sadece çağıran thread'i gördüğü için sys._current_frames() ile örnekleme yapılır.
+    Çıktılar: .folded (speedscope / flamegraph yığınları) ve .txt (özet rapor). Yolları döndürür.
+    """
+    stamp = f"{datetime.now():%Y%m%d_%H%M%S}"
+    os.makedirs(out_dir, exist_ok=True)
+    own = threading.get_ident()
+    names = {}
+    stacks = Counter()
+    self_time = Counter()
+
+    started_tracemalloc = memory and not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start(10)
+    deadline = time.monotonic() + seconds
+    samples = 0
+    while time.monotonic() < deadline:
+        for tid, frame in sys._current_frames().items():
+            if tid == own:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if not stack:
+                continue
+            if tid not in names:
+                names.update((t.ident, t.name) for t in threading.enumerate())
+                names.setdefault(tid, str(tid))
+            stacks[(names[tid],) + tuple(reversed(stack))] += 1
+            self_time[stack[0]] += 1
+        samples += 1
+        time.sleep(interval)
+
+    memory_stats = None
+    if memory:
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)])
+        memory_stats = snapshot.statistics('lineno')[:top]
+        if started_tracemalloc:
+            tracemalloc.stop()
+
+    folded_path = os.path.join(out_dir, f"profile_{stamp}.folded")
+    with open(folded_path, 'w', encoding='utf-8') as f:
+        for stack, count in stacks.most_common():
+            f.write(";".join(stack) + f" {count}\n")
+
+    report_path = os.path.join(out_dir, f"profile_{stamp}.txt")
+    total = max(sum(self_time.values()), 1)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write(f"DIDRay profil: {seconds:.1f} sn, {samples} örnek, aralık {interval * 1000:.1f} ms\n\n")
+        f.write("En çok örneklenen fonksiyonlar (self):\n")
+        for location, count in self_time.most_common(top):
+            f.write(f"{100.0 * count / total:6.1f}%  {count:6d}  {location}\n")
+        if memory_stats is not None:
+            f.write("\nEn çok bellek ayıran satırlar (tracemalloc):\n")
+            for stat in memory_stats:
+                f.write(f"{stat.size / 1024:10.1f} KB  {stat.count:7d} blok  {stat.traceback}\n")
+    print(f"[PROFİL] Yazıldı: {report_path}, {folded_path}")
+    return {'report': report_path, 'folded': folded_path}
+
+
+def capture_profile_async(**kwargs):
+    """capture_profile'ı daemon thread'de çalıştır, Future döndür (GUI bloklanmaz)"""
+    future = Future()
+
+    def run():
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(capture_profile(**kwargs))
+        except Exception as e:
+            print(f"[PROFİL HATASI] {e}")
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="profiler", daemon=True).start()
+    return future
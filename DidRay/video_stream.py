@@ -1,161 +1,251 @@
 import cv2
 import time
 import os
-import pygame
 from PyQt5.QtCore import QThread, pyqtSignal
-from datetime import datetime
 from detector_pt import PyTorchDetector
-from utils import get_alarm_path
-
-# Tehlike seviyeleri ve renkler
-DANGER_LEVELS = {
-    'Çok Yüksek': ['Gun'],
-    'Yüksek': ['Folding_Knife', 'Straight_Knife'],
-    'Orta': ['Multi-tool_Knife', 'Utility_Knife'],
-    'Düşük': ['Pliers', 'Scissor', 'Wrench']
-}
-
-LEVEL_COLORS = {
-    'Çok Yüksek': (255, 0, 255),
-    'Yüksek': (0, 0, 255),
-    'Orta': (0, 165, 255),
-    'Düşük': (0, 255, 0)
-}
-
-def get_danger_level(class_name):
-    for level, classes in DANGER_LEVELS.items():
-        if class_name in classes:
-            return level
-    return 'Düşük'
+from alarm_service import get_alarm_service
+from image_store import get_image_store
+from overlay import draw_detections
+from display import FrameMailbox, render_display_frame
+from tracing import span
+from adaptive_resolution import ResolutionConfig, ResolutionController
+from shadow import get_shadow_evaluator
+from timeline import TimelineBuilder
+
+# Dosya kaynakları için oynatma modları
+PLAYBACK_REALTIME = "realtime"      # kaynak FPS'inde, geride kalınca kare atlanır
+PLAYBACK_THROUGHPUT = "throughput"  # her kare, olabildiğince hızlı ve batch halinde
 
 class VideoStreamThread(QThread):
     frame_updated = pyqtSignal(object)
+    frame_ready = pyqtSignal()
     detection_updated = pyqtSignal(list)
 
-    def __init__(self, model_path=None, db_manager=None, operator=None, role=None, source=0):
+    def __init__(self, model_path=None, db_manager=None, operator=None, role=None, source=0, alarm_service=None,
+                 capture_process=None, resolution=None, frame_log=None, playback=PLAYBACK_REALTIME,
+                 batch_size=4):
         super().__init__()
-        self.detector = PyTorchDetector(model_path)
+        # Gecikme bütçesine göre imgsz ayarı (resolution.json); TorchScript çıktısı sabit boyutlu
+        # olduğundan bu modda .pt ağırlıkları kullanılır
+        if resolution is None:
+            resolution = ResolutionConfig.from_file()
+        adaptive = bool(resolution and resolution.enabled)
+        self.detector = PyTorchDetector(model_path, use_cache=not adaptive)
+        self.resolution = ResolutionController(resolution, self.detector.imgsz) if adaptive else None
+        if self.resolution:
+            self.detector.imgsz = self.resolution.size
         self.source = source
+        # Kamera (cihaz numarası) zaten gerçek zamanlı; tempo ve medya zamanı sadece dosyalarda
+        self.live = isinstance(source, int)
+        self.playback = playback
+        self.batch_size = max(1, batch_size)
+        self.source_fps = 0.0
+        self.frame_index = 0
+        self.processed_frames = 0
+        self.dropped_frames = 0
         self.running = True
         self.db = db_manager
-        self.last_saved = 0
+        self.last_saved = None
         self.paused = False
-        self.alarm_playing = False
         self.operator = operator
         self.role = role
-        self.alarm_sound = None
-        self.alarm_channel = None
-
-        # Alarm sistemi - güvenli yükleme
-        try:
-            pygame.mixer.init()
-            alarm_path = get_alarm_path()
-            if alarm_path and os.path.exists(alarm_path):
-                self.alarm_sound = pygame.mixer.Sound(alarm_path)
-                self.alarm_channel = pygame.mixer.Channel(1)
-                print(f"[ALARM] Ses dosyası yüklendi: {alarm_path}")
-            else:
-                print("[ALARM] Ses dosyası bulunamadı - sessiz modda çalışacak")
-        except Exception as e:
-            print(f"[ALARM HATASI] Ses sistemi başlatılamadı: {e}")
+        # Alarm sesi/arayüzü/kaydı ortak serviste; bu thread sadece olay bırakır
+        self.alarm_service = alarm_service or get_alarm_service()
+        self.alarm_source = f"video:{os.path.basename(str(source))}#{id(self):x}"
+        self.image_store = get_image_store()
+        # GUI'nin boyayacağı, etiket boyutuna küçültülmüş en yeni RGB kare
+        self.display_mailbox = FrameMailbox()
+        self.display_size = (960, 540)
+        # Decode'u ayrı süreçte yap (shared_memory halka tamponu); DIDRAY_CAPTURE_PROCESS=1 ile varsayılan açılır
+        if capture_process is None:
+            capture_process = os.environ.get("DIDRAY_CAPTURE_PROCESS") == "1"
+        self.capture_process = capture_process
+        # Kare başına tespit kaydı dizini; DIDRAY_FRAME_LOG=1 (frame_logs/) veya bir dizin ile açılır
+        if frame_log is None:
+            value = os.environ.get("DIDRAY_FRAME_LOG", "").strip()
+            frame_log = ("frame_logs" if value == "1" else value) or None
+        self.frame_log_dir = frame_log
+        self.frame_log = None
+        # Aday model karşılaştırması (shadow.json ile açılır)
+        self.shadow = get_shadow_evaluator(db_manager)
+
+    def set_display_size(self, width, height):
+        # Tuple ataması atomik; worker bir sonraki karede yeni boyutu kullanır
+        self.display_size = (max(1, width), max(1, height))
 
     def pause(self):
         self.paused = True
-        self.stop_alarm()
+        self.alarm_service.clear(self.alarm_source)
 
     def resume(self):
         self.paused = False
 
-    def start_alarm(self):
-        if not self.alarm_playing and not self.paused and self.alarm_sound and self.alarm_channel:
+    def open_capture(self):
+        if self.capture_process:
+            from frame_ring import ProcessCapture
             try:
-                self.alarm_channel.play(self.alarm_sound, loops=-1)
-                self.alarm_playing = True
+                return ProcessCapture(self.source)
             except Exception as e:
-                print("[ALARM BAŞLATMA HATASI]", e)
-
-    def stop_alarm(self):
-        if self.alarm_playing and self.alarm_channel:
-            try:
-                self.alarm_channel.stop()
-                self.alarm_playing = False
-            except Exception as e:
-                print("[ALARM DURDURMA HATASI]", e)
+                print(f"[CAPTURE HATASI] Decode süreci başlatılamadı, thread içinde okunacak: {e}")
+        return cv2.VideoCapture(self.source)
 
     def run(self):
-        cap = cv2.VideoCapture(self.source)
+        cap = self.open_capture()
         if not cap.isOpened():
             print("[HATA] Video açılamadı.")
             return
+        if self.frame_log_dir:
+            from frame_log import FrameLogWriter, session_log_path
+            self.frame_log = FrameLogWriter(session_log_path(self.frame_log_dir, self.source),
+                                            self.detector.model.names, source=self.source,
+                                            model=os.path.basename(self.detector.model_path))
+        self.frame_index = 0
+        self.source_fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        # Dosyalarda olay aralıkları zaman çizelgesi olarak DB'ye yazılır (sonradan hızlı atlama için)
+        self.timeline = TimelineBuilder() if self.db and not self.live else None
+
+        if self.playback == PLAYBACK_THROUGHPUT and not self.live:
+            self.run_throughput(cap)
+        else:
+            self.run_realtime(cap)
 
+        cap.release()
+        if self.frame_log:
+            self.frame_log.close()
+        if self.timeline:
+            # Yarıda kesildiyse sadece işlenen kısım güncellenir
+            finished = self.running
+            self.db.replace_timeline(str(self.source), self.timeline.finish(),
+                                     None if finished else self.timeline.last_msec)
+        self.alarm_service.clear(self.alarm_source)
+
+    def read_frame(self, cap):
+        """(kare, kare_no, medya_zamanı_ms) veya akış bittiyse None"""
+        with span("capture", cat="video"):
+            ret, frame = cap.read()
+        if not ret:
+            return None
+        index = self.frame_index
+        self.frame_index += 1
+        pos_msec = cap.get(cv2.CAP_PROP_POS_MSEC)
+        if pos_msec <= 0 and index and self.source_fps:
+            pos_msec = 1000.0 * index / self.source_fps
+        return frame, index, pos_msec
+
+    def run_realtime(self, cap):
+        """Kaynak FPS'ine göre bekle; geride kalınca kareleri çıkarım yapmadan atla"""
+        pace = not self.live and self.source_fps > 0
+        clock_base = None  # medya zamanı 0'ın duvar saati karşılığı
         while self.running and cap.isOpened():
             if self.paused:
                 time.sleep(0.1)
+                clock_base = None
                 continue
 
-            ret, frame = cap.read()
-            if not ret:
+            item = self.read_frame(cap)
+            if item is None:
                 break
-
-            img = frame.copy()
-            detections = self.detector.detect(frame)
-
-            bboxes = []
-            confidences = []
-            class_names = []
-
-            for det in detections:
-                x1, y1, x2, y2 = det['bbox']
-                cls_name = det['class']
-                conf = det['score']
-
-                bboxes.append([x1, y1, x2, y2])
-                confidences.append(conf)
-                class_names.append(cls_name)
-
-                level = get_danger_level(cls_name)
-                color = LEVEL_COLORS[level]
-
-                cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
-                cv2.putText(img, f"{cls_name} {conf:.2f}", (x1, y1 - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-
-            # Kritik nesne kontrolü
-            kritik_var = any(get_danger_level(cls) == "Çok Yüksek" for cls in class_names)
-            if kritik_var and not self.paused:
-                self.start_alarm()
-            else:
-                self.stop_alarm()
-
-            self.detection_updated.emit(detections)
-            self.frame_updated.emit(img)
-
-            # Kaydetme
-            now = time.time()
-            if detections and (now - self.last_saved > 5):
-                self.last_saved = now
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                save_path = f"results/video_frame_{timestamp}.jpg"
-                os.makedirs("results", exist_ok=True)
-                cv2.imwrite(save_path, img)
-
-                if self.db:
-                    self.db.insert_detection(
-                        classes=class_names,
-                        image_path=save_path,
-                        mode="video",
-                        bboxes=bboxes,
-                        confidences=confidences,
-                        operator=self.operator,
-                        role=self.role
-                    )
-                    self.db.add_log(self.operator, f"Video tespiti kaydedildi: {class_names}")
-
-        cap.release()
-        self.stop_alarm()
+            frame, index, pos_msec = item
+
+            if pace:
+                now = time.perf_counter()
+                if clock_base is None:
+                    clock_base = now - pos_msec / 1000.0
+                lag = now - (clock_base + pos_msec / 1000.0)
+                if lag < 0:
+                    time.sleep(-lag)
+                elif lag > 1.0 / self.source_fps:
+                    self.dropped_frames += 1
+                    continue
+
+            with span("inference", cat="video"):
+                started = time.perf_counter()
+                detections = self.detector.detect(frame)
+            self.handle_frame(frame, index, pos_msec, detections, time.perf_counter() - started)
+
+    def run_throughput(self, cap):
+        """Her kareyi işle; kareler batch halinde tek forward pass'ten geçer"""
+        # ProcessCapture kareleri bir sonraki read()'e kadar geçerli slot görünümleridir
+        copy_frames = not isinstance(cap, cv2.VideoCapture)
+        batch = []
+        while self.running and cap.isOpened():
+            if self.paused:
+                time.sleep(0.1)
+                continue
+            item = self.read_frame(cap)
+            if item is None:
+                break
+            frame, index, pos_msec = item
+            batch.append((frame.copy() if copy_frames else frame, index, pos_msec))
+            if len(batch) >= self.batch_size:
+                self.process_batch(batch)
+                batch = []
+        if batch and self.running:
+            self.process_batch(batch)
+
+    def process_batch(self, batch):
+        with span("inference", cat="video", frames=len(batch)):
+            started = time.perf_counter()
+            results = self.detector.detect_batch([frame for frame, _, _ in batch])
+        per_frame = (time.perf_counter() - started) / len(batch)
+        for (frame, index, pos_msec), detections in zip(batch, results):
+            self.handle_frame(frame, index, pos_msec, detections, per_frame)
+
+    def handle_frame(self, frame, frame_index, pos_msec, detections, inference_seconds):
+        self.processed_frames += 1
+        if self.shadow:
+            self.shadow.offer(self.alarm_source, frame, detections, inference_seconds * 1000.0,
+                              os.path.basename(self.detector.model_path))
+        if self.resolution:
+            new_size = self.resolution.observe(inference_seconds)
+            if new_size:
+                self.detector.imgsz = new_size
+        if self.frame_log:
+            self.frame_log.append(frame_index, pos_msec, detections)
+        if self.timeline:
+            self.timeline.add(frame_index, pos_msec, detections)
+
+        bboxes = [list(det['bbox']) for det in detections]
+        confidences = [det['score'] for det in detections]
+        class_names = [det['class'] for det in detections]
+
+        # Alarm kararı (seviye, tekrar sınırı, yükseltme) serviste verilir
+        if class_names and not self.paused:
+            self.alarm_service.post(self.alarm_source, class_names)
+
+        self.detection_updated.emit(detections)
+        # Kutular sadece canlı görüntü için (küçültülmüş karede) çizilir; diske ham kare yazılır
+        with span("draw", cat="video"):
+            display_frame = render_display_frame(frame, detections, *self.display_size)
+        if self.display_mailbox.post(display_frame):
+            self.frame_ready.emit()
+        if self.receivers(self.frame_updated) > 0:
+            self.frame_updated.emit(draw_detections(frame.copy(), detections))
+
+        # Kaydetme: dosyada medya zamanına göre 5 sn'de bir (throughput modunda da aynı aralık)
+        now = time.time() if self.live else pos_msec / 1000.0
+        if detections and (self.last_saved is None or not 0 <= now - self.last_saved <= 5):
+            self.last_saved = now
+            save_path = self.image_store.put(frame)
+
+            if self.db:
+                self.db.insert_detection(
+                    classes=class_names,
+                    image_path=save_path,
+                    mode="video",
+                    bboxes=bboxes,
+                    confidences=confidences,
+                    operator=self.operator,
+                    role=self.role,
+                    image_size=(frame.shape[1], frame.shape[0]),
+                    source=None if self.live else str(self.source),
+                    frame_index=frame_index,
+                    media_msec=None if self.live else pos_msec
+                )
+                self.db.add_log(self.operator, f"Video tespiti kaydedildi: {class_names}")
 
     def stop(self):
         self.running = False
-        self.stop_alarm()
+        self.alarm_service.clear(self.alarm_source)
         self.quit()
         self.wait()
\ No newline at end of file